@@ -0,0 +1,124 @@
+# FILE: customer_service/customer_search.py
+
+import base64
+import re
+from fastapi import HTTPException
+from sqlalchemy import Integer, and_, case, cast, func, or_
+from sqlalchemy.orm import Session
+import models
+
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 50
+MIN_TRIGRAM_QUERY = 3       # Коротші запити шукаємо за початком слова (з 1-2 символів триграм не вийде)
+MIN_PHONE_DIGITS = 2        # Стільки цифр достатньо, щоб шукати за префіксом телефону
+
+C = models.Customer
+SEARCH_COLUMNS = (C.id, C.name, C.phone, C.email, C.notes, C.bonus_balance)
+
+
+def normalize_phone(phone: str) -> str:
+    """'+38 (067) 123-45-67' → '0671234567': лише цифри, міжнародний код 380 → національний 0"""
+    digits = re.sub(r"\D", "", phone or "")
+    if digits.startswith("380"):
+        digits = "0" + digits[3:]
+    return digits
+
+
+def like_escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class CustomerSearch:
+    """
+    Пошук клієнтів для каси та CRM.
+    - Цифровий запит → префікс нормалізованого телефону (btree по phone_digits з колацією "C").
+    - Текстовий запит → ім'я через GIN-індекс pg_trgm: ILIKE '%q%' (від 3 символів) або початок слова.
+      Ранжування: збіг з початку імені вище, далі схожість триграм (similarity), далі id.
+    Сторінка обмежена limit, курсор наступної сторінки (keyset по рангу та id) — у заголовку X-Next-Cursor.
+    """
+
+    @staticmethod
+    def encode_cursor(rank, row_id: int) -> str:
+        raw = f"{rank}|{row_id}".encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str):
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+            rank, row_id = raw.rsplit("|", 1)
+            return rank, int(row_id)
+        except (ValueError, UnicodeDecodeError):
+            raise HTTPException(status_code=400, detail="Некоректний курсор пагінації")
+
+    @staticmethod
+    def _phone_query(db: Session, digits: str):
+        """(запит, ранг для сортування за зростанням) — префікс нормалізованого телефону"""
+        prefixes = {digits}
+        if not digits.startswith("0"):
+            prefixes.add("0" + digits)  # касир набрав номер без нуля: "67123..."
+        query = db.query(*SEARCH_COLUMNS).filter(
+            or_(*(C.phone_digits.like(like_escape(p) + "%", escape="\\") for p in prefixes))
+        )
+        return query, C.phone_digits
+
+    @staticmethod
+    def _name_query(db: Session, q: str):
+        """(запит, ранг для сортування за спаданням) — ім'я через триграмний індекс"""
+        escaped = like_escape(q)
+        starts = C.name.ilike(escaped + "%", escape="\\")
+        if len(q) >= MIN_TRIGRAM_QUERY:
+            match = C.name.ilike("%" + escaped + "%", escape="\\")
+        else:
+            # Початок будь-якого слова імені: "Пе" знайде і "Петро", і "Іван Петренко"
+            match = or_(starts, C.name.ilike("% " + escaped + "%", escape="\\"))
+        # Цілий ранг (а не float similarity) — щоб курсор порівнювався точно
+        rank = case((starts, 1000), else_=0) + cast(func.similarity(C.name, q) * 1000, Integer)
+        return db.query(*SEARCH_COLUMNS).filter(match), rank
+
+    @staticmethod
+    def build_query(db: Session, q: str, limit: int = SEARCH_DEFAULT_LIMIT, cursor: str = None):
+        """Запит сторінки: limit + 1 рядків (зайвий — ознака наступної сторінки, без окремого COUNT)"""
+        q = q.strip()
+        digits = normalize_phone(q)
+        is_phone = len(digits) >= MIN_PHONE_DIGITS and not re.search(r"[^\d\s()+\-]", q)
+
+        if is_phone:
+            query, rank = CustomerSearch._phone_query(db, digits)
+            if cursor:
+                c_rank, c_id = CustomerSearch.decode_cursor(cursor)
+                query = query.filter(or_(rank > c_rank, and_(rank == c_rank, C.id > c_id)))
+            query = query.order_by(rank.asc(), C.id.asc())
+        else:
+            query, rank = CustomerSearch._name_query(db, q)
+            if cursor:
+                c_rank, c_id = CustomerSearch.decode_cursor(cursor)
+                try:
+                    c_rank = int(c_rank)
+                except ValueError:
+                    raise HTTPException(status_code=400, detail="Некоректний курсор пагінації")
+                query = query.filter(or_(rank < c_rank, and_(rank == c_rank, C.id > c_id)))
+            query = query.order_by(rank.desc(), C.id.asc())
+
+        return query.add_columns(rank.label("rank")).limit(limit + 1)
+
+    @staticmethod
+    def search(db: Session, q: str, limit: int = SEARCH_DEFAULT_LIMIT, cursor: str = None):
+        """Повертає (рядки сторінки, курсор наступної сторінки або None)"""
+        rows = CustomerSearch.build_query(db, q, limit, cursor).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = CustomerSearch.encode_cursor(rows[-1].rank, rows[-1].id)
+        return rows, next_cursor
+
+    @staticmethod
+    def to_dict(row) -> dict:
+        return {
+            "id": row.id,
+            "name": row.name,
+            "phone": row.phone,
+            "email": row.email,
+            "notes": row.notes,
+            "bonus_balance": row.bonus_balance,
+        }
@@ -1,28 +1,64 @@
 # FILE: customer_service/main.py
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import OperationalError
 from pydantic import BaseModel
 from typing import Optional
 import time
-import requests  # Бібліотека для спілкування з іншими мікросервісами
+from contextlib import asynccontextmanager
+from starlette.concurrency import run_in_threadpool
 
 import models
-from database import engine, get_db
+from database import engine, get_db, get_report_db
+import db_layer
+from customer_search import CustomerSearch, normalize_phone, SEARCH_DEFAULT_LIMIT, SEARCH_MAX_LIMIT
+from order_history_client import OrderHistoryClient
+
+
+def prepare_search_schema():
+    """
+    Колонка phone_digits і пошукові індекси для вже існуючої таблиці customers
+    (create_all не додає колонки в існуючі таблиці). Ідемпотентно — безпечно при кожному старті.
+    """
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE customers ADD COLUMN IF NOT EXISTS phone_digits VARCHAR COLLATE \"C\""))
+        # Та сама нормалізація, що й normalize_phone(): лише цифри, 380... → 0...
+        conn.execute(text("""
+            UPDATE customers SET phone_digits = CASE
+                WHEN regexp_replace(phone, '\\D', '', 'g') LIKE '380%'
+                    THEN '0' || substr(regexp_replace(phone, '\\D', '', 'g'), 4)
+                ELSE regexp_replace(phone, '\\D', '', 'g')
+            END
+            WHERE phone_digits IS NULL AND phone IS NOT NULL
+        """))
+    for index in models.Customer.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+
 
 # DevOps: Захист при старті. Чекаємо, поки БД буде готова
 print("⏳ [Customer API] Очікування бази даних...")
 while True:
     try:
+        with engine.begin() as conn:
+            # Триграмний індекс імені потребує pg_trgm ще до create_all
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
         models.Base.metadata.create_all(bind=engine)
+        prepare_search_schema()
         print("✅ [Customer API] База даних готова та таблиці створено!")
         break
     except OperationalError:
         print("⏳ База ще завантажується... Повтор через 2 секунди.")
         time.sleep(2)
 
-app = FastAPI(title="POS Customer API (CRM)")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Закриваємо keep-alive з'єднання до product_service і Redis
+    await OrderHistoryClient.aclose()
+
+app = FastAPI(title="POS Customer API (CRM)", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -30,6 +66,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Схеми для валідації вхідних даних
@@ -47,9 +84,31 @@ class CustomerUpdate(BaseModel):
 
 
 @app.get("/customers/")
-def get_customers(db: Session = Depends(get_db)):
+def get_customers(db: Session = Depends(get_report_db)):
     return db.query(models.Customer).all()
 
+@app.get("/customers/search")
+@app.get("/customers/search/")
+def search_customers(
+    response: Response,
+    q: str = "",
+    limit: int = Query(SEARCH_DEFAULT_LIMIT, ge=1, le=SEARCH_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Пошук клієнтів за ім'ям або телефоном (на екрані каси — CartDrawer, на кожне натискання клавіші).
+    Цифри → префікс нормалізованого телефону, текст → ім'я через триграмний індекс з ранжуванням.
+    Повертає не більше limit клієнтів (лише потрібні касі поля); курсор наступної сторінки — у X-Next-Cursor.
+    """
+    if not q.strip():
+        return []
+
+    rows, next_cursor = CustomerSearch.search(db, q, limit=limit, cursor=cursor)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [CustomerSearch.to_dict(row) for row in rows]
+
 # 🔥 НОВИЙ ЕНДПОІНТ: Отримання одного клієнта (для перевірки балансу)
 @app.get("/customers/{customer_id}")
 def get_customer(customer_id: int, db: Session = Depends(get_db)):
@@ -64,24 +123,16 @@ def get_customer(customer_id: int, db: Session = Depends(get_db)):
     
     return db_customer
 
-@app.get("/customers/search")
-@app.get("/customers/search/")
-def search_customers(q: str = "", db: Session = Depends(get_db)):
+@app.get("/customers/{customer_id}/balance")
+def get_customer_balance(customer_id: int, db: Session = Depends(get_db)):
     """
-    Пошук клієнтів за ім'ям або телефоном. 
-    Використовується на екрані каси (CartDrawer).
+    Лише бонусний баланс клієнта (одна колонка за первинним ключем, без повного рядка Customer).
+    Використовується касою при промаху кешу балансу.
     """
-    if not q:
-        return []
-    
-    # Використовуємо .ilike для пошуку без урахування регістру
-    search_term = f"%{q}%"
-    customers = db.query(models.Customer).filter(
-        (models.Customer.name.ilike(search_term)) | 
-        (models.Customer.phone.ilike(search_term))
-    ).all()
-    
-    return customers
+    row = db.query(models.Customer.bonus_balance).filter(models.Customer.id == customer_id).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Клієнт не знайдений")
+    return {"customer_id": customer_id, "bonus_balance": float(row.bonus_balance or 0)}
 
 @app.post("/customers/")
 def create_customer(customer: CustomerCreate, db: Session = Depends(get_db)):
@@ -89,7 +140,7 @@ def create_customer(customer: CustomerCreate, db: Session = Depends(get_db)):
     if db_customer:
         raise HTTPException(status_code=400, detail="Клієнт з таким номером телефону вже існує")
     
-    new_customer = models.Customer(**customer.model_dump())
+    new_customer = models.Customer(**customer.model_dump(), phone_digits=normalize_phone(customer.phone))
     db.add(new_customer)
     db.commit()
     db.refresh(new_customer)
@@ -103,6 +154,7 @@ def update_customer(customer_id: int, customer: CustomerUpdate, db: Session = De
     
     for key, value in customer.model_dump().items():
         setattr(db_customer, key, value)
+    db_customer.phone_digits = normalize_phone(customer.phone)
         
     db.commit()
     db.refresh(db_customer)
@@ -120,29 +172,28 @@ def delete_customer(customer_id: int, db: Session = Depends(get_db)):
 
 # 🔥 НОВИЙ ЕНДПОІНТ: Мікросервісна взаємодія
 @app.get("/customers/{customer_id}/orders/")
-def get_customer_orders(customer_id: int, db: Session = Depends(get_db)):
+async def get_customer_orders(
+    customer_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
     """
-    Отримує історію замовлень шляхом запиту до сусіднього мікросервісу (product_service).
+    Отримує історію замовлень посторінково з сусіднього мікросервісу (product_service)
+    через пул keep-alive з'єднань; підсумки клієнта (візити, сума, середній чек) — з кешу.
     """
-    # 1. Перевіряємо, чи існує клієнт у НАШІЙ базі (customers_db)
-    db_customer = db.query(models.Customer).filter(models.Customer.id == customer_id).first()
-    if not db_customer:
+    # 1. Перевіряємо, чи існує клієнт у НАШІЙ базі (customers_db) — синхронна сесія, тож у пулі потоків
+    exists = await run_in_threadpool(
+        lambda: db.query(models.Customer.id).filter(models.Customer.id == customer_id).first()
+    )
+    if not exists:
         raise HTTPException(status_code=404, detail="Клієнт не знайдений")
 
-    # 2. Робимо HTTP запит до мікросервісу замовлень по внутрішній Docker-мережі
-    # Звертаємося до pos_product_service на порт 8000
-    try:
-        # У майбутньому, коли ми винесемо замовлення, URL зміниться, але зараз він такий:
-        target_url = f"http://pos_product_service:8000/orders/history/{customer_id}"
-        response = requests.get(target_url, timeout=5.0)
-        
-        if response.status_code == 200:
-            return response.json()
-        else:
-            return [] # Якщо у клієнта ще немає замовлень
-            
-    except requests.exceptions.RequestException as e:
-        print(f"⚠️ [Customer API] Помилка зв'язку з product_service: {e}")
-        # DevOps патерн "Resilience" (Стійкість): 
-        # Якщо сусідній сервіс впав, ми не кладемо свій сервіс, а повертаємо порожній масив.
-        return []
\ No newline at end of file
+    # 2. Сторінка історії + підсумки (порожня сторінка, якщо product_service недоступний)
+    return await OrderHistoryClient.get_history(customer_id, cursor=cursor, limit=limit)
+
+
+@app.get("/metrics/db")
+def get_db_metrics():
+    """Пули з'єднань: зайнято, очікування на видачу (p50/p95/p99/max), тайм-аути пулу"""
+    return db_layer.pool_metrics()
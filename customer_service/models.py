@@ -1,5 +1,5 @@
 # FILE: customer_service/models.py
-from sqlalchemy import Column, Integer, String, DateTime, Numeric, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Numeric, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base # Імпортуємо Base з нашого підключення до БД
@@ -9,11 +9,21 @@ class Customer(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String)
     phone = Column(String, unique=True, index=True)
+    # Телефон лише цифрами у національному форматі ('0671234567') — для пошуку за префіксом.
+    # Колація "C": звичайний btree тоді обслуговує і LIKE '067%', і ORDER BY phone_digits
+    phone_digits = Column(String().with_variant(String(collation="C"), "postgresql"), nullable=True)
     email = Column(String, nullable=True)
     notes = Column(String, nullable=True)
     bonus_balance = Column(Numeric(12, 2), default=0.00)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # 🔍 Пошук за ім'ям: GIN по триграмах (pg_trgm) обслуговує ILIKE '%q%' і similarity()
+        Index("ix_customers_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        # 📞 Пошук за телефоном: префікс + сортування прямо з індексу, без сортування збігів
+        Index("ix_customers_phone_digits", "phone_digits", "id"),
+    )
+
 # 🔥 НОВА ТАБЛИЦЯ: Історія бонусів та ІДЕМПОТЕНТНІСТЬ
 class BonusTransaction(Base):
     __tablename__ = "bonus_transactions"
@@ -0,0 +1,103 @@
+# FILE: customer_service/order_history_client.py
+
+import json
+import os
+from typing import Optional
+import httpx
+import redis
+import redis.asyncio as aioredis
+
+PRODUCT_URL = os.getenv("PRODUCT_URL", "http://pos_product_service:8000")
+PRODUCT_TIMEOUT = float(os.getenv("PRODUCT_TIMEOUT", "3.0"))
+PRODUCT_MAX_CONNECTIONS = int(os.getenv("PRODUCT_MAX_CONNECTIONS", "20"))
+
+REDIS_HOST = os.getenv("REDIS_HOST", "pos_redis")
+REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
+# Підсумки клієнта (візити, сума, середній чек, останній візит). customer_worker скидає ключ після нового чека
+ORDER_SUMMARY_KEY = "crm:order_summary:{}"
+ORDER_SUMMARY_TTL = int(os.getenv("ORDER_SUMMARY_TTL", "300"))
+
+
+class OrderHistoryClient:
+    """
+    Async-клієнт до історії чеків product_service для картки клієнта.
+    - Один httpx.AsyncClient на процес: keep-alive з'єднання перевикористовуються між запитами.
+    - Підсумки клієнта кешуються в Redis: при влучанні product_service не рахує агрегат,
+      а відкриття картки коштує одну легку сторінку історії.
+    """
+    _client: Optional[httpx.AsyncClient] = None
+    _redis = None
+    transport = None  # Підміняється в бенчмарку/тестах (product_service без мережі)
+
+    @classmethod
+    def client(cls) -> httpx.AsyncClient:
+        if cls._client is None:
+            cls._client = httpx.AsyncClient(
+                base_url=PRODUCT_URL,
+                timeout=PRODUCT_TIMEOUT,
+                limits=httpx.Limits(max_connections=PRODUCT_MAX_CONNECTIONS,
+                                    max_keepalive_connections=PRODUCT_MAX_CONNECTIONS),
+                transport=cls.transport,
+            )
+        return cls._client
+
+    @classmethod
+    def redis(cls):
+        if cls._redis is None:
+            cls._redis = aioredis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=0, decode_responses=True,
+                                        socket_timeout=1.0, socket_connect_timeout=1.0)
+        return cls._redis
+
+    @classmethod
+    async def _cached_summary(cls, customer_id: int) -> Optional[dict]:
+        try:
+            cached = await cls.redis().get(ORDER_SUMMARY_KEY.format(customer_id))
+        except redis.RedisError as e:
+            print(f"⚠️ [Customer API] Кеш підсумків недоступний ({e}). Рахуємо в product_service.")
+            return None
+        return json.loads(cached) if cached else None
+
+    @classmethod
+    async def _store_summary(cls, customer_id: int, summary: dict):
+        try:
+            await cls.redis().set(ORDER_SUMMARY_KEY.format(customer_id), json.dumps(summary), ex=ORDER_SUMMARY_TTL)
+        except redis.RedisError as e:
+            print(f"⚠️ [Customer API] Не вдалося закешувати підсумки клієнта {customer_id}: {e}")
+
+    @classmethod
+    async def get_history(cls, customer_id: int, cursor: str = None, limit: int = 20) -> dict:
+        """
+        {"items": [...], "next_cursor": ..., "summary": {...}}. Підсумки — з кешу або разом зі сторінкою
+        (with_summary) одним запитом. Якщо product_service недоступний — порожня сторінка, а не помилка картки.
+        """
+        summary = await cls._cached_summary(customer_id)
+        params = {"limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        if summary is None:
+            params["with_summary"] = "true"
+
+        try:
+            response = await cls.client().get(f"/orders/history/{customer_id}", params=params)
+        except httpx.HTTPError as e:
+            # DevOps патерн "Resilience" (Стійкість): сусідній сервіс впав — картка клієнта все одно відкривається
+            print(f"⚠️ [Customer API] Помилка зв'язку з product_service: {e}")
+            return {"items": [], "next_cursor": None, "summary": summary}
+        if response.status_code != 200:
+            print(f"⚠️ [Customer API] product_service відповів {response.status_code} на історію клієнта {customer_id}")
+            return {"items": [], "next_cursor": None, "summary": summary}
+
+        data = response.json()
+        if summary is None and data.get("summary") is not None:
+            summary = data["summary"]
+            await cls._store_summary(customer_id, summary)
+        return {"items": data.get("items", []), "next_cursor": data.get("next_cursor"), "summary": summary}
+
+    @classmethod
+    async def aclose(cls):
+        if cls._client is not None:
+            await cls._client.aclose()
+            cls._client = None
+        if cls._redis is not None:
+            await cls._redis.aclose()
+            cls._redis = None
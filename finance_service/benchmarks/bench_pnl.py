@@ -0,0 +1,113 @@
+# FILE: finance_service/benchmarks/bench_pnl.py
+"""
+Бенчмарк P&L: 1 000 000 транзакцій за рік (SQLite, у пам'яті).
+Порівнює старий звіт (JOIN + SUM по всьому регістру на кожен запит)
+з pnl_rollup.pnl_report (повні дні з денних підсумків + сирі транзакції лише на неповних межах).
+Також перевіряє, що обидва способи дають однакові суми.
+
+Запуск (з папки finance_service):  python benchmarks/bench_pnl.py [кількість_транзакцій]
+"""
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, func, insert
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import models
+import pnl_rollup
+from database import Base
+
+TRANSACTIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+DAYS = 365
+REPEATS = 5
+YEAR_START = datetime(2025, 1, 1)
+
+
+def seed(db):
+    db.add_all([models.Account(id=i, name=f"Рахунок {i}", type=t, balance=0) for i, t in ((1, "cash"), (2, "bank"), (3, "safe"))])
+    db.add_all([
+        models.TransactionCategory(id=1, name="Продаж товарів", type="INCOME"),
+        models.TransactionCategory(id=2, name="Закупівля товару", type="EXPENSE"),
+        models.TransactionCategory(id=3, name="Оренда", type="EXPENSE"),
+        models.TransactionCategory(id=4, name="Інкасація", type="SERVICE"),
+    ])
+    db.add_all([models.Shift(id=d + 1, user_id=1, opened_at=YEAR_START + timedelta(days=d)) for d in range(DAYS)])
+    db.commit()
+
+    rnd = random.Random(1)
+    step = DAYS * 86400 / TRANSACTIONS
+    chunk = []
+    for i in range(TRANSACTIONS):
+        ts = YEAR_START + timedelta(seconds=i * step)
+        category = rnd.choices((1, 2, 3, 4, None), weights=(80, 10, 1, 5, 4))[0]
+        amount = rnd.randint(40, 400) if category == 1 else -rnd.randint(100, 5000)
+        chunk.append({
+            "timestamp": ts, "amount": Decimal(amount), "account_id": rnd.choice((1, 2)),
+            "category_id": category, "shift_id": (ts - YEAR_START).days + 1, "user_id": 1
+        })
+        if len(chunk) == 20000:
+            db.execute(insert(models.Transaction), chunk)
+            chunk = []
+    if chunk:
+        db.execute(insert(models.Transaction), chunk)
+    db.commit()
+
+
+def old_pnl(db, start, end):
+    """Старий підхід: SUM по регістру з JOIN категорій на кожен запит"""
+    def total(cat_type):
+        q = db.query(func.sum(models.Transaction.amount)).join(models.TransactionCategory).filter(models.TransactionCategory.type == cat_type)
+        if start:
+            q = q.filter(models.Transaction.timestamp >= start)
+        if end:
+            q = q.filter(models.Transaction.timestamp < end)
+        return q.scalar() or 0
+    income, expense = total("INCOME"), total("EXPENSE")
+    return {"income": float(income), "expense": abs(float(expense))}
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    for _ in range(REPEATS):
+        result = fn(*args)
+    return result, (time.perf_counter() - started) * 1000 / REPEATS
+
+
+def main():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+
+    started = time.perf_counter()
+    seed(db)
+    print(f"Згенеровано {TRANSACTIONS:,} транзакцій за {time.perf_counter() - started:.1f} с")
+    started = time.perf_counter()
+    rows = pnl_rollup.backfill(db)
+    print(f"backfill: {rows:,} денних підсумків за {time.perf_counter() - started:.1f} с\n")
+
+    ranges = [
+        ("весь час", None, None),
+        ("30 днів, межі посеред дня", YEAR_START + timedelta(days=200, hours=9, minutes=30), YEAR_START + timedelta(days=230, hours=18)),
+        ("рівно 1 тиждень", YEAR_START + timedelta(days=100), YEAR_START + timedelta(days=107)),
+        ("частина одного дня", YEAR_START + timedelta(days=50, hours=8), YEAR_START + timedelta(days=50, hours=20)),
+    ]
+    print(f"{'період':<28} | {'старий, мс':>10} | {'rollup, мс':>10} | {'прискорення':>11} | суми збігаються")
+    print("-" * 88)
+    for name, start, end in ranges:
+        old, old_ms = timed(old_pnl, db, start, end)
+        new, new_ms = timed(pnl_rollup.pnl_report, db, start, end)
+        same = abs(old["income"] - new["income"]) < 0.01 and abs(old["expense"] - new["expense"]) < 0.01
+        print(f"{name:<28} | {old_ms:>10.1f} | {new_ms:>10.2f} | {old_ms / new_ms:>10.0f}x | {'так' if same else 'НІ'}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
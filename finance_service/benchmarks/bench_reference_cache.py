@@ -0,0 +1,154 @@
+# FILE: finance_service/benchmarks/bench_reference_cache.py
+"""
+Бенчмарк обробки order_paid у finance_worker: запити до БД і час на одну подію.
+
+Порівнює старий шлях (на кожен чек окремі SELECT відкритої зміни, рахунку за типом, категорії
+"Продаж товарів", повторне читання рахунку і ORM read-modify-write балансу) з новим
+(ReferenceCache + атомарний UPDATE balance = balance + :amount ... RETURNING версії довідників).
+Посередині прогону нового шляху зміна закривається і відкривається нова (з інвалідацією, як у API):
+перевіряється, що жоден чек після цього не потрапив у стару зміну.
+
+Стенд: файлова SQLite (як у воркера — окреме з'єднання на сесію). На PostgreSQL різниця більша:
+кожен запит — ще й мережевий round-trip.
+
+Запуск (з папки finance_service):  python benchmarks/bench_reference_cache.py [кількість_чеків]
+"""
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="bench_refs_"), "finance.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+from sqlalchemy import event, func
+
+with contextlib.redirect_stdout(io.StringIO()):
+    import finance_worker
+import models
+import pnl_rollup
+import shift_totals
+from database import SessionLocal, engine
+from reference_cache import ReferenceCache
+
+ORDERS = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+statements = {"count": 0}
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _count(conn, cursor, statement, parameters, context, executemany):
+    statements["count"] += 1
+
+
+def seed():
+    db = SessionLocal()
+    db.add_all([models.Account(id=i, name=f"Рахунок {i}", type=t, balance=0) for i, t in ((1, "cash"), (2, "bank"), (3, "safe"))])
+    db.add_all([
+        models.TransactionCategory(id=1, name="Продаж товарів", type="INCOME"),
+        models.TransactionCategory(id=2, name="Закупівля товару", type="EXPENSE"),
+    ])
+    db.add(models.Shift(id=1, user_id=1, opening_balance=0))
+    db.commit()
+    db.close()
+
+
+def legacy_order_paid(db, data):
+    """Старий шлях обробки order_paid (до кешу довідників), з тим самим журналом ідемпотентності і підсумками"""
+    if not finance_worker.idempotency.claim(db, f"order_paid:{data['order_id']}"):
+        return
+    active_shift = db.query(models.Shift).filter(models.Shift.closed_at == None).first()
+    shift_id = active_shift.id if active_shift else None
+    payment_type = 'bank' if data.get("payment_method") == 'card' else 'cash'
+    account = db.query(models.Account).filter(models.Account.type == payment_type, models.Account.is_active == True).first()
+    category = db.query(models.TransactionCategory).filter(models.TransactionCategory.name == "Продаж товарів").first()
+
+    account = db.query(models.Account).filter(models.Account.id == account.id).first()
+    amount = Decimal(str(data["amount"]))
+    timestamp = datetime.utcnow()
+    db.add(models.Transaction(timestamp=timestamp, amount=amount, account_id=account.id, category_id=category.id,
+                              shift_id=shift_id, user_id=1, reference_type='order', reference_id=data["order_id"]))
+    account.balance += amount
+    pnl_rollup.record_transaction(db, timestamp, amount, account.id, category.id, shift_id)
+    shift_totals.record_transaction(db, shift_id, account, amount, 'order')
+    db.commit()
+
+
+def order(order_id: int) -> dict:
+    return {"event_type": "order_paid", "order_id": order_id, "amount": 50 + order_id % 200,
+            "payment_method": "card" if order_id % 3 == 0 else "cash"}
+
+
+def run_legacy(first_id: int):
+    started = time.perf_counter()
+    before = statements["count"]
+    for order_id in range(first_id, first_id + ORDERS):
+        db = SessionLocal()
+        try:
+            legacy_order_paid(db, order(order_id))
+        finally:
+            db.close()
+    return (statements["count"] - before) / ORDERS, (time.perf_counter() - started) * 1000 / ORDERS
+
+
+def switch_shift():
+    """Те, що робить API на Z-звіті і відкритті нової зміни: зміни + інвалідація в одній транзакції"""
+    db = SessionLocal()
+    db.query(models.Shift).filter(models.Shift.closed_at == None).update({"closed_at": datetime.utcnow()})
+    db.add(models.Shift(id=2, user_id=1, opening_balance=0))
+    ReferenceCache.invalidate(db)
+    db.commit()
+    db.close()
+
+
+def run_cached(first_id: int):
+    requeued = []
+    channel = SimpleNamespace(basic_ack=lambda delivery_tag: None,
+                              basic_nack=lambda delivery_tag, requeue: requeued.append(delivery_tag))
+    switch_at = first_id + ORDERS // 2
+    started = time.perf_counter()
+    before = statements["count"]
+    for order_id in range(first_id, first_id + ORDERS):
+        if order_id == switch_at:
+            switch_shift()
+        body = json.dumps(order(order_id))
+        finance_worker.callback(channel, SimpleNamespace(delivery_tag=order_id), None, body)
+        while requeued and requeued[-1] == order_id:
+            requeued.pop()
+            finance_worker.callback(channel, SimpleNamespace(delivery_tag=order_id), None, body)  # Повторна доставка
+    return (statements["count"] - before) / ORDERS, (time.perf_counter() - started) * 1000 / ORDERS, switch_at
+
+
+def main():
+    with contextlib.redirect_stdout(io.StringIO()):
+        seed()
+    print(f"{ORDERS} подій order_paid на кожен шлях, SQLite {DB_PATH}\n")
+    with contextlib.redirect_stdout(io.StringIO()):
+        legacy_queries, legacy_ms = run_legacy(1)
+        cached_queries, cached_ms, switch_at = run_cached(ORDERS + 1)
+
+    print(f"{'шлях':<28} | {'запитів/подію':>13} | {'мс/подію':>9}")
+    print("-" * 58)
+    print(f"{'старий (SELECT-и + ORM)':<28} | {legacy_queries:>13.2f} | {legacy_ms:>9.3f}")
+    print(f"{'кеш довідників + UPDATE':<28} | {cached_queries:>13.2f} | {cached_ms:>9.3f}")
+    print(f"\nПрискорення: {legacy_ms / cached_ms:.2f}x, запитів менше на {legacy_queries - cached_queries:.2f} на подію")
+
+    db = SessionLocal()
+    misplaced = db.query(func.count(models.Transaction.id)).filter(
+        models.Transaction.reference_id >= switch_at, models.Transaction.shift_id != 2).scalar()
+    balance = db.query(func.sum(models.Account.balance)).scalar()
+    ledger = db.query(func.sum(models.Transaction.amount)).scalar()
+    db.close()
+    print(f"Чеків у закритій зміні після перемикання: {misplaced}")
+    print(f"Баланси рахунків = сума регістру: {'так' if balance == ledger else 'НІ'} ({balance} / {ledger})")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,9 +6,14 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func
 from pydantic import BaseModel
 from datetime import datetime
+from typing import Optional
 import models
 import schemas
-from database import get_db
+import pnl_rollup
+import shift_totals
+from reference_cache import ReferenceCache
+from database import get_db, get_report_db
+import db_layer
 
 app = FastAPI(title="POS Finance API")
 
@@ -33,7 +38,7 @@ def get_categories(db: Session = Depends(get_db)):
 
 # 3. Історія транзакцій
 @app.get("/finance/transactions/")
-def get_transactions(limit: int = 50, db: Session = Depends(get_db)):
+def get_transactions(limit: int = 50, db: Session = Depends(get_report_db)):
     return db.query(models.Transaction).order_by(models.Transaction.timestamp.desc()).limit(limit).all()
 
 # 4. Перевірка активної зміни
@@ -54,41 +59,54 @@ def open_shift(payload: dict, db: Session = Depends(get_db)):
         opening_balance=payload.get("opening_balance", 0)
     )
     db.add(new_shift)
+    ReferenceCache.invalidate(db)  # finance_worker має почати писати рухи в нову зміну
     db.commit()
     db.refresh(new_shift)
     return new_shift
 
-# 6. Закриття касової зміни
+# 6. Закриття касової зміни (Z-звіт)
 @app.post("/finance/shifts/{shift_id}/close")
-def close_shift(shift_id: int, cash_account_id: int, safe_account_id: int, actual_balance: float, db: Session = Depends(get_db)):
+def close_shift(shift_id: int, cash_account_id: int, safe_account_id: int, actual_balance: float, verify: bool = False, db: Session = Depends(get_db)):
     shift = db.query(models.Shift).filter(models.Shift.id == shift_id, models.Shift.closed_at == None).first()
     if not shift:
         raise HTTPException(status_code=404, detail="Активну зміну не знайдено")
     
     shift.closed_at = datetime.utcnow()
     shift.closing_balance_actual = actual_balance
-    
-    cash_acc = db.query(models.Account).filter(models.Account.id == cash_account_id).first()
-    expected = float(cash_acc.balance) if cash_acc else 0.0
+
+    # Очікуваний залишок — розмінка + рухи САМЕ цієї каси за зміну (а не баланс рахунку за весь час)
+    report = shift_totals.shift_report(db, shift, cash_account_id=cash_account_id, verify=verify)
+    expected = report["expected_cash"]
     
     shift.closing_balance_expected = expected
     shift.discrepancy = actual_balance - expected
+    ReferenceCache.invalidate(db)
     db.commit()
-    return {"status": "success", "shift": shift}
+    db.refresh(shift)
+    return {"status": "success", "shift": shift, "report": report}
+
+# 6.1. X-звіт: проміжні підсумки зміни без її закриття
+@app.get("/finance/shifts/{shift_id}/x-report")
+def get_x_report(shift_id: int, cash_account_id: Optional[int] = None, verify: bool = False, db: Session = Depends(get_db)):
+    """
+    Підсумки зміни з shift_totals (один рядок на рахунок, без SUM по регістру).
+    verify=true — перерахунок з сирих транзакцій і список розбіжностей у "verification".
+    """
+    shift = db.query(models.Shift).filter(models.Shift.id == shift_id).first()
+    if not shift:
+        raise HTTPException(status_code=404, detail="Зміну не знайдено")
+    return shift_totals.shift_report(db, shift, cash_account_id=cash_account_id, verify=verify)
 
 # 7. Звіт PnL (Доходи та Витрати)
 @app.get("/finance/report/pnl")
-def get_pnl(db: Session = Depends(get_db)):
-    # Базовий розрахунок загальних доходів та витрат
-    income = db.query(func.sum(models.Transaction.amount)).join(models.TransactionCategory).filter(models.TransactionCategory.type == 'INCOME').scalar() or 0
-    expense = db.query(func.sum(models.Transaction.amount)).join(models.TransactionCategory).filter(models.TransactionCategory.type == 'EXPENSE').scalar() or 0
-    
-    return {
-        "income": float(income),
-        "expense": abs(float(expense)),
-        "profit": float(income) - abs(float(expense)),
-        "categories": [] 
-    }
+def get_pnl(start: Optional[datetime] = None, end: Optional[datetime] = None, db: Session = Depends(get_report_db)):
+    """
+    P&L за період [start, end) (без меж — за весь час).
+    Повні дні читаються з денних підсумків pnl_daily_rollups, регістр сканується лише для неповних крайніх днів.
+    """
+    if start and end and start >= end:
+        raise HTTPException(status_code=400, detail="Початок періоду має бути раніше за кінець")
+    return pnl_rollup.pnl_report(db, start, end)
 
 # 8. Сівба (Генерація базових рахунків)
 @app.post("/finance/seed")
@@ -104,6 +122,7 @@ def seed_database(db: Session = Depends(get_db)):
             models.TransactionCategory(name="Закупівля товару", type="EXPENSE"),
             models.TransactionCategory(name="Інкасація", type="SERVICE")
         ])
+        ReferenceCache.invalidate(db)
         db.commit()
         return {"status": "Базу успішно наповнено базовими даними!"}
     return {"status": "Дані вже існують."}
@@ -117,6 +136,13 @@ def create_account(account: schemas.AccountCreate, db: Session = Depends(get_db)
         type=account.type
     )
     db.add(new_account)
+    ReferenceCache.invalidate(db)
     db.commit()
     db.refresh(new_account)
-    return new_account
\ No newline at end of file
+    return new_account
+
+# 9. Метрики пулів з'єднань з БД
+@app.get("/metrics/db")
+def get_db_metrics():
+    """Пули з'єднань: зайнято, очікування на видачу (p50/p95/p99/max), тайм-аути пулу"""
+    return db_layer.pool_metrics()
@@ -1,6 +1,6 @@
 # FILE: finance_service/models.py
 
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Numeric, Boolean, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Date, Numeric, Boolean, Text, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base # 🔥 Беремо Base з нашого нового файлу підключення
@@ -102,4 +102,65 @@ class Transaction(Base):
     # Встановлення зв'язків з об'єктами
     account = relationship("Account", back_populates="transactions")
     category = relationship("TransactionCategory", back_populates="transactions")
-    shift = relationship("Shift", back_populates="transactions")
\ No newline at end of file
+    shift = relationship("Shift", back_populates="transactions")
+
+# 5. class PnlDailyRollup(Base):
+class PnlDailyRollup(Base):
+    """
+    Денні підсумки регістру для P&L (похідна таблиця, перебудовується з transactions).
+    Одна строка на (день, категорія, рахунок, зміна); оновлюється в тій самій транзакції,
+    що й запис у регістр. 0 у category_id / shift_id означає "без категорії" / "поза зміною"
+    (NULL не можна використати в унікальному ключі upsert).
+    """
+    __tablename__ = "pnl_daily_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False)
+    category_id = Column(Integer, nullable=False, default=0)
+    account_id = Column(Integer, nullable=False)
+    shift_id = Column(Integer, nullable=False, default=0)
+
+    amount = Column(Numeric(14, 2), nullable=False, default=0)
+    tx_count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("day", "category_id", "account_id", "shift_id", name="uq_pnl_daily_rollup_key"),
+    )
+
+# 6. class ShiftTotal(Base):
+class ShiftTotal(Base):
+    """
+    Поточні підсумки касової зміни по рахунку (похідна таблиця, перебудовується з transactions).
+    Одна строка на (зміна, рахунок); оновлюється атомарним upsert у тій самій транзакції, що й запис
+    у регістр, тож X/Z-звіт читає готові суми замість SUM по всіх транзакціях зміни.
+    Суми зберігаються зі знаком регістру: надходження додатні, відтоки (cash_out, refunds, transfers_out) — від'ємні.
+    """
+    __tablename__ = "shift_totals"
+
+    id = Column(Integer, primary_key=True, index=True)
+    shift_id = Column(Integer, nullable=False)
+    account_id = Column(Integer, nullable=False)
+
+    cash_in = Column(Numeric(14, 2), nullable=False, default=0)       # Готівкові надходження (продажі, внесення)
+    cash_out = Column(Numeric(14, 2), nullable=False, default=0)      # Готівкові видатки (закупівлі з каси, вилучення)
+    card = Column(Numeric(14, 2), nullable=False, default=0)          # Безготівкові рухи (еквайринг)
+    refunds = Column(Numeric(14, 2), nullable=False, default=0)       # Повернення чеків
+    transfers_in = Column(Numeric(14, 2), nullable=False, default=0)  # Переміщення на рахунок
+    transfers_out = Column(Numeric(14, 2), nullable=False, default=0) # Переміщення з рахунку (інкасація)
+    net = Column(Numeric(14, 2), nullable=False, default=0)           # Сума всіх рухів рахунку за зміну
+    tx_count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("shift_id", "account_id", name="uq_shift_totals_key"),
+    )
+
+# 7. class ReferenceVersion(Base):
+class ReferenceVersion(Base):
+    """
+    Лічильник змін довідників (зміни, рахунки, категорії) — один рядок з id=1.
+    API збільшує його в тій самій транзакції, що й зміну; finance_worker за ним скидає свій кеш довідників.
+    """
+    __tablename__ = "reference_versions"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,142 @@
+# FILE: finance_service/pnl_rollup.py
+"""
+Інкрементальні денні підсумки для P&L.
+
+- record_transaction: upsert у pnl_daily_rollups у тій самій транзакції, що й запис у регістр.
+- pnl_report: звіт за будь-який період — повні дні беруться з підсумків,
+  сирі транзакції скануються лише для неповних крайніх днів.
+- backfill: перебудова підсумків з усієї таблиці transactions (для вже накопичених даних).
+
+Запуск backfill (з папки finance_service):  python pnl_rollup.py backfill
+"""
+import sys
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from sqlalchemy import func, and_, or_, insert, select, delete
+from sqlalchemy.orm import Session
+
+import models
+from db_layer import upsert
+
+R = models.PnlDailyRollup
+T = models.Transaction
+
+
+def record_transaction(db: Session, timestamp: datetime, amount: Decimal, account_id: int, category_id: int = None, shift_id: int = None):
+    """Додає транзакцію до денного підсумку (атомарний upsert, без читання рядка)"""
+    stmt = upsert(db, R).values(
+        day=timestamp.date(),
+        category_id=category_id or 0,
+        account_id=account_id,
+        shift_id=shift_id or 0,
+        amount=amount,
+        tx_count=1
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[R.day, R.category_id, R.account_id, R.shift_id],
+        set_={"amount": R.amount + stmt.excluded.amount, "tx_count": R.tx_count + 1}
+    )
+    db.execute(stmt)
+
+
+def backfill(db: Session) -> int:
+    """Перебудовує всі денні підсумки одним INSERT ... SELECT з регістру. Повертає кількість рядків"""
+    db.execute(delete(R))
+    grouped = select(
+        func.date(T.timestamp),
+        func.coalesce(T.category_id, 0),
+        T.account_id,
+        func.coalesce(T.shift_id, 0),
+        func.sum(T.amount),
+        func.count(T.id)
+    ).group_by(
+        func.date(T.timestamp), func.coalesce(T.category_id, 0), T.account_id, func.coalesce(T.shift_id, 0)
+    )
+    db.execute(insert(R).from_select(["day", "category_id", "account_id", "shift_id", "amount", "tx_count"], grouped))
+    db.commit()
+    return db.query(func.count(R.id)).scalar()
+
+
+def _split_range(start: datetime = None, end: datetime = None):
+    """
+    Ділить [start, end) на повні дні [first_day, last_day) для підсумків (None — без межі)
+    та сирі "хвости" на межах, які треба дорахувати з регістру.
+    Повертає (дні або None, [(від, до), ...]).
+    """
+    first_day = None
+    if start is not None:
+        first_day = start.date() if start.time() == time.min else start.date() + timedelta(days=1)
+    last_day = end.date() if end is not None else None
+
+    # Жодного повного дня всередині періоду — рахуємо тільки з регістру
+    if first_day is not None and last_day is not None and first_day >= last_day:
+        return None, [(start, end)]
+
+    raw_ranges = []
+    if start is not None and start.time() != time.min:
+        raw_ranges.append((start, datetime.combine(first_day, time.min)))
+    if end is not None and end.time() != time.min:
+        raw_ranges.append((datetime.combine(last_day, time.min), end))
+    return (first_day, last_day), raw_ranges
+
+
+def pnl_report(db: Session, start: datetime = None, end: datetime = None) -> dict:
+    """P&L за період [start, end): доходи, витрати, прибуток і розбивка по категоріях"""
+    days, raw_ranges = _split_range(start, end)
+    totals = {}  # {category_id: сума}
+
+    if days is not None:
+        first_day, last_day = days
+        rollup_query = db.query(R.category_id, func.sum(R.amount))
+        if first_day is not None:
+            rollup_query = rollup_query.filter(R.day >= first_day)
+        if last_day is not None:
+            rollup_query = rollup_query.filter(R.day < last_day)
+        for category_id, amount in rollup_query.group_by(R.category_id):
+            totals[category_id] = totals.get(category_id, Decimal("0")) + Decimal(amount or 0)
+
+    if raw_ranges:
+        raw_query = db.query(func.coalesce(T.category_id, 0), func.sum(T.amount)).filter(
+            or_(*[and_(T.timestamp >= lo, T.timestamp < hi) for lo, hi in raw_ranges])
+        )
+        for category_id, amount in raw_query.group_by(func.coalesce(T.category_id, 0)):
+            totals[category_id] = totals.get(category_id, Decimal("0")) + Decimal(amount or 0)
+
+    categories = {c.id: c for c in db.query(models.TransactionCategory).filter(
+        models.TransactionCategory.id.in_([c_id for c_id in totals if c_id])
+    )} if totals else {}
+
+    income = Decimal("0")
+    expense = Decimal("0")
+    breakdown = []
+    for category_id, amount in totals.items():
+        category = categories.get(category_id)
+        if not category or category.type not in ("INCOME", "EXPENSE"):
+            continue
+        if category.type == "INCOME":
+            income += amount
+        else:
+            expense += amount
+        breakdown.append({"id": category.id, "name": category.name, "type": category.type, "amount": abs(float(amount))})
+
+    return {
+        "income": float(income),
+        "expense": abs(float(expense)),
+        "profit": float(income) - abs(float(expense)),
+        "categories": sorted(breakdown, key=lambda c: (c["type"], -c["amount"]))
+    }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "backfill":
+        from database import SessionLocal, engine
+        models.Base.metadata.create_all(bind=engine)
+        db = SessionLocal()
+        try:
+            started = datetime.utcnow()
+            rows = backfill(db)
+            print(f"✅ [P&L Rollup] Перебудовано {rows} денних підсумків за {(datetime.utcnow() - started).total_seconds():.1f} с")
+        finally:
+            db.close()
+    else:
+        print("Використання: python pnl_rollup.py backfill")
@@ -0,0 +1,95 @@
+# FILE: finance_service/reference_cache.py
+
+from collections import namedtuple
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+import models
+from db_layer import upsert
+
+V = models.ReferenceVersion
+
+AccountRef = namedtuple("AccountRef", ["id", "name", "type"])
+
+
+def current_version():
+    """Поточна версія довідників як вираз (0, поки рядка ще немає) — для SELECT і для RETURNING"""
+    return func.coalesce(select(V.version).where(V.id == 1).scalar_subquery(), 0)
+
+
+class ReferenceSnapshot:
+    """Незмінний знімок довідників однієї версії: відкрита зміна, активні рахунки, категорії"""
+
+    def __init__(self, version: int, shift_id, accounts: dict, categories: dict):
+        self.version = version
+        self.shift_id = shift_id
+        self.accounts = accounts
+        self.categories = categories
+        self._by_type = {}
+        for account in sorted(accounts.values(), key=lambda a: a.id):
+            self._by_type.setdefault(account.type, account)  # Перший активний рахунок типу — як .first() раніше
+
+    def account_by_type(self, account_type: str):
+        return self._by_type.get(account_type)
+
+    def category_id(self, name: str):
+        return self.categories.get(name)
+
+
+class StaleReferences(Exception):
+    """Довідники змінились, поки воркер обробляв подію на старому знімку — подію треба повторити"""
+
+
+class ReferenceCache:
+    """
+    Кеш довідників finance_worker у пам'яті процесу.
+    - Знімок (відкрита зміна, рахунки, категорії) читається трьома запитами лише при зміні версії,
+      а не на кожну подію.
+    - Версію пише API (invalidate) в тій самій транзакції, що й відкриття/закриття зміни чи зміну рахунків.
+    - Свіжість перевіряється без окремого запиту: атомарний UPDATE балансу повертає поточну версію
+      (RETURNING), і якщо вона новіша за знімок — StaleReferences, транзакція відкочується, подія повторюється.
+    """
+    _snapshot = None
+
+    @classmethod
+    def get(cls, db: Session) -> ReferenceSnapshot:
+        return cls._snapshot or cls.reload(db)
+
+    @classmethod
+    def reload(cls, db: Session) -> ReferenceSnapshot:
+        # Спочатку версія, потім дані: знімок може бути новішим за свою версію, але ніколи не старішим
+        version = db.execute(select(current_version())).scalar()
+        shift = db.query(models.Shift.id).filter(models.Shift.closed_at == None).order_by(models.Shift.id).first()
+        accounts = {
+            row.id: AccountRef(row.id, row.name, row.type)
+            for row in db.query(models.Account.id, models.Account.name, models.Account.type).filter(models.Account.is_active == True)
+        }
+        categories = {}
+        for category_id, name in db.query(models.TransactionCategory.id, models.TransactionCategory.name).order_by(models.TransactionCategory.id):
+            categories.setdefault(name, category_id)
+        cls._snapshot = ReferenceSnapshot(version, shift.id if shift else None, accounts, categories)
+        print(f"📚 [Reference Cache] Довідники v{version}: зміна {cls._snapshot.shift_id}, рахунків {len(accounts)}, категорій {len(categories)}")
+        return cls._snapshot
+
+    @classmethod
+    def lookup(cls, db: Session, getter):
+        """
+        getter(знімок) → значення. Промах (None) → одне перечитування: рахунок могли щойно створити.
+        Повертає (знімок, значення).
+        """
+        refs = cls.get(db)
+        value = getter(refs)
+        if value is None:
+            refs = cls.reload(db)
+            value = getter(refs)
+        return refs, value
+
+    @classmethod
+    def clear(cls):
+        cls._snapshot = None
+
+    @staticmethod
+    def invalidate(db: Session):
+        """Збільшує версію довідників у транзакції сесії (комітить викликач разом зі своєю зміною)"""
+        stmt = upsert(db, V).values(id=1, version=1)
+        db.execute(stmt.on_conflict_do_update(index_elements=[V.id], set_={"version": V.version + 1}))
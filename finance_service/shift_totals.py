@@ -0,0 +1,156 @@
+# FILE: finance_service/shift_totals.py
+"""
+Поточні підсумки касових змін для миттєвих X/Z-звітів.
+
+- record_transaction: upsert у shift_totals (зміна × рахунок) у тій самій транзакції, що й запис у регістр.
+- shift_report: X-звіт (зміна триває) / Z-звіт (закриття) — читає готові рядки зміни, без SUM по регістру.
+  verify=True додатково перераховує суми з сирих транзакцій і показує розбіжності (drift).
+- backfill: перебудова підсумків з усієї таблиці transactions (для вже накопичених даних).
+
+Запуск backfill (з папки finance_service):  python shift_totals.py backfill
+"""
+import sys
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import case, delete, func, insert
+from sqlalchemy.orm import Session
+
+import models
+from db_layer import upsert
+
+S = models.ShiftTotal
+T = models.Transaction
+COLUMNS = ("cash_in", "cash_out", "card", "refunds", "transfers_in", "transfers_out")
+CASH_ACCOUNT_TYPES = ("cash", "safe")
+
+
+def bucket(account_type: str, ref_type: str, amount: Decimal) -> str:
+    """До якої колонки підсумку належить рух: переміщення і повернення — окремо, решта — за типом рахунку"""
+    if ref_type == "transfer":
+        return "transfers_in" if amount >= 0 else "transfers_out"
+    if ref_type == "refund":
+        return "refunds"
+    if account_type not in CASH_ACCOUNT_TYPES:
+        return "card"
+    return "cash_in" if amount >= 0 else "cash_out"
+
+
+def record_transaction(db: Session, shift_id: int, account: models.Account, amount: Decimal, ref_type: str = None):
+    """Додає рух до підсумку зміни (атомарний upsert, без читання рядка). Рухи поза зміною не рахуються"""
+    if not shift_id:
+        return
+    values = {column: Decimal("0") for column in COLUMNS}
+    values[bucket(account.type, ref_type, amount)] = amount
+    stmt = upsert(db, S).values(shift_id=shift_id, account_id=account.id, net=amount, tx_count=1, **values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[S.shift_id, S.account_id],
+        set_={column: getattr(S, column) + getattr(stmt.excluded, column) for column in (*COLUMNS, "net", "tx_count")}
+    )
+    db.execute(stmt)
+
+
+def _ledger_totals(db: Session, shift_id: int = None) -> dict:
+    """
+    Ті самі підсумки, пораховані з сирого регістру: {(shift_id, account_id): {колонка: сума}}.
+    Один GROUP BY (зміна, рахунок, тип рахунку, тип документа, знак), розкладка по колонках — через bucket().
+    """
+    positive = case((T.amount >= 0, True), else_=False)
+    query = db.query(
+        T.shift_id, T.account_id, models.Account.type, T.reference_type, positive, func.sum(T.amount), func.count(T.id)
+    ).join(models.Account, models.Account.id == T.account_id).filter(T.shift_id.isnot(None))
+    if shift_id is not None:
+        query = query.filter(T.shift_id == shift_id)
+
+    totals = {}
+    for row_shift, account_id, account_type, ref_type, is_positive, amount, count in query.group_by(
+        T.shift_id, T.account_id, models.Account.type, T.reference_type, positive
+    ):
+        amount = Decimal(amount or 0)
+        row = totals.setdefault((row_shift, account_id), {
+            **{column: Decimal("0") for column in COLUMNS}, "net": Decimal("0"), "tx_count": 0
+        })
+        row[bucket(account_type, ref_type, Decimal("1") if is_positive else Decimal("-1"))] += amount
+        row["net"] += amount
+        row["tx_count"] += count
+    return totals
+
+
+def backfill(db: Session) -> int:
+    """Перебудовує всі підсумки змін з регістру. Повертає кількість рядків"""
+    db.execute(delete(S))
+    rows = [{"shift_id": shift_id, "account_id": account_id, **values}
+            for (shift_id, account_id), values in _ledger_totals(db).items()]
+    if rows:
+        db.execute(insert(S), rows)
+    db.commit()
+    return len(rows)
+
+
+def shift_report(db: Session, shift: models.Shift, cash_account_id: int = None, verify: bool = False) -> dict:
+    """
+    X/Z-звіт зміни з shift_totals: рухи по кожному рахунку, підсумок і очікуваний залишок готівки.
+    cash_account_id — каса конкретного місця (кілька кас на зміну); без нього — всі готівкові рахунки.
+    """
+    rows = db.query(S, models.Account.name, models.Account.type)\
+        .join(models.Account, models.Account.id == S.account_id)\
+        .filter(S.shift_id == shift.id).order_by(S.account_id).all()
+
+    accounts, summary = [], {column: Decimal("0") for column in (*COLUMNS, "net")}
+    cash_net = Decimal("0")
+    for total, name, account_type in rows:
+        entry = {"account_id": total.account_id, "name": name, "type": account_type, "tx_count": total.tx_count}
+        for column in (*COLUMNS, "net"):
+            value = Decimal(getattr(total, column) or 0)
+            entry[column] = float(value)
+            summary[column] += value
+        accounts.append(entry)
+        if (total.account_id == cash_account_id) if cash_account_id else account_type in CASH_ACCOUNT_TYPES:
+            cash_net += Decimal(total.net or 0)
+
+    report = {
+        "shift_id": shift.id,
+        "kind": "Z" if shift.closed_at else "X",
+        "opened_at": shift.opened_at,
+        "closed_at": shift.closed_at,
+        "opening_balance": float(shift.opening_balance or 0),
+        "accounts": accounts,
+        "summary": {column: float(value) for column, value in summary.items()},
+        "tx_count": sum(entry["tx_count"] for entry in accounts),
+        "expected_cash": float(Decimal(shift.opening_balance or 0) + cash_net),
+    }
+    if verify:
+        report["verification"] = verify_shift(db, shift.id)
+    return report
+
+
+def verify_shift(db: Session, shift_id: int) -> dict:
+    """Перераховує підсумки зміни з регістру і порівнює з shift_totals: {"ok", "drift": [...]}"""
+    ledger = _ledger_totals(db, shift_id)
+    stored = {(shift_id, t.account_id): t for t in db.query(S).filter(S.shift_id == shift_id)}
+    drift = []
+    for key in sorted(set(ledger) | set(stored)):
+        expected = ledger.get(key, {})
+        for column in (*COLUMNS, "net", "tx_count"):
+            ledger_value = expected.get(column, 0)
+            stored_value = getattr(stored[key], column) if key in stored else 0
+            if Decimal(stored_value or 0) != Decimal(ledger_value):
+                drift.append({"account_id": key[1], "column": column,
+                              "stored": float(stored_value or 0), "ledger": float(ledger_value)})
+    if drift:
+        print(f"⚠️ [Shift Totals] Зміна #{shift_id}: {len(drift)} розбіжностей підсумків з регістром")
+    return {"ok": not drift, "drift": drift}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "backfill":
+        from database import SessionLocal, engine
+        models.Base.metadata.create_all(bind=engine)
+        db = SessionLocal()
+        try:
+            started = datetime.utcnow()
+            rows = backfill(db)
+            print(f"✅ [Shift Totals] Перебудовано {rows} підсумків змін за {(datetime.utcnow() - started).total_seconds():.1f} с")
+        finally:
+            db.close()
+    else:
+        print("Використання: python shift_totals.py backfill")
@@ -6,6 +6,19 @@ const isProcessing = ref(false)
 const paymentMethod = ref('cash')
 const selectedCustomer = ref(null)
 
+// Кожна каса (вкладка браузера на терміналі) має власний кошик на бекенді
+const REGISTER_KEY = 'pos_register_id'
+const registerId = localStorage.getItem(REGISTER_KEY) || (() => {
+  const id = `reg-${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 8)}`
+  localStorage.setItem(REGISTER_KEY, id)
+  return id
+})()
+
+const cartFetch = (url, options = {}) => fetch(url, {
+  ...options,
+  headers: { ...(options.headers || {}), 'X-Register-Id': registerId }
+})
+
 const totalSum = computed(() => {
     return cartItems.value.reduce((sum, item) => sum + (item.price * item.quantity), 0)
   })
@@ -23,7 +36,7 @@ export function useCart() {
 
   const fetchCart = async () => {
     try {
-      const res = await fetch('/api/cart/')
+      const res = await cartFetch('/api/cart/')
       if (res.ok) {
         const items = await res.json()
         cartItems.value = items.sort((a, b) => a.name.localeCompare(b.name))
@@ -33,7 +46,7 @@ export function useCart() {
 
   const addToCart = async (payload) => {
     try {
-      const res = await fetch('/api/cart/add', { 
+      const res = await cartFetch('/api/cart/add', { 
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify(payload)
@@ -44,7 +57,7 @@ export function useCart() {
   
   const removeFromCart = async (itemId) => {
      try {
-      await fetch(`/api/cart/${itemId}`, { method: 'DELETE' })
+      await cartFetch(`/api/cart/${itemId}`, { method: 'DELETE' })
       await fetchCart()
     } catch (err) { console.error(err) }
   }
@@ -87,7 +100,7 @@ export function useCart() {
 
   const clearCart = async () => {
     try {
-        await fetch('/api/cart/', { method: 'DELETE' })
+        await cartFetch('/api/cart/', { method: 'DELETE' })
         cartItems.value = []
     } catch(e) { console.error(e) }
   }
@@ -128,7 +141,7 @@ export function useCart() {
 
       console.log("📤 Checkout Request:", payload)
 
-      const res = await fetch('/api/cart/checkout', { 
+      const res = await cartFetch('/api/cart/checkout', { 
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify(payload)
@@ -144,7 +157,7 @@ export function useCart() {
 
       await fetchWarehouseData();
       
-      await fetch('/api/cart/', { method: 'DELETE' })
+      await cartFetch('/api/cart/', { method: 'DELETE' })
       cartItems.value = []
       
       // Вираховуємо суму для попапу
@@ -166,7 +179,17 @@ export function useCart() {
   }
 
 
-  const setCustomer = (c) => { selectedCustomer.value = c }
+  const setCustomer = async (c) => {
+    selectedCustomer.value = c
+    // Вільні бонуси (баланс мінус незавершені чеки) — заодно прогріває кеш балансу для самого чека
+    try {
+      const res = await fetch(`/api/orders/bonus-balance/${c.id}`)
+      if (res.ok && selectedCustomer.value?.id === c.id) {
+        const data = await res.json()
+        selectedCustomer.value = { ...selectedCustomer.value, bonus_balance: data.available_bonuses }
+      }
+    } catch (e) { console.error(e) }
+  }
   const removeCustomer = () => { selectedCustomer.value = null }
 
   return {
@@ -18,6 +18,9 @@ export function useCustomers() {
   const historyLoading = ref(false)
   const currentCustomerHistory = ref(null)
   const customerOrders = ref([])
+  const customerOrdersSummary = ref(null) // Візити / сума / середній чек за ВСЮ історію (з бекенда)
+  const historyNextCursor = ref(null)
+  const historyLoadingMore = ref(false)
 
   // --- ACTIONS ---
 
@@ -95,13 +98,18 @@ export function useCustomers() {
   const openHistory = async (customer) => {
     currentCustomerHistory.value = customer
     customerOrders.value = []
+    customerOrdersSummary.value = null
+    historyNextCursor.value = null
     showHistoryModal.value = true
     historyLoading.value = true
     
     try {
       const res = await fetch(`/api/customers/${customer.id}/orders/`)
       if (res.ok) {
-        customerOrders.value = await res.json()
+        const data = await res.json()
+        customerOrders.value = data.items
+        customerOrdersSummary.value = data.summary
+        historyNextCursor.value = data.next_cursor
       }
     } catch (err) {
       console.error(err)
@@ -111,6 +119,25 @@ export function useCustomers() {
     }
   }
 
+  // Наступна сторінка історії (keyset-курсор з попередньої відповіді)
+  const loadMoreHistory = async () => {
+    if (!historyNextCursor.value || historyLoadingMore.value) return
+    historyLoadingMore.value = true
+    try {
+      const customerId = currentCustomerHistory.value.id
+      const res = await fetch(`/api/customers/${customerId}/orders/?cursor=${encodeURIComponent(historyNextCursor.value)}`)
+      if (res.ok) {
+        const data = await res.json()
+        customerOrders.value = [...customerOrders.value, ...data.items]
+        historyNextCursor.value = data.next_cursor
+      }
+    } catch (err) {
+      console.error(err)
+    } finally {
+      historyLoadingMore.value = false
+    }
+  }
+
   // --- Watcher для пошуку ---
   let timeout = null
   watch(searchQuery, () => {
@@ -130,6 +157,10 @@ export function useCustomers() {
     historyLoading,
     currentCustomerHistory,
     customerOrders,
+    customerOrdersSummary,
+    historyNextCursor,
+    historyLoadingMore,
+    loadMoreHistory,
     // Actions
     fetchCustomers,
     openCreateModal,
@@ -9,6 +9,8 @@ export function useStatistics() {
   // 🔥 Параметри пагінації
   const currentPage = ref(1)
   const pageSize = ref(20) // Скільки завантажувати відразу
+  // Keyset-пагінація: курсор для кожної вже відкритої сторінки (для 1-ї — null)
+  let pageCursors = [null]
 
   // Для модального вікна деталей
   const showDetailModal = ref(false)
@@ -17,7 +19,8 @@ export function useStatistics() {
   const fetchOrders = async () => {
     loading.value = true
     try {
-      const url = `/api/orders/?page=${currentPage.value}&limit=${pageSize.value}`
+      const cursor = pageCursors[currentPage.value - 1]
+      const url = `/api/orders/?limit=${pageSize.value}&with_total=true` + (cursor ? `&cursor=${encodeURIComponent(cursor)}` : '')
       console.log("🚀 Запит до API:", url)
 
       const res = await fetch(url)
@@ -55,8 +58,12 @@ export function useStatistics() {
         // ---------------------------------------------------------
 
         orders.value = fetchedOrders
+        pageCursors[currentPage.value] = data.next_cursor
         totalOrders.value = data.total
-        totalPages.value = data.pages
+        // total — оцінка, тож остання сторінка визначається відсутністю next_cursor
+        totalPages.value = data.next_cursor
+          ? Math.max(currentPage.value + 1, Math.ceil(data.total / pageSize.value))
+          : currentPage.value
       } else {
         console.error("❌ Помилка бекенда:", res.status);
       }
@@ -68,8 +75,16 @@ export function useStatistics() {
   }
 
   // Слідкуємо за зміною сторінки або ліміту
-  watch([currentPage, pageSize], (newValues) => {
+  watch([currentPage, pageSize], (newValues, oldValues) => {
     console.log("👀 Вочер спрацював! Нові значення [page, limit]:", newValues);
+    // Інший розмір сторінки — старі курсори вже не на межах сторінок, починаємо з початку
+    if (oldValues && newValues[1] !== oldValues[1]) {
+      pageCursors = [null]
+      if (currentPage.value !== 1) {
+        currentPage.value = 1
+        return
+      }
+    }
     fetchOrders();
   }, { immediate: true })
 
@@ -11,6 +11,54 @@ const recipes = ref([])
 const loading = ref(false)
 const productRooms = ref([]) // <--- 2. ДОДАНО: Сховище для кімнат
 
+// Каталог (/api/products/) приходить без залишків і кешується браузером за ETag (304, поки меню не змінилось),
+// а залишки — окремим легким запитом /api/products/stock. Тут вони накладаються на товари й варіанти.
+const withStock = (catalogue, stock) => {
+  const productStock = (stock && stock.products) || {}
+  const variantStock = (stock && stock.variants) || {}
+  return catalogue.map(p => ({
+    ...p,
+    stock_quantity: productStock[p.id] ?? 0,
+    variants: (p.variants || []).map(v => ({ ...v, stock_quantity: variantStock[v.id] ?? 0 }))
+  }))
+}
+
+// Локальна копія довідників складу: повне завантаження один раз, далі — лише зміни після курсора
+// (/api/inventory/changes?since=...): нові/змінені рядки й видалені позиції
+const inventoryReplica = { cursor: null, unit: new Map(), ingredient: new Map(), consumable: new Map() }
+const REPLICA_KEYS = { unit: 'units', ingredient: 'ingredients', consumable: 'consumables' }
+
+const syncInventory = async () => {
+  let since = inventoryReplica.cursor
+  let hasMore = true
+  while (hasMore) {
+    const res = await fetch(since === null ? '/api/inventory/changes' : `/api/inventory/changes?since=${since}`)
+    if (!res.ok) throw new Error(`HTTP ${res.status}`)
+    const data = await res.json()
+    if (since !== null && data.latest < since) { // Базу складу перестворено — починаємо з нуля
+      since = null
+      continue
+    }
+    if (since === null) Object.keys(REPLICA_KEYS).forEach(type => inventoryReplica[type].clear())
+
+    for (const [type, key] of Object.entries(REPLICA_KEYS)) {
+      for (const row of data[key]) inventoryReplica[type].set(row.id, row)
+    }
+    for (const row of data.deleted) inventoryReplica[row.entity_type]?.delete(row.id)
+
+    since = data.next
+    hasMore = data.has_more
+  }
+  inventoryReplica.cursor = since
+
+  // Одиниця вкладена в рядок інгредієнта/матеріалу — беремо актуальну з копії одиниць
+  const byId = (a, b) => a.id - b.id
+  const withUnit = row => ({ ...row, unit: inventoryReplica.unit.get(row.unit_id) ?? row.unit })
+  units.value = [...inventoryReplica.unit.values()].sort(byId)
+  ingredients.value = [...inventoryReplica.ingredient.values()].sort(byId).map(withUnit)
+  consumables.value = [...inventoryReplica.consumable.values()].sort(byId).map(withUnit)
+}
+
 export function useWarehouse() {
 
   // Перейменували на fetchWarehouseData для сумісності з компонентами
@@ -30,28 +78,24 @@ export function useWarehouse() {
 
     console.log("🔄 Завантаження даних складу...")
 
-    // Паралельне завантаження всіх довідників + ТОВАРІВ
+    // Паралельне завантаження всіх довідників + ТОВАРІВ (довідники складу — лише зміни з минулого разу)
     const results = await Promise.all([
       safeFetch('/api/categories/'),
-      safeFetch('/api/units/'),
-      safeFetch('/api/ingredients/'),
-      safeFetch('/api/consumables/'),
+      syncInventory().catch(e => console.error('Error syncing inventory:', e)),
       safeFetch('/api/processes/groups/'),
       safeFetch('/api/recipes/'),
       safeFetch('/api/products/'), // <--- 2. ДОДАНО: Запит на товари
-      safeFetch('/api/product_rooms/') // <--- 3. ДОДАНО: Запит на кімнати
+      safeFetch('/api/product_rooms/'), // <--- 3. ДОДАНО: Запит на кімнати
+      safeFetch('/api/products/stock') // Залишки окремо від каталогу
 
     ])
 
     // Розподіляємо результати
     categories.value = results[0]
-    units.value = results[1]
-    ingredients.value = results[2]
-    consumables.value = results[3]
-    processGroups.value = results[4]
-    recipes.value = results[5]
-    products.value = results[6] // <--- 3. ДОДАНО: Збереження товарів
-    productRooms.value = results[7] // <--- 4. ДОДАНО: Збереження кімнат
+    processGroups.value = results[2]
+    recipes.value = results[3]
+    products.value = withStock(results[4], results[6]) // <--- 3. ДОДАНО: Збереження товарів (із залишками)
+    productRooms.value = results[5] // <--- 4. ДОДАНО: Збереження кімнат
 
     console.log(`✅ Дані оновлено. Товарів: ${products.value.length}`)
     
@@ -0,0 +1,104 @@
+# FILE: inventory_service/change_feed.py
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload
+import models
+import change_seq
+from stock_journal import StockJournal
+
+T = models.SyncTombstone
+
+# Довідники, які віддає стрічка: ключ відповіді → (entity_type, модель)
+FEED_ENTITIES = {
+    "units": ("unit", models.Unit),
+    "ingredients": ("ingredient", models.Ingredient),
+    "consumables": ("consumable", models.Consumable),
+    "suppliers": ("supplier", models.Supplier),
+}
+CHANGES_DEFAULT_LIMIT = 500
+CHANGES_MAX_LIMIT = 5000
+
+
+class ChangeFeed:
+    """
+    Delta-sync довідників складу (одиниці, інгредієнти, матеріали, постачальники).
+
+    - Кожен запис у довідник отримує change_seq — наступний номер з change_sequence (change_seq.py), взятий у тій самій
+      транзакції. Рядок лічильника заблокований до коміту, тож номери стають видимими строго по зростанню:
+      клієнт, який бачив номер N, уже ніколи не отримає зміну з номером < N.
+      Порядок блокувань завжди «лічильник → рядки довідника» (номер беремо до flush), тож без deadlock-ів.
+    - Видалення лишають надгробок (sync_tombstones) з власним номером.
+    - Продажі йдуть у журнал дельт і рядків не чіпають: залишок у стрічці оновлюється, коли компактор
+      переносить дельти в знімок (StockJournal.compact штампує змінені рядки), тобто раз на STOCK_COMPACT_INTERVAL.
+    - changes(since): лише рядки з change_seq > since і надгробки; since=None — повне завантаження.
+    """
+
+    @staticmethod
+    def stamp(db: Session, *items) -> int:
+        """Позначає змінені/нові об'єкти довідників одним новим номером"""
+        seq = change_seq.next_seq(db)
+        for item in items:
+            item.change_seq = seq
+        return seq
+
+    @staticmethod
+    def tombstone(db: Session, entity_type: str, entity_id: int) -> int:
+        seq = change_seq.next_seq(db)
+        db.add(T(entity_type=entity_type, entity_id=entity_id, change_seq=seq))
+        return seq
+
+    @staticmethod
+    def _window(query, column, since, upto):
+        """Номери в (since, upto]; since=None — з самого початку (разом з рядками, які ще не змінювались)"""
+        if since is not None:
+            query = query.where(column > since)
+        return query.where(column <= upto)
+
+    @staticmethod
+    def _cut(db: Session, since, upto: int, limit: int):
+        """
+        Межа сторінки: номер, до якого (включно) віддаємо зміни, або None, якщо все влазить у limit.
+        Рядки з однаковим номером (один коміт компактора) не розриваються між сторінками.
+        """
+        seqs = []
+        for entity_type, model in FEED_ENTITIES.values():
+            query = ChangeFeed._window(select(model.change_seq), model.change_seq, since, upto)
+            seqs += db.execute(query.order_by(model.change_seq).limit(limit + 1)).scalars().all()
+        if since is not None:
+            query = ChangeFeed._window(select(T.change_seq), T.change_seq, since, upto)
+            seqs += db.execute(query.order_by(T.change_seq).limit(limit + 1)).scalars().all()
+        if len(seqs) <= limit:
+            return None
+        return sorted(seqs)[limit - 1]
+
+    @staticmethod
+    def changes(db: Session, since: int = None, limit: int = CHANGES_DEFAULT_LIMIT) -> dict:
+        """
+        {"since", "next", "latest", "has_more", "units", "ingredients", "consumables", "suppliers", "deleted"}.
+        next — курсор для наступного запиту; has_more — є ще сторінки (запитувати одразу).
+        latest < since означає, що базу складу перестворено: клієнту треба повне завантаження (since=None).
+        """
+        # Вікно (since, latest]: усі номери до latest уже закомічені, а нові коміти в нього не потрапляють —
+        # окремі SELECT-и по таблицях бачать один і той самий набір змін навіть без спільного знімка транзакції
+        latest = change_seq.latest(db)
+        cut = ChangeFeed._cut(db, since, latest, limit)
+        upto = cut if cut is not None else latest
+        result = {"since": since, "next": upto, "latest": latest, "has_more": cut is not None, "deleted": []}
+
+        for key, (entity_type, model) in FEED_ENTITIES.items():
+            query = db.query(model)
+            if hasattr(model, "unit"):
+                query = query.options(joinedload(model.unit))
+            items = ChangeFeed._window(query, model.change_seq, since, upto).order_by(model.change_seq, model.id).all()
+            if entity_type in ("ingredient", "consumable"):
+                # Залишок = знімок + ще не ущільнені дельти, як у GET /ingredients/ і /consumables/
+                items = StockJournal.overlay(db, entity_type, items)
+            result[key] = items
+
+        if since is not None:
+            query = ChangeFeed._window(db.query(T.entity_type, T.entity_id, T.change_seq), T.change_seq, since, upto)
+            result["deleted"] = [
+                {"entity_type": entity_type, "id": entity_id, "change_seq": seq}
+                for entity_type, entity_id, seq in query.order_by(T.change_seq)
+            ]
+        return result
@@ -0,0 +1,19 @@
+# FILE: inventory_service/change_seq.py
+
+from sqlalchemy.orm import Session
+import models
+from db_layer import upsert
+
+C = models.ChangeSequence
+
+
+def next_seq(db: Session) -> int:
+    """Наступний номер зміни для стрічки /inventory/changes (блокує лічильник до кінця транзакції)"""
+    stmt = upsert(db, C).values(id=1, value=1)
+    stmt = stmt.on_conflict_do_update(index_elements=[C.id], set_={"value": C.value + 1}).returning(C.value)
+    return db.execute(stmt).scalar()
+
+
+def latest(db: Session) -> int:
+    """Останній виданий номер зміни (0 — змін ще не було)"""
+    return db.query(C.value).filter(C.id == 1).scalar() or 0
@@ -0,0 +1,220 @@
+# FILE: inventory_service/db_layer.py
+"""
+Спільний шар доступу до БД — однаковий файл у product/inventory/finance/customer_service
+(кожен сервіс збирається зі своєї папки, тож файл скопійовано; відрізняється лише рядок FILE).
+
+- Пул з'єднань з налаштуваннями з оточення (DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE)
+  і pre-ping: обірване з'єднання (рестарт Postgres) не долітає до запиту.
+- Тайм-аути запитів на рівні маршруту: залежності get_db / get_report_db ставлять
+  SET LOCAL statement_timeout на початку транзакції. Воркери (SessionLocal напряму) без тайм-ауту.
+- Звіти на репліку: RoutingSession звітної сесії шле SELECT-и на DATABASE_REPLICA_URL (якщо задано),
+  а все, що пише (flush, UPDATE/INSERT/DELETE), — завжди на основну базу. Звіти не займають пул оформлення чеків.
+- Метрики пулів (pool_metrics): скільки з'єднань зайнято, очікування на видачу з'єднання (p50/p95/p99/max),
+  тайм-аути пулу — віддаються ендпоінтом /metrics/db кожного сервісу.
+- upsert: INSERT ... ON CONFLICT під діалект сесії (Postgres у проді, SQLite у тестах і бенчмарках).
+"""
+import os
+import threading
+import time
+from collections import deque
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))        # Скільки чекати вільне з'єднання, сек
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))        # Перевідкривати з'єднання старші за, сек
+DB_REPLICA_POOL_SIZE = int(os.getenv("DB_REPLICA_POOL_SIZE", "5"))
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "10000"))         # Звичайні маршрути API
+DB_REPORT_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_REPORT_STATEMENT_TIMEOUT_MS", "30000"))  # Звіти, історія, стрічки
+DB_WAIT_SAMPLES = 1024  # Скільки останніх очікувань пулу тримаємо для перцентилів
+
+_metrics = {}
+
+
+# =========================================================
+# 📊 МЕТРИКИ ПУЛУ
+# =========================================================
+class PoolMetrics:
+    """Лічильники одного пулу: видачі, зайняті з'єднання, очікування на видачу, тайм-аути"""
+
+    def __init__(self, name: str, engine):
+        self.name = name
+        self.engine = engine
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.waits = deque(maxlen=DB_WAIT_SAMPLES)
+        self._lock = threading.Lock()
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+        engine.pool._metrics = self
+        _metrics[name] = self
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.in_use = max(0, self.in_use - 1)
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            self.waits.append(seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            waits = sorted(self.waits)
+            stats = {"pool": self.name, "in_use": self.in_use, "peak_in_use": self.peak_in_use,
+                     "checkouts": self.checkouts, "connects": self.connects, "timeouts": self.timeouts}
+        pool = self.engine.pool
+        if hasattr(pool, "size"):
+            stats.update(size=pool.size(), overflow=pool.overflow(), idle=pool.checkedin())
+        pick = lambda q: round(waits[min(len(waits) - 1, int(len(waits) * q))] * 1000, 3) if waits else 0.0
+        stats["wait_ms"] = {"p50": pick(0.5), "p95": pick(0.95), "p99": pick(0.99),
+                            "max": round(waits[-1] * 1000, 3) if waits else 0.0, "samples": len(waits)}
+        return stats
+
+
+class _TimedPoolMixin:
+    """Заміряє, скільки запит чекав на вільне з'єднання (включно з тайм-аутом пулу)"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        metrics = getattr(self, "_metrics", None)
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            if metrics:
+                metrics.record_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        if metrics:
+            metrics.record_wait(time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        # engine.dispose() створює новий пул — лічильники переходять до нього
+        pool = super().recreate()
+        pool._metrics = getattr(self, "_metrics", None)
+        return pool
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_metrics() -> dict:
+    """{назва пулу: знімок метрик} для ендпоінта /metrics/db"""
+    return {name: metrics.snapshot() for name, metrics in _metrics.items()}
+
+
+# =========================================================
+# 🔌 ДВИГУНИ
+# =========================================================
+def _pool_options(url: str, pool_size: int, poolclass) -> dict:
+    options = {"pool_pre_ping": True}
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite" or parsed.database not in (None, "", ":memory:"):
+        # SQLite у пам'яті (тести) — лише зі своїм пулом за замовчуванням, без розміру й overflow
+        options.update(poolclass=poolclass, pool_size=pool_size, max_overflow=DB_MAX_OVERFLOW,
+                       pool_timeout=DB_POOL_TIMEOUT, pool_recycle=DB_POOL_RECYCLE)
+    return options
+
+
+def make_engine(url: str, name: str = "primary", pool_size: int = DB_POOL_SIZE, **kwargs):
+    engine = create_engine(url, **{**_pool_options(url, pool_size, TimedQueuePool), **kwargs})
+    PoolMetrics(name, engine)
+    return engine
+
+
+def make_async_engine(url: str, name: str = "async", pool_size: int = DB_POOL_SIZE, **kwargs):
+    from sqlalchemy.ext.asyncio import create_async_engine
+    engine = create_async_engine(url, **{**_pool_options(url, pool_size, TimedAsyncQueuePool), **kwargs})
+    PoolMetrics(name, engine.sync_engine)
+    return engine
+
+
+# =========================================================
+# 🔀 СЕСІЇ З МАРШРУТИЗАЦІЄЮ
+# =========================================================
+class RoutingSession(Session):
+    """
+    info["replica_bind"] — двигун репліки (лише у звітних сесій): SELECT-и йдуть туди.
+    flush і будь-які інші оператори — на основну базу, тож звітна сесія, яка щось таки пише, не зламається.
+    info["statement_timeout_ms"] — тайм-аут кожного запиту транзакції (Postgres).
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        replica = self.info.get("replica_bind")
+        if replica is not None and not self._flushing and getattr(clause, "is_select", False):
+            return replica
+        return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+
+
+@event.listens_for(RoutingSession, "after_begin")
+def _apply_statement_timeout(session, transaction, connection):
+    timeout_ms = session.info.get("statement_timeout_ms")
+    if timeout_ms and connection.dialect.name == "postgresql":
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+
+
+class Database:
+    """
+    Двигуни й фабрики сесій сервісу.
+    - SessionLocal — основна база без тайм-ауту (воркери, міграції, backfill).
+    - get_db — залежність FastAPI для звичайних маршрутів (DB_STATEMENT_TIMEOUT_MS).
+    - get_report_db — для звітів/історії/стрічок: репліка (якщо є) і DB_REPORT_STATEMENT_TIMEOUT_MS.
+    """
+
+    def __init__(self, url: str, replica_url: str = None):
+        self.engine = make_engine(url, "primary")
+        self.replica_engine = make_engine(replica_url, "replica", pool_size=DB_REPLICA_POOL_SIZE) if replica_url else None
+        self.SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=self.engine)
+        self.ReportSessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=self.engine,
+                                               info={"replica_bind": self.replica_engine})
+        self.get_db = self.dependency(statement_timeout_ms=DB_STATEMENT_TIMEOUT_MS)
+        self.get_report_db = self.dependency(report=True, statement_timeout_ms=DB_REPORT_STATEMENT_TIMEOUT_MS)
+
+    def dependency(self, report: bool = False, statement_timeout_ms: int = None):
+        """Залежність FastAPI з власним тайм-аутом (напр. для окремого важкого маршруту)"""
+        factory = self.ReportSessionLocal if report else self.SessionLocal
+
+        def get_db():
+            db = factory(info={"statement_timeout_ms": statement_timeout_ms})  # Копія info фабрики, не спільний словник
+            try:
+                yield db
+            finally:
+                db.close()
+
+        return get_db
+
+
+# =========================================================
+# 🧩 ЗАПИТИ
+# =========================================================
+def upsert(db: Session, model):
+    """INSERT ... ON CONFLICT під поточний діалект сесії (Postgres у проді, SQLite у тестах і бенчмарках)"""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    return dialect_insert(model)
@@ -0,0 +1,256 @@
+# FILE: inventory_service/idempotency.py
+
+import hashlib
+import math
+import os
+import threading
+import time
+from datetime import datetime, timedelta, date
+from sqlalchemy import Column, Date, DateTime, MetaData, String, Table, and_, exists, func, literal, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+# Скільки днів пам'ятаємо оброблені події. Повтор з черги/outbox старший за це вже не очікується
+IDEMPOTENCY_RETENTION_DAYS = int(os.getenv("IDEMPOTENCY_RETENTION_DAYS", "30"))
+IDEMPOTENCY_PREMAKE_DAYS = int(os.getenv("IDEMPOTENCY_PREMAKE_DAYS", "7"))           # Партиції наперед
+IDEMPOTENCY_STATS_INTERVAL = float(os.getenv("IDEMPOTENCY_STATS_INTERVAL", "60"))    # Секунди між звітами
+BLOOM_FALSE_POSITIVE_RATE = float(os.getenv("IDEMPOTENCY_BLOOM_FP_RATE", "0.01"))
+BLOOM_MIN_CAPACITY = 10_000
+
+metadata = MetaData()
+
+# Журнал ключів, розбитий на денні партиції (Postgres): старі дні видаляються DROP TABLE, а не DELETE.
+# Унікальність — у межах дня (вимога Postgres: ключ партиціювання входить у PK); попередні дні
+# перевіряє той самий INSERT через NOT EXISTS, і лише коли bloom-фільтр не виключив ключ.
+idempotency_keys = Table(
+    "idempotency_keys", metadata,
+    Column("scope", String, primary_key=True),       # Хто обробляє: inventory / finance / loyalty
+    Column("key", String, primary_key=True),         # Ідентифікатор події, напр. "sale_order_105"
+    Column("day", Date, primary_key=True),           # День обробки (UTC) — ключ партиціювання
+    Column("processed_at", DateTime, nullable=False, default=datetime.utcnow),
+    postgresql_partition_by="RANGE (day)",
+)
+
+
+class BloomFilter:
+    """Множина без хибних «ні»: might_contain() == False означає, що ключа точно не додавали"""
+
+    def __init__(self, capacity: int, fp_rate: float = BLOOM_FALSE_POSITIVE_RATE):
+        capacity = max(capacity, BLOOM_MIN_CAPACITY)
+        self.size = max(8, int(-capacity * math.log(fp_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def might_contain(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class IdempotencyStore:
+    """
+    Спільний журнал ідемпотентності воркерів (один на сервіс, ключі розділені scope).
+
+    claim(db, key) — ОДИН INSERT ... ON CONFLICT DO NOTHING RETURNING у транзакції обробника:
+      True  — ключ новий, подію треба обробити (запис ключа зафіксується разом з її результатом);
+      False — дубль. Паралельний дубль чекає на блокуванні рядка, доки перша транзакція не завершиться.
+    Викликати ПЕРШИМ у транзакції: до нього сесія не тримає блокувань, тож щоденне обслуговування
+    партицій (окреме з'єднання) не чекає саме на себе.
+
+    Bloom-фільтр містить ключі днів до позавчора включно — вони точно закриті. Учора закритим не вважаємо:
+    ключ учорашньої транзакції іншого процесу (чи хоста з іншим годинником) може закомітитись уже після
+    перебудови фільтра. Якщо фільтр каже «точно ні», перевіряємо лише вчора й сьогодні; інакше той самий
+    INSERT додатково перевіряє всі попередні дні.
+    """
+
+    def __init__(self, engine, scope: str, retention_days: int = IDEMPOTENCY_RETENTION_DAYS):
+        self.engine = engine
+        self.scope = scope
+        self.retention_days = retention_days
+        self.is_postgres = engine.dialect.name == "postgresql"
+        self._lock = threading.Lock()
+        self._day = None
+        self._bloom = BloomFilter(BLOOM_MIN_CAPACITY)
+        self.claims = 0
+        self.duplicates = 0
+        self.fast_path = 0        # bloom виключив ключ — закриті дні не перевіряли
+        self.false_positives = 0  # bloom «можливо», а ключ виявився новим
+        self._reported_at = time.monotonic()
+
+    # --- СХЕМА ТА ОБСЛУГОВУВАННЯ ---
+    def ensure_schema(self) -> bool:
+        """Створює таблицю (і партиції). Повертає True, якщо таблиці ще не було — час перенести старі ключі"""
+        with self.engine.begin() as conn:
+            created = not self.engine.dialect.has_table(conn, idempotency_keys.name)
+            idempotency_keys.create(bind=conn, checkfirst=True)
+            if self.is_postgres:
+                # Страховка: рядок за межами створених партицій не валить обробку
+                conn.execute(text(
+                    "CREATE TABLE IF NOT EXISTS idempotency_keys_default PARTITION OF idempotency_keys DEFAULT"
+                ))
+        self.maintain()
+        return created
+
+    def maintain(self):
+        """Партиції на IDEMPOTENCY_PREMAKE_DAYS наперед і видалення днів, старших за retention"""
+        today = datetime.utcnow().date()
+        cutoff = today - timedelta(days=self.retention_days)
+        try:
+            with self.engine.begin() as conn:
+                if not self.is_postgres:
+                    conn.execute(idempotency_keys.delete().where(idempotency_keys.c.day < cutoff))
+                    return
+                conn.execute(text("SET LOCAL lock_timeout = '2s'"))
+                # Кілька процесів одного сервісу не створюють/видаляють партиції одночасно
+                conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('idempotency_keys'))"))
+                for offset in range(-1, IDEMPOTENCY_PREMAKE_DAYS + 1):
+                    day = today + timedelta(days=offset)
+                    conn.execute(text(
+                        f"CREATE TABLE IF NOT EXISTS idempotency_keys_{day:%Y%m%d} PARTITION OF idempotency_keys "
+                        f"FOR VALUES FROM ('{day.isoformat()}') TO ('{(day + timedelta(days=1)).isoformat()}')"
+                    ))
+                partitions = conn.execute(text("""
+                    SELECT c.relname FROM pg_inherits i
+                    JOIN pg_class c ON c.oid = i.inhrelid
+                    JOIN pg_class p ON p.oid = i.inhparent
+                    WHERE p.relname = 'idempotency_keys'
+                """)).scalars().all()
+                for name in partitions:
+                    suffix = name.rsplit("_", 1)[-1]
+                    if suffix.isdigit() and datetime.strptime(suffix, "%Y%m%d").date() < cutoff:
+                        conn.execute(text(f"DROP TABLE IF EXISTS {name}"))
+                        print(f"🧹 [Idempotency] Видалено партицію {name} (старша за {self.retention_days} дн.)")
+        except Exception as e:
+            # Не критично: партиції є наперед, а старі дні видаляться при наступному обслуговуванні
+            print(f"⚠️ [Idempotency] Обслуговування партицій не вдалося: {e}")
+
+    def _rollover_if_needed(self, today: date):
+        """Раз на добу: перебудова bloom-фільтра з закритих днів (до позавчора) і обслуговування партицій"""
+        with self._lock:
+            if self._day == today:
+                return
+            since, closed = today - timedelta(days=self.retention_days), today - timedelta(days=1)
+            with self.engine.connect() as conn:
+                total = conn.execute(select(func.count()).select_from(idempotency_keys).where(and_(
+                    idempotency_keys.c.scope == self.scope,
+                    idempotency_keys.c.day >= since, idempotency_keys.c.day < closed,
+                ))).scalar()
+                bloom = BloomFilter(int(total * 1.2))
+                keys = conn.execution_options(yield_per=5000).execute(select(idempotency_keys.c.key).where(and_(
+                    idempotency_keys.c.scope == self.scope,
+                    idempotency_keys.c.day >= since, idempotency_keys.c.day < closed,
+                )))
+                for key in keys.scalars():
+                    bloom.add(key)
+            self._bloom = bloom
+            self._day = today
+            print(f"🌸 [Idempotency:{self.scope}] Bloom-фільтр: {bloom.count} ключів за {self.retention_days} дн.")
+        self.maintain()
+
+    def import_keys(self, rows):
+        """Перенос ключів зі старих журналів: [(key, processed_at)], лише в межах retention"""
+        cutoff = datetime.utcnow() - timedelta(days=self.retention_days)
+        values = [
+            {"scope": self.scope, "key": key, "day": processed_at.date(), "processed_at": processed_at}
+            for key, processed_at in rows if processed_at and processed_at >= cutoff
+        ]
+        if not values:
+            return 0
+        with self.engine.begin() as conn:
+            conn.execute(self._insert().values(values).on_conflict_do_nothing())
+        print(f"📥 [Idempotency:{self.scope}] Перенесено {len(values)} ключів зі старого журналу")
+        return len(values)
+
+    # --- ЗАХОПЛЕННЯ КЛЮЧІВ ---
+    def _insert(self):
+        return (postgresql if self.is_postgres else sqlite).insert(idempotency_keys)
+
+    def claim(self, db: Session, key: str) -> bool:
+        return key in self.claim_many(db, [key])
+
+    def claim_many(self, db: Session, keys: list) -> set:
+        """Захоплює ключі в транзакції сесії db. Повертає множину НОВИХ ключів (решта — дублі)"""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return set()
+        now = datetime.utcnow()
+        today = now.date()
+        self._rollover_if_needed(today)
+
+        bloom = self._bloom
+        fresh = [k for k in keys if not bloom.might_contain(k)]
+        suspects = [k for k in keys if bloom.might_contain(k)]
+        claimed, false_positives = set(), 0
+
+        if fresh:
+            # Шлях без перевірки закритих днів: дубль можливий лише в партиціях учора і сьогодні.
+            # Учорашню — одним SELECT по індексу (її фільтр не покриває), сьогоднішню — конфліктом INSERT
+            seen_yesterday = set(db.execute(select(idempotency_keys.c.key).where(and_(
+                idempotency_keys.c.scope == self.scope,
+                idempotency_keys.c.day == today - timedelta(days=1),
+                idempotency_keys.c.key.in_(fresh),
+            ))).scalars())
+            new_keys = [k for k in fresh if k not in seen_yesterday]
+            if new_keys:
+                stmt = self._insert().values([
+                    {"scope": self.scope, "key": k, "day": today, "processed_at": now} for k in new_keys
+                ]).on_conflict_do_nothing().returning(idempotency_keys.c.key)
+                claimed.update(db.execute(stmt).scalars())
+
+        older = idempotency_keys.alias("older")
+        for key in suspects:
+            # Той самий один INSERT, але з NOT EXISTS по попередніх днях у межах retention
+            seen_before = exists().where(and_(
+                older.c.scope == self.scope, older.c.key == key,
+                older.c.day >= today - timedelta(days=self.retention_days), older.c.day < today,
+            ))
+            stmt = self._insert().from_select(
+                ["scope", "key", "day", "processed_at"],
+                select(literal(self.scope), literal(key), literal(today), literal(now)).where(~seen_before),
+            ).on_conflict_do_nothing().returning(idempotency_keys.c.key)
+            if db.execute(stmt).scalar() is not None:
+                claimed.add(key)
+                false_positives += 1
+
+        with self._lock:
+            self.claims += len(keys)
+            self.false_positives += false_positives
+            self.duplicates += len(keys) - len(claimed)
+            self.fast_path += len(fresh)
+        self.report_if_due()
+        return claimed
+
+    # --- МЕТРИКИ ---
+    def stats(self) -> dict:
+        with self._lock:
+            claims = self.claims or 1
+            suspects = self.claims - self.fast_path
+            return {
+                "scope": self.scope,
+                "claims": self.claims,
+                "duplicates": self.duplicates,
+                "duplicate_rate": round(self.duplicates / claims, 4),
+                "bloom_fast_path_rate": round(self.fast_path / claims, 4),
+                "bloom_false_positive_rate": round(self.false_positives / suspects, 4) if suspects else 0.0,
+                "bloom_keys": self._bloom.count,
+            }
+
+    def report_if_due(self):
+        if time.monotonic() - self._reported_at < IDEMPOTENCY_STATS_INTERVAL:
+            return
+        self._reported_at = time.monotonic()
+        s = self.stats()
+        print(
+            f"📊 [Idempotency:{self.scope}] {s['claims']} подій, дублів {s['duplicate_rate']:.1%}, "
+            f"без перевірки закритих днів {s['bloom_fast_path_rate']:.1%}, "
+            f"хибних спрацювань bloom {s['bloom_false_positive_rate']:.1%}"
+        )
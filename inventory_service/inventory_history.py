@@ -0,0 +1,94 @@
+# FILE: inventory_service/inventory_history.py
+
+import base64
+import json
+from datetime import datetime
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query
+import models
+
+HISTORY_MAX_LIMIT = 10000   # Верхня межа сторінки (великі вивантаження йдуть потоком)
+STREAM_CHUNK = 500          # Скільки рядків тягнемо з курсора БД за раз
+
+T = models.InventoryTransaction
+HISTORY_COLUMNS = (T.id, T.entity_type, T.entity_id, T.entity_name, T.change_amount, T.balance_after, T.reason, T.created_at)
+
+
+class InventoryHistory:
+    """
+    Журнал руху складу з keyset-пагінацією по (created_at, id).
+    Сторінка віддається JSON-масивом (як і раніше), а курсор наступної сторінки — у заголовку X-Next-Cursor.
+    Тіло відповіді серіалізується потоком, без побудови повного списку ORM-об'єктів у пам'яті.
+    """
+
+    @staticmethod
+    def encode_cursor(created_at: datetime, row_id: int) -> str:
+        raw = f"{created_at.isoformat()}|{row_id}".encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str):
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+            created_at, row_id = raw.rsplit("|", 1)
+            return datetime.fromisoformat(created_at), int(row_id)
+        except (ValueError, UnicodeDecodeError):
+            raise HTTPException(status_code=400, detail="Некоректний курсор пагінації")
+
+    @staticmethod
+    def apply_filters(query: Query, date_from: datetime = None, date_to: datetime = None, reason: str = None) -> Query:
+        """Діапазон дат [date_from, date_to) та фільтр причини за префіксом (напр. 'sale_order_', 'supply_in_')"""
+        if date_from:
+            query = query.filter(T.created_at >= date_from)
+        if date_to:
+            query = query.filter(T.created_at < date_to)
+        if reason:
+            query = query.filter(T.reason.startswith(reason, autoescape=True))
+        return query
+
+    @staticmethod
+    def page(query: Query, cursor: str = None, limit: int = 50):
+        """
+        Повертає (запит сторінки, курсор наступної сторінки або None).
+        query — запит з уже накладеними фільтрами (без сортування).
+        """
+        if cursor:
+            c_created_at, c_id = InventoryHistory.decode_cursor(cursor)
+            # (created_at, id) < (c_created_at, c_id) — розгорнуто для будь-якого діалекту
+            query = query.filter(or_(
+                T.created_at < c_created_at,
+                and_(T.created_at == c_created_at, T.id < c_id)
+            ))
+        ordered = query.order_by(T.created_at.desc(), T.id.desc())
+
+        # Легкий запит по індексу: останній рядок сторінки і чи є щось після нього
+        bounds = ordered.with_entities(T.created_at, T.id).offset(limit - 1).limit(2).all()
+        next_cursor = InventoryHistory.encode_cursor(*bounds[0]) if len(bounds) == 2 else None
+
+        return ordered.with_entities(*HISTORY_COLUMNS).limit(limit), next_cursor
+
+    @staticmethod
+    def stream(query: Query, next_cursor: str = None) -> StreamingResponse:
+        """JSON-масив рядків журналу, що серіалізується по мірі читання з БД"""
+        def body():
+            yield "["
+            first = True
+            for row in query.yield_per(STREAM_CHUNK):
+                item = {
+                    "id": row.id,
+                    "entity_type": row.entity_type,
+                    "entity_id": row.entity_id,
+                    "entity_name": row.entity_name,
+                    "change_amount": row.change_amount,
+                    "balance_after": row.balance_after,
+                    "reason": row.reason,
+                    "created_at": row.created_at.isoformat() if row.created_at else None,
+                }
+                yield ("" if first else ",") + json.dumps(item, ensure_ascii=False)
+                first = False
+            yield "]"
+
+        headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+        return StreamingResponse(body(), media_type="application/json", headers=headers)
@@ -1,5 +1,5 @@
 # FILE: inventory_service/models.py
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Numeric, Text
+from sqlalchemy import Column, Integer, BigInteger, String, Float, ForeignKey, DateTime, Numeric, Text, Index, JSON
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base # Беремо з нашого нового універсального database.py
@@ -10,6 +10,8 @@ class Unit(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True)
     symbol = Column(String)
+    # Номер зміни в стрічці /inventory/changes (change_feed.py); 0 — рядок ще не змінювався після появи колонки
+    change_seq = Column(BigInteger().with_variant(Integer, "sqlite"), nullable=False, default=0, server_default="0", index=True)
 
 # --- ІНГРЕДІЄНТИ (Кава, Молоко, Сиропи) ---
 class Ingredient(Base):
@@ -23,6 +25,7 @@ class Ingredient(Base):
     # Жорсткий зв'язок, бо Unit живе в цій же базі!
     unit_id = Column(Integer, ForeignKey("units.id"))
     costing_method = Column(String, default='wac')
+    change_seq = Column(BigInteger().with_variant(Integer, "sqlite"), nullable=False, default=0, server_default="0", index=True)
     
     unit = relationship("Unit")
 
@@ -38,9 +41,28 @@ class Consumable(Base):
     unit_id = Column(Integer, ForeignKey("units.id"), nullable=True)
     costing_method = Column(String, default='wac')
     category_id = Column(Integer, nullable=True)
+    change_seq = Column(BigInteger().with_variant(Integer, "sqlite"), nullable=False, default=0, server_default="0", index=True)
     
     unit = relationship("Unit")
 
+# --- ЖУРНАЛ ЗМІН ЗАЛИШКІВ (append-only) ---
+# Продаж/повернення не оновлюють гарячий рядок інгредієнта, а лише додають дельту.
+# Поточний залишок = stock_quantity (знімок) + сума ще не ущільнених дельт; ущільнення (stock_journal.py)
+# періодично переносить дельти в знімок і видаляє їх.
+class StockDelta(Base):
+    __tablename__ = "stock_deltas"
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    entity_type = Column(String, nullable=False)   # 'ingredient' або 'consumable'
+    entity_id = Column(Integer, nullable=False)
+    delta = Column(Float, nullable=False)          # < 0 — списання (FIFO при ущільненні), > 0 — повернення
+    reason = Column(String)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Сума дельт позиції читається лише з індексу (index-only scan): delta лежить у INCLUDE
+        Index("ix_stock_deltas_entity", "entity_type", "entity_id", postgresql_include=["delta"]),
+    )
+
 # --- ІСТОРІЯ ТРАНЗАКЦІЙ СКЛАДУ ---
 class InventoryTransaction(Base):
     __tablename__ = "inventory_transactions"
@@ -53,6 +75,12 @@ class InventoryTransaction(Base):
     reason = Column(String) # Наприклад: "sale_order_15" або "manual_adjustment"
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # Keyset-пагінація історії: картка позиції та загальна стрічка руху, найновіші зверху
+        Index("ix_inventory_tx_entity_created", "entity_type", "entity_id", created_at.desc(), id.desc()),
+        Index("ix_inventory_tx_created", created_at.desc(), id.desc()),
+    )
+
 class Supplier(Base):
     __tablename__ = "suppliers"
     id = Column(Integer, primary_key=True, index=True)
@@ -61,6 +89,7 @@ class Supplier(Base):
     email = Column(String, nullable=True)
     notes = Column(String, nullable=True) 
     created_at = Column(DateTime, default=datetime.utcnow)
+    change_seq = Column(BigInteger().with_variant(Integer, "sqlite"), nullable=False, default=0, server_default="0", index=True)
 
 class Supply(Base):
     __tablename__ = "supplies"
@@ -89,10 +118,59 @@ class SupplyItem(Base):
     
     supply = relationship("Supply", back_populates="items")
 
-# Журнал ідемпотентності (захист від дублікатів RabbitMQ)
+    __table_args__ = (
+        # Частковий індекс для FIFO: у ньому живуть лише відкриті партії (закриті з часом відсіюються самі)
+        Index(
+            "ix_supply_items_open_fifo", "entity_type", "entity_id", "id",
+            postgresql_where=(remaining_quantity > 0),
+            sqlite_where=(remaining_quantity > 0)
+        ),
+    )
+
+# Старий журнал ідемпотентності (ріс без обмежень). Замінено на idempotency_keys (idempotency.py);
+# читається лише один раз — для переносу свіжих ключів при першому старті нового журналу
 class ProcessedEvent(Base):
     __tablename__ = "processed_events"
     id = Column(Integer, primary_key=True, index=True)
     # Зберігатимемо унікальний ідентифікатор події, наприклад "sale_order_105"
     event_id = Column(String, unique=True, index=True) 
-    processed_at = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    processed_at = Column(DateTime, default=datetime.utcnow)
+
+# Transactional outbox: події для RabbitMQ, записані в тій самій транзакції, що й накладна
+class OutboxEvent(Base):
+    __tablename__ = "outbox_events"
+    id = Column(Integer, primary_key=True)
+    routing_key = Column(String, nullable=False)    # Ключ події в EVENTS_EXCHANGE (supply.paid, ...)
+    payload = Column(JSON, nullable=False)          # Тіло повідомлення
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    sent_at = Column(DateTime, nullable=True)       # NULL = ще не підтверджено брокером
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text, nullable=True)
+
+    __table_args__ = (
+        # Частковий індекс: релей і метрика глибини бачать лише невідправлені рядки
+        Index(
+            "ix_outbox_events_pending", "id",
+            postgresql_where=(sent_at.is_(None)),
+            sqlite_where=(sent_at.is_(None))
+        ),
+        Index("ix_outbox_events_sent_at", "sent_at"),
+    )
+
+
+# --- СТРІЧКА ЗМІН ДОВІДНИКІВ (delta-sync для терміналів і product_service) ---
+# Лічильник номерів змін — один рядок з id=1. Номер береться UPDATE ... RETURNING у транзакції зміни:
+# блокування рядка тримається до коміту, тож номери комітяться строго по порядку і в стрічці немає «дір».
+class ChangeSequence(Base):
+    __tablename__ = "change_sequence"
+    id = Column(Integer, primary_key=True)
+    value = Column(BigInteger().with_variant(Integer, "sqlite"), nullable=False, default=0)
+
+# Видалені рядки довідників: клієнт з курсором до видалення має дізнатися, що позиції більше немає
+class SyncTombstone(Base):
+    __tablename__ = "sync_tombstones"
+    id = Column(Integer, primary_key=True)
+    entity_type = Column(String, nullable=False)   # 'unit', 'ingredient', 'consumable', 'supplier'
+    entity_id = Column(Integer, nullable=False)
+    change_seq = Column(BigInteger().with_variant(Integer, "sqlite"), nullable=False, index=True)
+    deleted_at = Column(DateTime, default=datetime.utcnow)
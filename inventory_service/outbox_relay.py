@@ -0,0 +1,63 @@
+# FILE: inventory_service/outbox_relay.py
+import os
+import time
+
+from database import SessionLocal, engine
+import models
+from outbox import Outbox, OUTBOX_BATCH_SIZE
+from rabbitmq_client import rabbitmq
+
+POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "0.5"))   # Пауза, коли outbox порожній
+MAX_BACKOFF = float(os.getenv("OUTBOX_MAX_BACKOFF", "10"))        # Максимальна пауза після збою брокера
+CLEANUP_INTERVAL = 3600                                            # Як часто прибираємо відправлені рядки (сек)
+
+print("⏳ [Outbox Relay] Очікування бази даних...")
+while True:
+    try:
+        models.Base.metadata.create_all(bind=engine)
+        print("✅ [Outbox Relay] Підключено до БД Складу!")
+        break
+    except Exception:
+        print("⏳ База ще завантажується... Повтор через 2 секунди.")
+        time.sleep(2)
+
+
+def run():
+    """
+    Нескінченний цикл релею: пачка подій → publish усієї пачки з одним confirm → позначка sent_at.
+    Повна пачка — одразу беремо наступну; порожній outbox — чекаємо POLL_INTERVAL;
+    збій брокера — експоненційна пауза (події лишаються в outbox і підуть пізніше).
+    """
+    backoff = POLL_INTERVAL
+    last_cleanup = 0.0
+    print("🐇 [Outbox Relay] Готовий! Відправляю outbox у RabbitMQ...")
+
+    while True:
+        db = SessionLocal()
+        try:
+            sent = Outbox.relay_batch(db, rabbitmq)
+            backoff = POLL_INTERVAL
+            if sent:
+                print(f"📤 [Outbox Relay] Відправлено подій: {sent}")
+
+            if time.time() - last_cleanup > CLEANUP_INTERVAL:
+                deleted = Outbox.cleanup(db)
+                last_cleanup = time.time()
+                if deleted:
+                    print(f"🧹 [Outbox Relay] Прибрано відправлених подій: {deleted}")
+        except Exception as e:
+            db.rollback()
+            sent = 0
+            print(f"⚠️ [Outbox Relay] Помилка відправки ({e}). Повтор через {backoff:.1f} сек.")
+            time.sleep(backoff)
+            backoff = min(backoff * 2, MAX_BACKOFF)
+            continue
+        finally:
+            db.close()
+
+        if sent < OUTBOX_BATCH_SIZE:
+            time.sleep(POLL_INTERVAL)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,209 @@
+# FILE: inventory_service/stock_journal.py
+
+import os
+import time
+from sqlalchemy import bindparam, delete, func, insert, select, text, update
+from sqlalchemy.orm import Session
+import models
+from change_seq import next_seq
+
+# Як часто воркер переносить дельти в знімок і скільки дельт забирає за одну транзакцію
+STOCK_COMPACT_INTERVAL = float(os.getenv("STOCK_COMPACT_INTERVAL", "5"))
+STOCK_COMPACT_BATCH = int(os.getenv("STOCK_COMPACT_BATCH", "5000"))
+
+ENTITY_MODELS = {"ingredient": models.Ingredient, "consumable": models.Consumable}
+deltas = models.StockDelta.__table__
+
+
+def apply_fifo(db: Session, entity_type: str, entity_id: int, deduct_qty: float) -> dict:
+    """
+    Списує залишки з найстаріших партій (FIFO) set-based способом: віконна сума
+    SUM(remaining_quantity) OVER (ORDER BY id) відбирає лише ті партії, до яких реально дійде черга,
+    і UPDATE торкається тільки їх (частковий індекс ix_supply_items_open_fifo).
+    Повертає {"consumed": [{"batch_id", "quantity", "cost_per_unit", "cost"}], "cost", "shortage"}.
+    """
+    result = {"consumed": [], "cost": 0.0, "shortage": 0.0}
+    if deduct_qty <= 0:
+        return result
+
+    db.flush()
+    if db.get_bind().dialect.name == "postgresql":
+        # FOR UPDATE не поєднується з віконними функціями — серіалізуємо списання позиції advisory-lock'ом
+        db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:entity_type), :entity_id)"),
+                   {"entity_type": entity_type, "entity_id": entity_id})
+
+    items = models.SupplyItem.__table__
+    open_batches = select(
+        items.c.id,
+        items.c.remaining_quantity,
+        items.c.cost_per_unit,
+        (func.sum(items.c.remaining_quantity).over(order_by=items.c.id) - items.c.remaining_quantity).label("taken_before")
+    ).where(
+        items.c.entity_type == entity_type,
+        items.c.entity_id == entity_id,
+        items.c.remaining_quantity > 0
+    ).subquery()
+    needed = db.execute(
+        select(open_batches).where(open_batches.c.taken_before < deduct_qty).order_by(open_batches.c.id)
+    ).all()
+
+    rem_qty = deduct_qty
+    updates = []
+    for batch_id, remaining, cost_per_unit, _ in needed:
+        take = min(remaining, rem_qty)
+        cost_per_unit = cost_per_unit or 0.0
+        result["consumed"].append({"batch_id": batch_id, "quantity": take, "cost_per_unit": cost_per_unit, "cost": take * cost_per_unit})
+        result["cost"] += take * cost_per_unit
+        updates.append({"batch_id": batch_id, "take": take})
+        rem_qty -= take
+
+    if updates:
+        db.connection().execute(
+            update(items)
+            .where(items.c.id == bindparam("batch_id"))
+            .values(remaining_quantity=items.c.remaining_quantity - bindparam("take")),
+            updates
+        )
+    result["shortage"] = max(rem_qty, 0.0)
+    return result
+
+
+class StockJournal:
+    """
+    Залишки складу як «знімок + дельти».
+    - Продаж/повернення — лише INSERT у stock_deltas: жодного UPDATE і FOR UPDATE гарячого рядка
+      популярного інгредієнта (молоко, еспресо-суміш), тож паралельні воркери не чекають один на одного.
+    - Поточний залишок = stock_quantity + SUM(delta) одним запитом; сума дельт читається з індексу
+      ix_stock_deltas_entity (INCLUDE delta), таблицю дельт не відкриваємо.
+    - compact() раз на STOCK_COMPACT_INTERVAL секунд переносить дельти в знімок (один UPDATE на позицію),
+      списує партії FIFO та повертає повернення в найсвіжішу партію — в тій самій транзакції, що й DELETE дельт.
+    """
+    _compacted_at = 0.0
+    compact_errors = 0  # Невдалі ущільнення з моменту старту (навантажувальний тест вважає їх провалом)
+
+    @staticmethod
+    def _pending_sum(entity_type: str, entity_id):
+        return select(func.coalesce(func.sum(deltas.c.delta), 0.0)).where(
+            deltas.c.entity_type == entity_type, deltas.c.entity_id == entity_id
+        ).scalar_subquery()
+
+    @staticmethod
+    def current(db: Session, keys) -> dict:
+        """{(entity_type, id): (name, залишок)} для існуючих позицій — один запит на тип"""
+        result = {}
+        for entity_type, model in ENTITY_MODELS.items():
+            ids = sorted({entity_id for kind, entity_id in keys if kind == entity_type})
+            if not ids:
+                continue
+            rows = db.execute(select(
+                model.id, model.name,
+                func.coalesce(model.stock_quantity, 0) + StockJournal._pending_sum(entity_type, model.id)
+            ).where(model.id.in_(ids))).all()
+            result.update({(entity_type, row_id): (name, qty) for row_id, name, qty in rows})
+        return result
+
+    @staticmethod
+    def pending(db: Session, entity_type: str) -> dict:
+        """{id: сума неущільнених дельт} для типу позицій"""
+        rows = db.execute(
+            select(deltas.c.entity_id, func.sum(deltas.c.delta))
+            .where(deltas.c.entity_type == entity_type)
+            .group_by(deltas.c.entity_id)
+        ).all()
+        return dict(rows)
+
+    @staticmethod
+    def overlay(db: Session, entity_type: str, items: list) -> list:
+        """Підставляє в об'єкти списку поточний залишок (знімок + дельти) — лише для відповіді, не для запису"""
+        pending = StockJournal.pending(db, entity_type)
+        if pending:
+            for item in items:
+                db.expunge(item)  # Зміна атрибута не має потрапити в БД
+                item.stock_quantity = (item.stock_quantity or 0) + pending.get(item.id, 0.0)
+        return items
+
+    @staticmethod
+    def append(db: Session, rows: list):
+        """Дописує дельти [{"entity_type", "entity_id", "delta", "reason"}] одним INSERT (executemany)"""
+        if rows:
+            db.execute(insert(deltas), rows)
+
+    @staticmethod
+    def compact(db: Session, limit: int = STOCK_COMPACT_BATCH) -> int:
+        """
+        Переносить до limit найстаріших дельт у знімок. Повертає кількість перенесених дельт.
+        Читачі бачать або дельти, або вже оновлений знімок: DELETE і UPDATE в одній транзакції.
+        """
+        if db.get_bind().dialect.name == "postgresql":
+            # Один компактор на весь склад; інші воркери просто пропускають свій тік
+            if not db.execute(text("SELECT pg_try_advisory_xact_lock(hashtext('stock_deltas'))")).scalar():
+                return 0
+
+        oldest = select(deltas.c.id).order_by(deltas.c.id).limit(limit).scalar_subquery()
+        moved = db.execute(
+            delete(deltas).where(deltas.c.id.in_(oldest))
+            .returning(deltas.c.entity_type, deltas.c.entity_id, deltas.c.delta)
+        ).all()
+        if not moved:
+            return 0
+        # Змінені залишки потрапляють у стрічку /inventory/changes; номер — до UPDATE рядків (порядок блокувань)
+        seq = next_seq(db)
+
+        deducts, refunds = {}, {}
+        for entity_type, entity_id, delta in moved:
+            target = deducts if delta < 0 else refunds
+            target[(entity_type, entity_id)] = target.get((entity_type, entity_id), 0.0) + abs(delta)
+
+        for entity_type, model in ENTITY_MODELS.items():
+            table = model.__table__
+            net = {}
+            for (kind, entity_id), qty in deducts.items():
+                if kind == entity_type:
+                    net[entity_id] = net.get(entity_id, 0.0) - qty
+            for (kind, entity_id), qty in refunds.items():
+                if kind == entity_type:
+                    net[entity_id] = net.get(entity_id, 0.0) + qty
+            if net:
+                # Порядок по id — щоб не ловити deadlock з постачанням, яке теж оновлює знімок
+                db.connection().execute(
+                    update(table).where(table.c.id == bindparam("entity_id"))
+                    .values(stock_quantity=func.coalesce(table.c.stock_quantity, 0) + bindparam("net"), change_seq=seq),
+                    [{"entity_id": entity_id, "net": qty} for entity_id, qty in sorted(net.items())]
+                )
+
+        # Партії: одне FIFO-списання та одне повернення в найсвіжішу партію на позицію
+        for (entity_type, entity_id), qty in sorted(deducts.items()):
+            apply_fifo(db, entity_type, entity_id, qty)
+        for (entity_type, entity_id), qty in sorted(refunds.items()):
+            batch = db.query(models.SupplyItem).filter(
+                models.SupplyItem.entity_type == entity_type, models.SupplyItem.entity_id == entity_id
+            ).order_by(models.SupplyItem.id.desc()).first()
+            if batch:
+                batch.remaining_quantity += qty
+        return len(moved)
+
+    @classmethod
+    def maybe_compact(cls, session_factory, force: bool = False) -> int:
+        """Ущільнення з воркера: не частіше за STOCK_COMPACT_INTERVAL, поки не вибере весь хвіст дельт"""
+        if not force and time.monotonic() - cls._compacted_at < STOCK_COMPACT_INTERVAL:
+            return 0
+        cls._compacted_at = time.monotonic()
+        total = 0
+        while True:
+            db = session_factory()
+            try:
+                moved = cls.compact(db)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                cls.compact_errors += 1
+                print(f"⚠️ [Stock Journal] Ущільнення не вдалося: {e}")
+                break
+            finally:
+                db.close()
+            total += moved
+            if moved < STOCK_COMPACT_BATCH:
+                break
+        if total:
+            print(f"🗜️ [Stock Journal] Перенесено {total} дельт у залишки складу")
+        return total
@@ -0,0 +1,37 @@
+import sys
+import os
+import tempfile
+import pytest
+
+# 1. Коренева папка сервісу в шляху пошуку модулів (main, database, models)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 2. Файлова SQLite замість Postgres: двигун сервісу створюється вже при імпорті database.py
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'inventory_test.db')}"
+os.environ.pop("DATABASE_REPLICA_URL", None)
+
+from database import engine, SessionLocal
+import models
+
+@pytest.fixture(scope="function")
+def db_session():
+    """Чиста база на кожен тест і сесія SQLAlchemy до неї"""
+    models.Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        models.Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture(scope="function")
+def client(db_session):
+    """Клієнт FastAPI, маршрути якого працюють у тестовій сесії"""
+    from fastapi.testclient import TestClient
+    from main import app
+    from database import get_db
+
+    app.dependency_overrides[get_db] = lambda: db_session
+    with TestClient(app) as c:
+        yield c
+    app.dependency_overrides.clear()
@@ -0,0 +1,54 @@
+import models
+from change_feed import ChangeFeed
+from stock_journal import StockJournal
+
+def ids(rows):
+    return [row.id for row in rows]
+
+def seed(db):
+    """Одиниця (номер 1), два інгредієнти одним номером (2), ще один інгредієнт (3)"""
+    unit = models.Unit(name="Грам", symbol="г")
+    db.add(unit)
+    ChangeFeed.stamp(db, unit)
+    db.flush()
+    milk = models.Ingredient(name="Молоко", unit_id=unit.id, stock_quantity=10.0)
+    beans = models.Ingredient(name="Зерно", unit_id=unit.id, stock_quantity=5.0)
+    ChangeFeed.stamp(db, milk, beans)
+    db.add_all([milk, beans])
+    db.flush()
+    sugar = models.Ingredient(name="Цукор", unit_id=unit.id, stock_quantity=1.0)
+    ChangeFeed.stamp(db, sugar)
+    db.add(sugar)
+    db.commit()
+    return unit, milk, beans, sugar
+
+def test_changes_pages_keep_one_seq_together(db_session):
+    """Сторінка ріжеться по номеру зміни: рядки одного коміту не розриваються, навіть понад limit"""
+    unit, milk, beans, sugar = seed(db_session)
+
+    first = ChangeFeed.changes(db_session, None, limit=2)
+    assert (first["next"], first["latest"], first["has_more"]) == (2, 3, True)
+    assert ids(first["units"]) == [unit.id]
+    assert ids(first["ingredients"]) == [milk.id, beans.id]
+
+    second = ChangeFeed.changes(db_session, first["next"], limit=2)
+    assert (second["next"], second["has_more"]) == (3, False)
+    assert second["units"] == [] and ids(second["ingredients"]) == [sugar.id]
+
+    assert ChangeFeed.changes(db_session, 3)["ingredients"] == []
+
+def test_changes_report_tombstones_and_pending_deltas(db_session):
+    unit, milk, beans, sugar = seed(db_session)
+    sugar_id = sugar.id
+    db_session.delete(sugar)
+    ChangeFeed.tombstone(db_session, "ingredient", sugar_id)
+    StockJournal.append(db_session, [{"entity_type": "ingredient", "entity_id": milk.id, "delta": -4.0, "reason": "sale"}])
+    db_session.commit()
+
+    page = ChangeFeed.changes(db_session, 3)
+    assert page["deleted"] == [{"entity_type": "ingredient", "id": sugar_id, "change_seq": 4}]
+    assert page["next"] == 4 and page["ingredients"] == []
+    # Повне завантаження без надгробків; залишок — знімок + неущільнені дельти
+    full = ChangeFeed.changes(db_session, None)
+    assert full["deleted"] == []
+    assert {row.id: row.stock_quantity for row in full["ingredients"]} == {milk.id: 6.0, beans.id: 5.0}
@@ -0,0 +1,69 @@
+import pytest
+from datetime import datetime, timedelta
+from database import engine
+import idempotency
+from idempotency import IdempotencyStore, idempotency_keys
+
+@pytest.fixture
+def store(db_session):
+    store = IdempotencyStore(engine, scope="inventory")
+    store.ensure_schema()
+    yield store
+    db_session.rollback()  # SQLite: незакомічений claim тримає блокування файлу
+    idempotency.metadata.drop_all(bind=engine)
+
+def seed_key(key: str, days_ago: int, scope: str = "inventory"):
+    """Ключ, закомічений days_ago днів тому (іншим процесом — поза цим екземпляром сховища)"""
+    processed_at = datetime.utcnow() - timedelta(days=days_ago)
+    with engine.begin() as conn:
+        conn.execute(idempotency_keys.insert().values(
+            scope=scope, key=key, day=processed_at.date(), processed_at=processed_at
+        ))
+
+def test_claim_many_returns_only_new_keys(store, db_session):
+    assert store.claim_many(db_session, ["sale_1", "sale_2", "sale_1"]) == {"sale_1", "sale_2"}
+    db_session.commit()
+
+    assert store.claim_many(db_session, ["sale_2", "sale_3"]) == {"sale_3"}
+    db_session.commit()
+    assert store.claim(db_session, "sale_3") is False
+    db_session.commit()
+    # Інший scope — окремий журнал
+    assert IdempotencyStore(engine, scope="finance").claim(db_session, "sale_3") is True
+
+    stats = store.stats()
+    assert stats["claims"] == 5 and stats["duplicates"] == 2
+
+def test_bloom_covers_closed_days_and_yesterday_is_always_checked(store, db_session):
+    seed_key("sale_old", days_ago=3)
+    seed_key("sale_yesterday", days_ago=1)
+    store._day = None  # перебудова фільтра при наступному claim (як на початку нової доби)
+
+    assert store.claim_many(db_session, ["sale_new"]) == {"sale_new"}
+    db_session.commit()
+    assert store._bloom.might_contain("sale_old")
+    assert not store._bloom.might_contain("sale_yesterday")  # вчорашній день ще не вважається закритим
+
+    # Ключ, закомічений учора вже ПІСЛЯ перебудови фільтра, все одно ловиться на швидкому шляху
+    seed_key("sale_late", days_ago=1)
+    assert store.claim_many(db_session, ["sale_old", "sale_yesterday", "sale_late"]) == set()
+    db_session.commit()
+
+    stats = store.stats()
+    assert stats["duplicates"] == 3
+    assert stats["bloom_fast_path_rate"] == 0.75  # лише sale_old пішов повною перевіркою
+
+def test_import_keys_keeps_retention_and_blocks_redelivery(store, db_session):
+    now = datetime.utcnow()
+    imported = store.import_keys([
+        ("sale_10", now - timedelta(days=2)),
+        ("sale_11", now),
+        ("sale_ancient", now - timedelta(days=store.retention_days + 5)),
+        ("sale_no_date", None),
+    ])
+    assert imported == 2
+    # Повторний перенос (рестарт під час міграції) не падає на конфлікті
+    assert store.import_keys([("sale_11", now)]) == 1
+
+    store._day = None
+    assert store.claim_many(db_session, ["sale_10", "sale_11", "sale_ancient"]) == {"sale_ancient"}
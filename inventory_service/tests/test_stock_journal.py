@@ -0,0 +1,64 @@
+import pytest
+import models
+from stock_journal import StockJournal
+
+def make_ingredient(db, stock=10.0, cost=2.0):
+    unit = models.Unit(name="Грам", symbol="г")
+    db.add(unit)
+    db.flush()
+    ingredient = models.Ingredient(name="Молоко", unit_id=unit.id, stock_quantity=stock, cost_per_unit=cost)
+    db.add(ingredient)
+    db.commit()
+    return ingredient.id
+
+def supply(client, *lines):
+    response = client.post("/supplies/", json={"items": [
+        {"entity_type": "ingredient", "entity_id": entity_id, "quantity": qty, "cost_per_unit": cost}
+        for entity_id, qty, cost in lines
+    ]})
+    assert response.status_code == 200
+    return response.json()
+
+def test_supply_with_repeated_lines_adds_every_quantity(client, db_session):
+    """Два рядки однієї позиції: обидві кількості в залишку, WAC — від усієї накладної"""
+    ingredient_id = make_ingredient(db_session, stock=10.0, cost=2.0)
+    StockJournal.append(db_session, [{"entity_type": "ingredient", "entity_id": ingredient_id, "delta": -3.0, "reason": "sale"}])
+    db_session.commit()
+
+    supply(client, (ingredient_id, 5.0, 4.0), (ingredient_id, 7.0, 4.0))
+
+    db_session.expire_all()
+    ingredient = db_session.get(models.Ingredient, ingredient_id)
+    assert ingredient.stock_quantity == 22.0  # знімок: 10 + 5 + 7 (дельта продажу ще не ущільнена)
+    assert StockJournal.current(db_session, {("ingredient", ingredient_id)}) == {("ingredient", ingredient_id): ("Молоко", 19.0)}
+    # Середня ціна від поточного залишку 7 × 2 ₴ і 12 × 4 ₴
+    assert ingredient.cost_per_unit == pytest.approx((7 * 2.0 + 12 * 4.0) / 19)
+    batches = db_session.query(models.SupplyItem).order_by(models.SupplyItem.id).all()
+    assert [b.remaining_quantity for b in batches] == [5.0, 7.0]
+
+def test_compact_moves_deltas_into_snapshot_and_batches(client, db_session):
+    ingredient_id = make_ingredient(db_session, stock=0.0, cost=0.0)
+    supply(client, (ingredient_id, 10.0, 1.0))
+    supply(client, (ingredient_id, 10.0, 2.0))
+    key = ("ingredient", ingredient_id)
+    StockJournal.append(db_session, [
+        {"entity_type": "ingredient", "entity_id": ingredient_id, "delta": -12.0, "reason": "sale_order_1"},
+        {"entity_type": "ingredient", "entity_id": ingredient_id, "delta": 1.0, "reason": "refund_order_1"},
+    ])
+    db_session.commit()
+    seq_before = db_session.get(models.Ingredient, ingredient_id).change_seq
+    assert StockJournal.current(db_session, {key, ("ingredient", 999)}) == {key: ("Молоко", 9.0)}
+
+    assert StockJournal.compact(db_session) == 2
+    db_session.commit()
+
+    db_session.expire_all()
+    ingredient = db_session.get(models.Ingredient, ingredient_id)
+    assert ingredient.stock_quantity == 9.0
+    assert ingredient.change_seq > seq_before  # зміна залишку потрапляє у стрічку /inventory/changes
+    assert db_session.query(models.StockDelta).count() == 0
+    # FIFO: перша партія вибрана повністю, друга — на 2; повернення — у найсвіжішу партію
+    batches = db_session.query(models.SupplyItem).order_by(models.SupplyItem.id).all()
+    assert [b.remaining_quantity for b in batches] == [0.0, 9.0]
+    assert StockJournal.current(db_session, {key}) == {key: ("Молоко", 9.0)}
+    assert StockJournal.compact(db_session) == 0
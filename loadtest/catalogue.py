@@ -0,0 +1,256 @@
+# FILE: loadtest/catalogue.py
+"""
+Синтетичний каталог кав'ярні та крива надходження гостей за день.
+
+Каталог живе в зарезервованому діапазоні ID (LOAD_ID_BASE + n), тож навантажувальний прогін можна
+запускати на робочому стенді: чужі товари/клієнти не чіпаються, повторний запуск не дублює каталог.
+Таблиці читаються через reflection — модулі сервісів (models.py кожного) сюди не імпортуються.
+"""
+import math
+import os
+import random
+from datetime import datetime
+from sqlalchemy import MetaData, Table, func, inspect, select, text
+
+ID_BASE = int(os.getenv("LOAD_ID_BASE", "900000"))
+START_STOCK = 1_000_000.0
+START_BONUSES = 500.0
+CUSTOMERS = 200
+
+OPEN_HOUR, CLOSE_HOUR = 7.0, 21.0
+# Піки дня: (година, ширина в годинах, вага) — ранкова кава, обід, вечірній спад після роботи
+PEAKS = ((8.5, 0.75, 1.0), (13.0, 1.0, 0.8), (17.5, 1.0, 0.5))
+BASE_RATE = 0.15
+
+# --- СИРОВИНА ---
+INGREDIENTS = ["Еспресо-суміш", "Молоко 2.5%", "Вершки", "Вівсяне молоко", "Мигдальне молоко", "Сироп ваніль",
+               "Сироп карамель", "Какао", "Чай чорний", "Чай зелений", "Цукор", "Кориця", "Борошно", "Масло",
+               "Яйця", "Сир маскарпоне", "Шоколад", "Ягоди", "Шинка", "Сир твердий"]
+CONSUMABLES = ["Стакан S", "Стакан M", "Стакан L", "Кришка", "Еко-стакан M", "Серветка", "Пакет", "Контейнер"]
+
+# Напої: (назва, техкарта [(інгредієнт, кількість, у %)], ціни S/M/L)
+DRINKS = [
+    ("Еспресо", [(0, 18, False)], (35, 45, 55)),
+    ("Американо", [(0, 18, False)], (40, 50, 60)),
+    ("Капучино", [(0, 18, False), (1, 70, True)], (55, 65, 75)),
+    ("Лате", [(0, 18, False), (1, 80, True)], (60, 70, 80)),
+    ("Флет Уайт", [(0, 36, False), (1, 60, True)], (65, 75, 85)),
+    ("Раф", [(0, 18, False), (2, 40, True), (5, 5, True)], (75, 85, 95)),
+    ("Какао", [(7, 25, False), (1, 85, True)], (55, 65, 75)),
+    ("Чай чорний", [(8, 3, False)], (35, 40, 45)),
+    ("Чай зелений", [(9, 3, False)], (35, 40, 45)),
+    ("Мокко", [(0, 18, False), (16, 20, False), (1, 70, True)], (70, 80, 90)),
+]
+SIZES = (("S", 250, 0), ("M", 350, 1), ("L", 450, 2))
+# Їжа: (назва, ціна, [(інгредієнт, кількість)], пакування)
+FOOD = [
+    ("Круасан", 55, [(12, 60), (13, 30)], 6),
+    ("Сирник", 65, [(15, 120), (14, 1)], 7),
+    ("Брауні", 60, [(16, 40), (12, 30), (13, 20)], 6),
+    ("Сендвіч з шинкою", 95, [(18, 60), (19, 30), (12, 80)], 7),
+    ("Чізкейк", 85, [(15, 100), (17, 20)], 7),
+]
+# Модифікатори напоїв: (група, [(назва, доплата, інгредієнт, кількість)])
+MODIFIER_GROUPS = [
+    ("Альтернативне молоко", [("Вівсяне", 15, 3, 150), ("Мигдальне", 20, 4, 150)]),
+    ("Сироп", [("Ваніль", 10, 5, 15), ("Карамель", 10, 6, 15)]),
+]
+OWN_CUP_SHARE = 0.1     # Гість зі своєю чашкою: без стакана
+ECO_CUP_SHARE = 0.05    # Заміна стакана M на еко-стакан
+
+
+def cid(n: int) -> int:
+    return ID_BASE + n
+
+
+def build() -> dict:
+    """Рядки каталогу по таблицях сервісів (детерміновано: ті самі ID при кожному запуску)"""
+    products, variants, recipes, recipe_items = [], [], [], []
+    variant_consumables, product_ingredients, product_consumables = [], [], []
+    modifier_groups, modifiers = [], []
+    menu = []  # Позиції, які може обрати гість: товар/варіант з ціною та BoM на одиницю
+
+    for n, (name, recipe, prices) in enumerate(DRINKS, start=1):
+        recipes.append({"id": cid(n), "name": f"Техкарта: {name}"})
+        for k, (ing, qty, is_pct) in enumerate(recipe):
+            recipe_items.append({"id": cid(n * 10 + k), "recipe_id": cid(n), "ingredient_id": cid(ing + 1),
+                                 "quantity": qty, "is_percentage": is_pct})
+        products.append({"id": cid(n), "name": name, "price": prices[0], "has_variants": True, "is_active": True})
+        drink_modifiers = []
+        for g, (group_name, options) in enumerate(MODIFIER_GROUPS, start=1):
+            group_id = cid(n * 10 + g)
+            modifier_groups.append({"id": group_id, "product_id": cid(n), "name": group_name, "is_required": False})
+            for o, (option, price_change, ing, qty) in enumerate(options, start=1):
+                modifiers.append({"id": group_id * 10 + o, "group_id": group_id, "name": option,
+                                  "price_change": price_change, "ingredient_id": cid(ing + 1), "quantity": qty})
+                drink_modifiers.append((group_id * 10 + o, price_change))
+        for size, weight, idx in SIZES:
+            v_id = cid(n * 10 + idx)
+            variants.append({"id": v_id, "product_id": cid(n), "name": size, "price": prices[idx],
+                             "master_recipe_id": cid(n), "output_weight": weight})
+            variant_consumables.append({"variant_id": v_id, "consumable_id": cid(idx + 1), "quantity": 1})
+            variant_consumables.append({"variant_id": v_id, "consumable_id": cid(4), "quantity": 1})
+            ingredients = {}
+            for ing, qty, is_pct in recipe:
+                amount = qty / 100.0 * weight if is_pct else qty
+                ingredients[cid(ing + 1)] = ingredients.get(cid(ing + 1), 0) + amount
+            menu.append({"product_id": cid(n), "variant_id": v_id, "name": f"{name} ({size})", "price": prices[idx],
+                         "ingredients": ingredients, "consumables": {cid(idx + 1): 1, cid(4): 1},
+                         "cup_id": cid(idx + 1), "modifiers": drink_modifiers, "weight": 3 if size == "M" else 2})
+
+    for n, (name, price, ingredients, package) in enumerate(FOOD, start=len(DRINKS) + 1):
+        products.append({"id": cid(n), "name": name, "price": price, "has_variants": False, "is_active": True})
+        for ing, qty in ingredients:
+            product_ingredients.append({"product_id": cid(n), "ingredient_id": cid(ing + 1), "quantity": qty})
+        product_consumables.append({"product_id": cid(n), "consumable_id": cid(package + 1), "quantity": 1})
+        menu.append({"product_id": cid(n), "variant_id": None, "name": name, "price": price,
+                     "ingredients": {cid(ing + 1): qty for ing, qty in ingredients},
+                     "consumables": {cid(package + 1): 1}, "cup_id": None, "modifiers": [], "weight": 1})
+
+    return {
+        "product": {
+            "master_recipes": recipes, "master_recipe_items": recipe_items, "products": products,
+            "product_variants": variants, "product_variant_consumables": variant_consumables,
+            "product_ingredients": product_ingredients, "product_consumables": product_consumables,
+            "product_modifier_groups": modifier_groups, "modifiers": modifiers,
+        },
+        "inventory": {
+            "units": [{"id": cid(1), "name": f"load-г-{ID_BASE}", "symbol": "г"}],
+            "ingredients": [{"id": cid(n), "name": name, "cost_per_unit": 0.2, "stock_quantity": START_STOCK,
+                             "unit_id": cid(1), "costing_method": "fifo"} for n, name in enumerate(INGREDIENTS, start=1)],
+            "consumables": [{"id": cid(n), "name": name, "cost_per_unit": 1.5, "stock_quantity": int(START_STOCK),
+                             "unit_id": cid(1), "costing_method": "wac"} for n, name in enumerate(CONSUMABLES, start=1)],
+            "supplies": [{"id": cid(1), "invoice_number": f"LOAD-{ID_BASE}", "total_cost": 0}],
+            "supply_items": [
+                {"id": cid((offset + n) * 10 + b), "supply_id": cid(1), "entity_type": entity_type, "entity_id": cid(n),
+                 "entity_name": name, "quantity": START_STOCK / 4, "remaining_quantity": START_STOCK / 4,
+                 "cost_per_unit": cost, "total_cost": START_STOCK / 4 * cost}
+                for entity_type, names, cost, offset in (("ingredient", INGREDIENTS, 0.2, 0), ("consumable", CONSUMABLES, 1.5, 500))
+                for n, name in enumerate(names, start=1)
+                for b in range(4)  # По 4 партії на позицію — FIFO має що перебирати
+            ],
+        },
+        "customer": {
+            "customers": [{"id": cid(n), "name": f"Гість {n}", "phone": f"+380990{n:06d}", "phone_digits": f"0990{n:06d}",
+                           "bonus_balance": START_BONUSES, "created_at": datetime.utcnow()} for n in range(1, CUSTOMERS + 1)],
+        },
+        "menu": menu,
+    }
+
+
+def seed(engines: dict, catalogue: dict):
+    """
+    Записує каталог у бази сервісів {"product": engine, "inventory": ..., "customer": ..., "finance": ...}.
+    Якщо каталог уже є (перший товар з діапазону існує) — нічого не пише: залишки міряються відносно старту.
+    """
+    for service in ("product", "inventory", "customer"):
+        engine = engines[service]
+        meta = MetaData()
+        tables = {name: Table(name, meta, autoload_with=engine) for name in catalogue[service]}
+        first_table = next(iter(tables.values()))
+        with engine.begin() as conn:
+            if conn.execute(select(func.count()).select_from(first_table)
+                            .where(first_table.c.id == next(iter(catalogue[service].values()))[0]["id"])).scalar():
+                continue
+            for name, rows in catalogue[service].items():
+                columns = set(tables[name].c.keys())
+                conn.execute(tables[name].insert(), [{k: v for k, v in row.items() if k in columns} for row in rows])
+    seed_finance(engines["finance"])
+
+
+def seed_finance(engine):
+    """Фінансам потрібні активні рахунки cash/bank і категорія продажу — створюємо, лише якщо їх немає"""
+    meta = MetaData()
+    accounts = Table("accounts", meta, autoload_with=engine)
+    categories = Table("transaction_categories", meta, autoload_with=engine)
+    changed = False
+    with engine.begin() as conn:
+        for account_type, name in (("cash", "Каса (навантаження)"), ("bank", "Термінал (навантаження)")):
+            exists = conn.execute(select(accounts.c.id).where(
+                accounts.c.type == account_type, accounts.c.is_active.is_(True))).first()
+            if not exists:
+                row = {"name": name, "type": account_type, "currency": "UAH", "balance": 0, "is_active": True}
+                conn.execute(accounts.insert(), [{k: v for k, v in row.items() if k in accounts.c}])
+                changed = True
+        if not conn.execute(select(categories.c.id).where(categories.c.name == "Продаж товарів")).first():
+            row = {"name": "Продаж товарів", "type": "INCOME"}
+            conn.execute(categories.insert(), [{k: v for k, v in row.items() if k in categories.c}])
+            changed = True
+        if changed and inspect(conn).has_table("reference_versions"):
+            # Запущений finance_worker тримає кеш довідників — нова версія змусить його перечитати
+            if not conn.execute(text("UPDATE reference_versions SET version = version + 1 WHERE id = 1")).rowcount:
+                conn.execute(text("INSERT INTO reference_versions (id, version) VALUES (1, 1)"))
+
+
+def arrival_curve(orders: int, duration: float, seed: int = 42) -> list:
+    """
+    Секунди від старту прогону, коли гість підходить до каси: orders моментів за день OPEN–CLOSE,
+    стиснутий у duration секунд. Інтенсивність — базовий потік плюс гаусові піки PEAKS
+    (вибірка зворотною функцією розподілу, тож гостей рівно orders).
+    """
+    rng = random.Random(seed)
+    steps = 1000
+    hours = [OPEN_HOUR + (CLOSE_HOUR - OPEN_HOUR) * i / steps for i in range(steps + 1)]
+    rate = [BASE_RATE + sum(w * math.exp(-((h - c) ** 2) / (2 * s * s)) for c, s, w in PEAKS) for h in hours]
+    cdf = [0.0]
+    for i in range(1, len(rate)):
+        cdf.append(cdf[-1] + (rate[i - 1] + rate[i]) / 2)
+    total = cdf[-1]
+
+    arrivals = []
+    for _ in range(orders):
+        u = rng.random() * total
+        lo, hi = 0, len(cdf) - 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if cdf[mid] < u:
+                lo = mid + 1
+            else:
+                hi = mid
+        arrivals.append(duration * lo / steps)
+    return sorted(arrivals)
+
+
+def random_order(rng: random.Random, menu: list) -> dict:
+    """Кошик одного гостя: 1–4 позиції, розміри, модифікатори, своя чашка; частина гостей — з карткою лояльності"""
+    weights = [item["weight"] for item in menu]
+    lines = []
+    for _ in range(rng.choices((1, 2, 3, 4), weights=(45, 35, 15, 5))[0]):
+        item = rng.choices(menu, weights=weights)[0]
+        modifiers = [m for m, _ in item["modifiers"] if rng.random() < 0.12]
+        price = item["price"] + sum(p for m, p in item["modifiers"] if m in modifiers)
+        overrides = []
+        if item["cup_id"] and rng.random() < OWN_CUP_SHARE:
+            overrides.append({"original_id": item["cup_id"], "new_id": None})
+        elif item["cup_id"] == cid(2) and rng.random() < ECO_CUP_SHARE:
+            overrides.append({"original_id": cid(2), "new_id": cid(5)})
+        lines.append({
+            "item": item,
+            "payload": {
+                "product_id": item["product_id"], "variant_id": item["variant_id"], "name": item["name"],
+                "price": price, "quantity": rng.choices((1, 2), weights=(90, 10))[0],
+                "modifiers": [{"modifier_id": m} for m in modifiers], "consumable_overrides": overrides,
+            },
+        })
+    customer_id = cid(rng.randint(1, CUSTOMERS)) if rng.random() < 0.35 else None
+    return {
+        "lines": lines,
+        "customer_id": customer_id,
+        "payment_method": rng.choices(("card", "cash"), weights=(70, 30))[0],
+        "use_bonuses": bool(customer_id) and rng.random() < 0.2,
+    }
+
+
+def expected_stock_use(orders: list) -> dict:
+    """
+    Очікуване списання {(entity_type, id): кількість} за тими ж правилами, що й BomService.expand_bom:
+    BoM товару/варіанту × кількість. Модифікатори й заміни пакування йдуть у чек, але склад їх не списує.
+    """
+    use = {}
+    for order in orders:
+        for line in order["lines"]:
+            qty = line["payload"]["quantity"]
+            for entity_type, key in (("ingredient", "ingredients"), ("consumable", "consumables")):
+                for entity_id, unit_qty in line["item"][key].items():
+                    use[(entity_type, entity_id)] = use.get((entity_type, entity_id), 0.0) + unit_qty * qty
+    return use
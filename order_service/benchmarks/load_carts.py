@@ -0,0 +1,200 @@
+# FILE: order_service/benchmarks/load_carts.py
+"""
+Навантажувальний тест кошиків: багато кас одночасно працюють з Redis.
+
+Стенд: справжній Redis, якщо задано REDIS_URL (напр. redis://localhost:6379/15 — БД буде очищено!),
+інакше fakeredis (pip install fakeredis lupa) у пам'яті процесу. Щоб затримка мережі була помітна і на
+fakeredis, кожен round-trip до Redis штучно "коштує" RTT_MS.
+
+Сценарій на кожну касу (потік):
+  1. додає LINES товарів;
+  2. дві "руки" одночасно тиснуть +1 на одному рядку по TAPS разів (перевірка втрачених оновлень);
+  3. BULK_OPS змін кошика — поштучно і одним /cart/bulk (рахуємо round-trip'и);
+  4. подвійне натискання "Оплатити" з двох потоків (має пройти рівно одне замовлення).
+Порівнюється старий підхід (один глобальний хеш, HGET → json → HSET) з CartStore.
+
+Запуск (з папки order_service):  python benchmarks/load_carts.py
+"""
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import redis
+from redis.connection import AbstractConnection
+from cart_store import CartStore, register_key
+from schemas import CartItemCreate, CartOp
+
+REGISTERS = int(os.getenv("LOAD_REGISTERS", "32"))
+LINES = 5
+TAPS = 25
+BULK_OPS = 10
+RTT_MS = float(os.getenv("LOAD_RTT_MS", "0.2"))
+
+# --- ЛІЧИЛЬНИК ROUND-TRIP'ІВ ---
+# Кожна відправка пакета команд = один round-trip (пайплайн/MULTI відправляється одним пакетом)
+round_trips = 0
+_rt_lock = threading.Lock()
+_thread_counts = threading.local()
+_send_packed = AbstractConnection.send_packed_command
+
+def _counting_send(self, command, check_health=True):
+    global round_trips
+    with _rt_lock:
+        round_trips += 1
+    _thread_counts.n = getattr(_thread_counts, "n", 0) + 1
+    if RTT_MS:
+        time.sleep(RTT_MS / 1000.0)
+    return _send_packed(self, command, check_health)
+
+AbstractConnection.send_packed_command = _counting_send
+
+
+def make_client():
+    url = os.getenv("REDIS_URL")
+    if url:
+        client = redis.Redis.from_url(url, decode_responses=True, max_connections=REGISTERS * 4)
+        client.flushdb()
+        return client, "redis " + url
+    import fakeredis
+    return fakeredis.FakeRedis(decode_responses=True, max_connections=REGISTERS * 4), "fakeredis"
+
+
+def item_payload(register: int, line: int) -> CartItemCreate:
+    return CartItemCreate(product_id=register * 100 + line, name=f"товар {register}-{line}", price=10 + line, modifiers=[])
+
+
+def run_threads(target, count):
+    threads = [threading.Thread(target=target, args=(k,)) for k in range(count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+# --- СТАРИЙ ПІДХІД: ОДИН ГЛОБАЛЬНИЙ ХЕШ ---
+def old_scenario(r):
+    key = "pos_cart_v2"
+    r.delete(key)
+    published = []
+    pub_lock = threading.Lock()
+
+    def register(k):
+        ids = []
+        for line in range(LINES):
+            cart_item_id = str(uuid.uuid4())
+            item = {"cart_item_id": cart_item_id, **item_payload(k, line).dict()}
+            r.hset(key, cart_item_id, json.dumps(item))
+            ids.append(cart_item_id)
+
+        def tap(_):
+            for _ in range(TAPS):
+                raw = r.hget(key, ids[0])
+                if raw is None:
+                    return  # Чужа каса вже "оплатила" наш рядок разом зі своїм кошиком
+                item = json.loads(raw)
+                item["quantity"] += 1
+                r.hset(key, ids[0], json.dumps(item))
+        run_threads(tap, 2)
+
+        def pay(_):
+            raw = r.hgetall(key)
+            if raw:
+                with pub_lock:
+                    published.append((k, [json.loads(v) for v in raw.values()]))
+                r.delete(key)
+        run_threads(pay, 2)
+
+    run_threads(register, REGISTERS)
+    return published
+
+
+# --- НОВИЙ ПІДХІД: CartStore ---
+def new_scenario(store):
+    published = []
+    batch_rt = {"single": 0, "bulk": 0}
+    pub_lock = threading.Lock()
+
+    def register(k):
+        key = register_key(f"reg-{k}")
+        store.clear(key)
+        ids = [store.add(key, store.new_item(item_payload(k, line)))["cart_item_id"] for line in range(LINES)]
+
+        def tap(_):
+            for _ in range(TAPS):
+                store.update_quantity(key, ids[0], 1)
+        run_threads(tap, 2)
+
+        # Ті самі зміни поштучно і одним пакетом
+        ops = [CartOp(op="update", cart_item_id=ids[1 + i % (LINES - 1)], change=1 if i % 2 == 0 else -1)
+               for i in range(BULK_OPS)]
+        for name, apply in (("single", lambda: [store.update_quantity(key, o.cart_item_id, o.change) for o in ops]),
+                            ("bulk", lambda: store.bulk(key, ops))):
+            before = _thread_round_trips()
+            apply()
+            with pub_lock:
+                batch_rt[name] += _thread_round_trips() - before
+
+        def pay(_):
+            raw = store.take(key)
+            items = store.decode(raw)
+            if items:
+                with pub_lock:
+                    published.append((k, items))
+        run_threads(pay, 2)
+
+    run_threads(register, REGISTERS)
+    return published, batch_rt
+
+
+def _thread_round_trips():
+    """Round-trip'и поточного потоку (щоб порівняти поштучно vs пакет, поки інші каси теж працюють)"""
+    return getattr(_thread_counts, "n", 0)
+
+
+def check(published, expect_registers):
+    """Скільки замовлень, чи не змішались каси, скільки +1 загубилось"""
+    orders_per_register = {}
+    foreign_lines = 0
+    lost_taps = 0
+    for k, items in published:
+        orders_per_register[k] = orders_per_register.get(k, 0) + 1
+        foreign_lines += sum(1 for it in items if it["product_id"] // 100 != k)
+        first = next((it for it in items if it["product_id"] == k * 100), None)
+        if first is not None:
+            lost_taps += 1 + 2 * TAPS - first["quantity"]
+    duplicates = sum(n - 1 for n in orders_per_register.values() if n > 1)
+    missing = expect_registers - len(orders_per_register)
+    return len(published), duplicates, missing, foreign_lines, lost_taps
+
+
+def main():
+    global round_trips
+    client, stand = make_client()
+    print(f"стенд: {stand}, кас: {REGISTERS}, RTT: {RTT_MS} мс\n")
+    print(f"{'режим':<22} | {'RTT':>6} | {'замовл.':>7} | {'дублі':>5} | {'без замовл.':>11} | {'чужі рядки':>10} | {'загублено +1':>12}")
+    print("-" * 94)
+
+    round_trips = 0
+    published = old_scenario(client)
+    orders, dup, missing, foreign, lost = check(published, REGISTERS)
+    print(f"{'глобальний хеш':<22} | {round_trips:>6} | {orders:>7} | {dup:>5} | {missing:>11} | {foreign:>10} | {lost:>12}")
+
+    store = CartStore(client)
+    round_trips = 0
+    published, rt = new_scenario(store)
+    orders, dup, missing, foreign, lost = check(published, REGISTERS)
+    print(f"{'CartStore (каса/TTL)':<22} | {round_trips:>6} | {orders:>7} | {dup:>5} | {missing:>11} | {foreign:>10} | {lost:>12}")
+
+    print(f"\n{BULK_OPS} змін кошика на касу: поштучно {rt['single'] / REGISTERS:.1f} round-trip, "
+          f"/cart/bulk {rt['bulk'] / REGISTERS:.1f} round-trip")
+    ttl = client.ttl(register_key("reg-0"))
+    print(f"TTL кошика після checkout: {ttl} (−2 = ключ видалено)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+# FILE: order_service/cart_store.py
+
+import json
+import os
+import re
+import uuid
+from fastapi import HTTPException
+
+CART_PREFIX = "pos_cart_v3"                                    # Ключ кошика: pos_cart_v3:<register_id>
+CART_TTL_SECONDS = int(os.getenv("CART_TTL_SECONDS", "43200"))  # Кошик, якого не чіпали 12 год, Redis прибирає сам
+DEFAULT_REGISTER = "default"
+QTY_SUFFIX = ":qty"                                            # Кількість лежить окремим полем поруч з JSON рядка
+
+REGISTER_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+# Атомарна зміна кількості на боці Redis: HINCRBY замість HGET → json → HSET.
+# Поле з кількістю окреме, тож Lua не декодує JSON (cjson перетворює порожні списки на {}).
+# Повертає -1 якщо рядка немає, 0 якщо рядок видалено, інакше нову кількість.
+UPDATE_QTY_LUA = """
+if redis.call('HEXISTS', KEYS[1], ARGV[1]) == 0 then
+    return -1
+end
+local qty = redis.call('HINCRBY', KEYS[1], ARGV[1] .. ':qty', ARGV[2])
+if qty <= 0 then
+    redis.call('HDEL', KEYS[1], ARGV[1], ARGV[1] .. ':qty')
+    return 0
+end
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return qty
+"""
+
+
+def register_key(register_id: str = None) -> str:
+    register_id = register_id or DEFAULT_REGISTER
+    if not REGISTER_ID_RE.match(register_id):
+        raise HTTPException(status_code=400, detail="Некоректний ідентифікатор каси")
+    return f"{CART_PREFIX}:{register_id}"
+
+
+class CartStore:
+    """
+    Кошики в Redis — окремий хеш на кожну касу/сесію з TTL.
+    Поля хешу: <cart_item_id> → JSON рядка кошика, <cart_item_id>:qty → кількість (ціле число).
+    - зміна кількості — один Lua-скрипт (атомарно, без гонок між двома натисканнями);
+    - пакет змін — одна транзакція MULTI/EXEC за один round-trip;
+    - checkout забирає і видаляє кошик атомарно, тож подвійне натискання не створить два замовлення.
+    """
+
+    def __init__(self, client, ttl: int = CART_TTL_SECONDS):
+        self.r = client
+        self.ttl = ttl
+        self._update_qty = client.register_script(UPDATE_QTY_LUA)
+
+    # --- ДОПОМІЖНЕ ---
+    @staticmethod
+    def new_item(item_data) -> dict:
+        # Унікальний ID рядка дозволяє мати два однакових товари з різними модифікаторами
+        return {"cart_item_id": str(uuid.uuid4()), **item_data.dict()}
+
+    @staticmethod
+    def _item_fields(item: dict) -> dict:
+        data = dict(item)
+        qty = data.pop("quantity")
+        return {item["cart_item_id"]: json.dumps(data), item["cart_item_id"] + QTY_SUFFIX: qty}
+
+    @staticmethod
+    def decode(raw: dict) -> list:
+        """Збирає рядки кошика з полів хешу (JSON + окрема кількість)"""
+        items = []
+        for field, value in raw.items():
+            if field.endswith(QTY_SUFFIX):
+                continue
+            qty = raw.get(field + QTY_SUFFIX)
+            if qty is None:
+                continue
+            try:
+                item = json.loads(value)
+            except json.JSONDecodeError:
+                continue
+            item["quantity"] = int(qty)
+            items.append(item)
+        return items
+
+    @staticmethod
+    def _update_result(cart_item_id: str, qty: int) -> dict:
+        if qty < 0:
+            return {"status": "not_found", "cart_item_id": cart_item_id}
+        if qty == 0:
+            return {"status": "removed", "cart_item_id": cart_item_id}
+        return {"status": "updated", "quantity": qty}
+
+    # --- ОПЕРАЦІЇ ---
+    def get(self, key: str) -> list:
+        pipe = self.r.pipeline(transaction=False)
+        pipe.hgetall(key)
+        pipe.expire(key, self.ttl)  # Активна каса — кошик живе далі
+        raw, _ = pipe.execute()
+        return self.decode(raw)
+
+    def add(self, key: str, item: dict) -> dict:
+        pipe = self.r.pipeline(transaction=True)
+        pipe.hset(key, mapping=self._item_fields(item))
+        pipe.expire(key, self.ttl)
+        pipe.execute()
+        return item
+
+    def update_quantity(self, key: str, cart_item_id: str, change: int) -> dict:
+        qty = self._update_qty(keys=[key], args=[cart_item_id, change, self.ttl])
+        return self._update_result(cart_item_id, int(qty))
+
+    def remove(self, key: str, cart_item_id: str):
+        self.r.hdel(key, cart_item_id, cart_item_id + QTY_SUFFIX)
+
+    def clear(self, key: str):
+        self.r.delete(key)
+
+    def bulk(self, key: str, ops: list) -> list:
+        """
+        Застосовує список змін одним MULTI/EXEC (один round-trip, атомарно для інших кас і запитів).
+        ops — елементи схеми CartOp; повертає результат для кожної операції по порядку.
+        """
+        pipe = self.r.pipeline(transaction=True)
+        results = []
+        for op in ops:
+            if op.op == "add":
+                if op.item is None:
+                    raise HTTPException(status_code=400, detail="Для 'add' потрібен item")
+                item = self.new_item(op.item)
+                pipe.hset(key, mapping=self._item_fields(item))
+                results.append(item)
+            elif op.op == "update":
+                if not op.cart_item_id or op.change is None:
+                    raise HTTPException(status_code=400, detail="Для 'update' потрібні cart_item_id та change")
+                # EVAL, а не EVALSHA: redis-py перед EVALSHA у пайплайні робить окремий SCRIPT EXISTS (+1 round-trip)
+                pipe.eval(UPDATE_QTY_LUA, 1, key, op.cart_item_id, op.change, self.ttl)
+                results.append(None)  # Заповнимо після execute
+            elif op.op == "remove":
+                if not op.cart_item_id:
+                    raise HTTPException(status_code=400, detail="Для 'remove' потрібен cart_item_id")
+                pipe.hdel(key, op.cart_item_id, op.cart_item_id + QTY_SUFFIX)
+                results.append({"status": "removed", "cart_item_id": op.cart_item_id})
+            elif op.op == "clear":
+                pipe.delete(key)
+                results.append({"status": "cleared"})
+        pipe.expire(key, self.ttl)
+        replies = pipe.execute()
+
+        for i, op in enumerate(ops):
+            if op.op == "update":
+                results[i] = self._update_result(op.cart_item_id, int(replies[i]))
+        return results
+
+    def take(self, key: str) -> dict:
+        """Атомарно забирає весь кошик і видаляє його (HGETALL + DEL в одному MULTI/EXEC)"""
+        pipe = self.r.pipeline(transaction=True)
+        pipe.hgetall(key)
+        pipe.delete(key)
+        raw, _ = pipe.execute()
+        return raw
+
+    def restore(self, key: str, raw: dict):
+        """Повертає забраний кошик, якщо замовлення не вдалося поставити в чергу"""
+        if not raw:
+            return
+        pipe = self.r.pipeline(transaction=True)
+        pipe.hset(key, mapping=raw)
+        pipe.expire(key, self.ttl)
+        pipe.execute()
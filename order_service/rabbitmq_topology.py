@@ -0,0 +1,35 @@
+# FILE: order_service/rabbitmq_topology.py
+
+import os
+
+# Єдиний topic exchange доменних подій: подія публікується ОДИН раз, а брокер сам
+# розкладає копії по всіх прив'язаних чергах (фінанси, лояльність, склад).
+EVENTS_EXCHANGE = os.getenv('RABBITMQ_EVENTS_EXCHANGE', 'pos.events')
+
+# Routing keys доменних подій
+ORDER_PAID = "order.paid"            # чек оплачено → фінанси + лояльність
+ORDER_REFUNDED = "order.refunded"    # чек скасовано → фінанси + лояльність (підсумки клієнта)
+SUPPLY_PAID = "supply.paid"          # оплачено накладну → фінанси
+STOCK_DEDUCT = "stock.deduct_bom"    # списати BoM чека → склад
+STOCK_REFUND = "stock.refund_bom"    # повернути BoM скасованого чека → склад
+
+# Черга → routing keys, якими вона підписана на EVENTS_EXCHANGE.
+# Черга без ключів отримує повідомлення напряму (default exchange), як orders_queue від каси.
+QUEUE_BINDINGS = {
+    "finance_queue": (ORDER_PAID, ORDER_REFUNDED, SUPPLY_PAID),
+    "loyalty_queue": (ORDER_PAID, ORDER_REFUNDED),
+    "inventory_queue": ("stock.#",),
+    "orders_queue": (),
+}
+
+
+def declare_topology(channel):
+    """
+    Оголошує exchange, усі durable-черги та їх прив'язки. Операції ідемпотентні,
+    тому кожен процес (паблішер чи воркер) викликає це один раз при старті.
+    """
+    channel.exchange_declare(exchange=EVENTS_EXCHANGE, exchange_type='topic', durable=True)
+    for queue_name, routing_keys in QUEUE_BINDINGS.items():
+        channel.queue_declare(queue=queue_name, durable=True)
+        for routing_key in routing_keys:
+            channel.queue_bind(queue=queue_name, exchange=EVENTS_EXCHANGE, routing_key=routing_key)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Optional, Literal
 
 # 🔥 ДОДАНО: Схема для замін пакування
 class ConsumableOverride(BaseModel):
@@ -22,4 +22,14 @@ class CartItemCreate(BaseModel):
     consumable_overrides: Optional[List[ConsumableOverride]] = []
 
 class CartItem(CartItemCreate):
-    cart_item_id: str # Унікальний ID саме цього рядка в кошику (UUID)
\ No newline at end of file
+    cart_item_id: str # Унікальний ID саме цього рядка в кошику (UUID)
+
+# Одна зміна кошика для пакетного ендпоінта /cart/bulk
+class CartOp(BaseModel):
+    op: Literal["add", "update", "remove", "clear"]
+    item: Optional[CartItemCreate] = None   # для add
+    cart_item_id: Optional[str] = None      # для update / remove
+    change: Optional[int] = None            # для update (+/-)
+
+class CartBulkRequest(BaseModel):
+    ops: List[CartOp]
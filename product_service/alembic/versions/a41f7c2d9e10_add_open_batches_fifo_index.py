@@ -0,0 +1,32 @@
+"""add_open_batches_fifo_index
+
+Revision ID: a41f7c2d9e10
+Revises: 85b1cbaec4dd
+Create Date: 2026-10-18 10:12:31.402115
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a41f7c2d9e10'
+down_revision: Union[str, Sequence[str], None] = '85b1cbaec4dd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Частковий індекс для set-based FIFO: тільки партії з ненульовим залишком
+    op.create_index(
+        'ix_supply_items_open_fifo', 'supply_items', ['entity_type', 'entity_id', 'id'],
+        unique=False, postgresql_where=sa.text('remaining_quantity > 0')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_supply_items_open_fifo', table_name='supply_items')
@@ -0,0 +1,37 @@
+"""add_inventory_history_keyset_indexes
+
+Revision ID: b7d2e91c4f35
+Revises: a41f7c2d9e10
+Create Date: 2026-10-18 11:02:54.118390
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d2e91c4f35'
+down_revision: Union[str, Sequence[str], None] = 'a41f7c2d9e10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keyset-пагінація історії руху по (created_at, id), найновіші зверху
+    op.create_index(
+        'ix_inventory_tx_entity_created', 'inventory_transactions',
+        ['entity_type', 'entity_id', sa.text('created_at DESC'), sa.text('id DESC')], unique=False
+    )
+    op.create_index(
+        'ix_inventory_tx_created', 'inventory_transactions',
+        [sa.text('created_at DESC'), sa.text('id DESC')], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_inventory_tx_created', table_name='inventory_transactions')
+    op.drop_index('ix_inventory_tx_entity_created', table_name='inventory_transactions')
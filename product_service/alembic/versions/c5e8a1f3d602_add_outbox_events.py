@@ -0,0 +1,46 @@
+"""add_outbox_events
+
+Revision ID: c5e8a1f3d602
+Revises: b7d2e91c4f35
+Create Date: 2026-10-18 14:20:37.502114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e8a1f3d602'
+down_revision: Union[str, Sequence[str], None] = 'b7d2e91c4f35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Transactional outbox: події для RabbitMQ пишуться в транзакції чека/накладної, відправляє їх outbox_relay
+    op.create_table(
+        'outbox_events',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('queue', sa.String(), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_outbox_events_pending', 'outbox_events', ['id'], unique=False,
+        postgresql_where=sa.text('sent_at IS NULL')
+    )
+    op.create_index('ix_outbox_events_sent_at', 'outbox_events', ['sent_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_outbox_events_sent_at', table_name='outbox_events')
+    op.drop_index('ix_outbox_events_pending', table_name='outbox_events')
+    op.drop_table('outbox_events')
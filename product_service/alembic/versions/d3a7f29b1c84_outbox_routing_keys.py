@@ -0,0 +1,56 @@
+"""outbox_routing_keys
+
+Revision ID: d3a7f29b1c84
+Revises: c5e8a1f3d602
+Create Date: 2026-10-18 17:05:12.418903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a7f29b1c84'
+down_revision: Union[str, Sequence[str], None] = 'c5e8a1f3d602'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Outbox тепер зберігає routing key події в topic exchange замість імені черги
+    op.alter_column('outbox_events', 'queue', new_column_name='routing_key')
+
+    # Невідправлені дублі для лояльності не потрібні: order.paid сам дійде і в loyalty_queue
+    op.execute("""
+        DELETE FROM outbox_events AS l
+        WHERE l.sent_at IS NULL AND l.routing_key = 'loyalty_queue'
+          AND EXISTS (
+              SELECT 1 FROM outbox_events AS f
+              WHERE f.sent_at IS NULL AND f.routing_key = 'finance_queue'
+                AND f.payload->>'event_type' = 'order_paid'
+                AND f.payload->>'order_id' = l.payload->>'order_id'
+          )
+    """)
+    # order_paid → order.paid, deduct_bom → stock.deduct_bom, ...
+    op.execute("""
+        UPDATE outbox_events
+        SET routing_key = CASE routing_key
+            WHEN 'inventory_queue' THEN 'stock.' || (payload->>'event_type')
+            ELSE replace(payload->>'event_type', '_', '.')
+        END
+        WHERE sent_at IS NULL
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Копії для loyalty_queue невідправлених подій при відкаті не відновлюються
+    op.execute("""
+        UPDATE outbox_events
+        SET routing_key = CASE WHEN routing_key LIKE 'stock.%' THEN 'inventory_queue' ELSE 'finance_queue' END
+        WHERE sent_at IS NULL
+    """)
+    op.alter_column('outbox_events', 'routing_key', new_column_name='queue')
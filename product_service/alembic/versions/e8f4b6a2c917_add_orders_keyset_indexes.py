@@ -0,0 +1,42 @@
+"""add_orders_keyset_indexes
+
+Revision ID: e8f4b6a2c917
+Revises: d3a7f29b1c84
+Create Date: 2026-10-18 18:21:37.604512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8f4b6a2c917'
+down_revision: Union[str, Sequence[str], None] = 'd3a7f29b1c84'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keyset-стрічка чеків по (created_at, id), найновіші зверху; фільтри — префікс індексу
+    op.create_index('ix_orders_created', 'orders', [sa.text('created_at DESC'), sa.text('id DESC')], unique=False)
+    op.create_index(
+        'ix_orders_payment_created', 'orders',
+        ['payment_method', sa.text('created_at DESC'), sa.text('id DESC')], unique=False
+    )
+    op.create_index(
+        'ix_orders_customer_created', 'orders',
+        ['customer_id', sa.text('created_at DESC'), sa.text('id DESC')], unique=False
+    )
+    # Позиції сторінки чеків підтягуються одним WHERE order_id IN (...)
+    op.create_index(op.f('ix_order_items_order_id'), 'order_items', ['order_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_order_items_order_id'), table_name='order_items')
+    op.drop_index('ix_orders_customer_created', table_name='orders')
+    op.drop_index('ix_orders_payment_created', table_name='orders')
+    op.drop_index('ix_orders_created', table_name='orders')
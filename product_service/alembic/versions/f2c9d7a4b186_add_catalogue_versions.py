@@ -0,0 +1,34 @@
+"""add_catalogue_versions
+
+Revision ID: f2c9d7a4b186
+Revises: e8f4b6a2c917
+Create Date: 2026-10-18 21:04:12.318406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2c9d7a4b186'
+down_revision: Union[str, Sequence[str], None] = 'e8f4b6a2c917'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Версія каталогу меню (один рядок): ETag для GET /products/
+    op.create_table(
+        'catalogue_versions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('catalogue_versions')
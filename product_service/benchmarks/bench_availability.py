@@ -0,0 +1,125 @@
+# FILE: product_service/benchmarks/bench_availability.py
+"""
+Бенчмарк карти доступності для GET /products/: 10, 100 та 1000 варіантів на техкартах.
+Порівнює покроковий ProductService.calculate_max_possible_stock (виклик на кожен варіант)
+з векторним AvailabilityService.sellable_quantities (одна NumPy-операція на все меню).
+Кожен підхід міряється з холодним кешем техкарт (як після редагування меню) і з прогрітим.
+Залишки складу передаються словниками, щоб не залежати від inventory_api.
+
+Запуск (з папки product_service):  python benchmarks/bench_availability.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import models
+from database import Base
+from services.availability_service import AvailabilityService
+from services.bom_cache import bom_cache
+from services.product_service import ProductService
+
+VARIANT_COUNTS = [10, 100, 1000]
+INGREDIENTS = 200
+CONSUMABLES = 40
+REPEATS = 10
+
+
+def seed_menu(db, variant_count):
+    """Товари по 4 варіанти, у кожного варіанту свій рецепт з 5-10 інгредієнтів та пакування"""
+    rnd = random.Random(42)
+    keys = []
+    product = None
+    for i in range(variant_count):
+        if i % 4 == 0:
+            product = models.Product(name=f"Напій {i // 4}", price=0, has_variants=True)
+            db.add(product)
+            db.flush()
+        recipe = models.MasterRecipe(name=f"Рецепт {i}")
+        recipe.items = [
+            models.MasterRecipeItem(
+                ingredient_id=rnd.randint(1, INGREDIENTS), quantity=rnd.uniform(5, 60), is_percentage=rnd.random() < 0.3
+            )
+            for _ in range(rnd.randint(5, 10))
+        ]
+        db.add(recipe)
+        db.flush()
+        variant = models.ProductVariant(
+            product_id=product.id, name=f"V{i}", price=50, master_recipe_id=recipe.id, output_weight=rnd.uniform(200, 500)
+        )
+        db.add(variant)
+        db.flush()
+        db.add(models.ProductVariantConsumable(variant_id=variant.id, consumable_id=rnd.randint(1, CONSUMABLES), quantity=1))
+        keys.append((product.id, variant.id))
+    db.commit()
+
+    ing_stock = {i: rnd.uniform(0, 20000) for i in range(1, INGREDIENTS + 1)}
+    con_stock = {c: float(rnd.randint(0, 500)) for c in range(1, CONSUMABLES + 1)}
+    return keys, ing_stock, con_stock
+
+
+def measure(engine, fn):
+    statements = []
+
+    def count_query(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count_query)
+    try:
+        started = time.perf_counter()
+        for _ in range(REPEATS):
+            result = fn()
+        elapsed_ms = (time.perf_counter() - started) * 1000 / REPEATS
+    finally:
+        event.remove(engine, "before_cursor_execute", count_query)
+    return result, elapsed_ms, len(statements) // REPEATS
+
+
+def main():
+    header = f"{'варіантів':>9} | {'покроково, холодний':>20} | {'покроково, теплий':>18} | {'NumPy, холодний':>16} | {'NumPy, теплий':>14} | збіг"
+    print(header)
+    print("-" * len(header))
+    for count in VARIANT_COUNTS:
+        engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine, autoflush=False)()
+        bom_cache.clear()
+        keys, ing_stock, con_stock = seed_menu(db, count)
+
+        def loop_cold():
+            bom_cache.clear()
+            db.expire_all()
+            return loop_warm()
+
+        def loop_warm():
+            return {v_id: ProductService.calculate_max_possible_stock(db, v_id, ing_stock, con_stock) for _, v_id in keys}
+
+        def vector_cold():
+            bom_cache.clear()
+            db.expire_all()
+            return vector_warm()
+
+        def vector_warm():
+            return AvailabilityService.sellable_quantities(db, keys, ing_stock, con_stock)
+
+        _, lc_ms, lc_q = measure(engine, loop_cold)
+        loop_result, lw_ms, lw_q = measure(engine, loop_warm)
+        _, vc_ms, vc_q = measure(engine, vector_cold)
+        vector_result, vw_ms, vw_q = measure(engine, vector_warm)
+
+        same = "так" if loop_result == vector_result else "НІ"
+        print(
+            f"{count:>9} | {lc_ms:>9.2f} мс {lc_q:>5} зап. | {lw_ms:>7.2f} мс {lw_q:>4} зап. | "
+            f"{vc_ms:>6.2f} мс {vc_q:>2} зап. | {vw_ms:>5.2f} мс {vw_q:>2} зап. | {same}"
+        )
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# FILE: product_service/benchmarks/bench_bom_expansion.py
+"""
+Бенчмарк розпакування BoM: кількість SQL-запитів та час на чек залежно від кількості позицій.
+Порівнює старий підхід (запит товару/варіанту + lazy-load зв'язків на кожну позицію)
+з пакетним BomService.expand_bom — з холодним кешем техкарт і з прогрітим.
+
+Запуск (з папки product_service):  python benchmarks/bench_bom_expansion.py
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import models
+from database import Base
+from services.bom_service import BomService
+from services.bom_cache import bom_cache
+
+LINE_COUNTS = [1, 4, 12, 48]
+PRODUCTS = 60
+REPEATS = 20
+
+
+def seed_catalog(db):
+    """Каталог: половина товарів з варіантами S/M/L на рецептах, половина простих"""
+    cart_pool = []
+    for i in range(PRODUCTS):
+        recipe = models.MasterRecipe(name=f"Рецепт {i}")
+        recipe.items = [
+            models.MasterRecipeItem(ingredient_id=1 + (i + k) % 25, quantity=10 + k, is_percentage=(k == 0))
+            for k in range(6)
+        ]
+        db.add(recipe)
+        db.flush()
+
+        if i % 2:
+            product = models.Product(name=f"Напій {i}", price=0, has_variants=True)
+            db.add(product)
+            db.flush()
+            for size, weight in (("S", 250), ("M", 350), ("L", 450)):
+                variant = models.ProductVariant(
+                    product_id=product.id, name=size, price=50,
+                    master_recipe_id=recipe.id, output_weight=weight
+                )
+                db.add(variant)
+                db.flush()
+                db.add(models.ProductVariantConsumable(variant_id=variant.id, consumable_id=1 + i % 5, quantity=1))
+                cart_pool.append({"product_id": product.id, "variant_id": variant.id, "quantity": 1})
+        else:
+            product = models.Product(name=f"Десерт {i}", price=60, master_recipe_id=recipe.id, output_weight=120)
+            db.add(product)
+            db.flush()
+            db.add(models.ProductIngredient(product_id=product.id, ingredient_id=30, quantity=2))
+            db.add(models.ProductConsumable(product_id=product.id, consumable_id=9, quantity=1))
+            cart_pool.append({"product_id": product.id, "variant_id": None, "quantity": 2})
+    db.commit()
+    return cart_pool
+
+
+def naive_expand(db, items):
+    """Старий патерн: окремий запит товару/варіанту і lazy-load зв'язків для КОЖНОЇ позиції"""
+    for item in items:
+        product = db.query(models.Product).filter(models.Product.id == item["product_id"]).first()
+        variant = None
+        if item["variant_id"]:
+            variant = db.query(models.ProductVariant).filter(models.ProductVariant.id == item["variant_id"]).first()
+        BomService.unit_bom(product, variant)
+
+
+def cold_expand(db, items):
+    bom_cache.clear()
+    BomService.expand_bom(db, items)
+
+
+def measure(db, engine, fn, items):
+    statements = []
+
+    def count_query(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count_query)
+    try:
+        started = time.perf_counter()
+        for _ in range(REPEATS):
+            db.expire_all()
+            fn(db, items)
+        elapsed_ms = (time.perf_counter() - started) * 1000 / REPEATS
+    finally:
+        event.remove(engine, "before_cursor_execute", count_query)
+    return len(statements) // REPEATS, elapsed_ms
+
+
+def main():
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+    cart_pool = seed_catalog(db)
+
+    print(f"{'позицій':>8} | {'старий: запитів / мс':>21} | {'batch, холодний кеш':>21} | {'batch, прогрітий кеш':>21}")
+    print("-" * 82)
+    for lines in LINE_COUNTS:
+        items = [cart_pool[i % len(cart_pool)] for i in range(lines)]
+        naive_q, naive_ms = measure(db, engine, naive_expand, items)
+        cold_q, cold_ms = measure(db, engine, cold_expand, items)
+        BomService.expand_bom(db, items)  # прогріваємо кеш
+        warm_q, warm_ms = measure(db, engine, BomService.expand_bom, items)
+        print(f"{lines:>8} | {naive_q:>9} / {naive_ms:>9.2f} | {cold_q:>9} / {cold_ms:>9.2f} | {warm_q:>9} / {warm_ms:>9.2f}")
+    print(f"\nbom_cache: {bom_cache.stats()}")
+
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
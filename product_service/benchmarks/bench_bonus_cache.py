@@ -0,0 +1,127 @@
+# FILE: product_service/benchmarks/bench_bonus_cache.py
+"""
+Бенчмарк кешу бонусного балансу: скільки чеків з бонусами ще йдуть у CRM і скільки це коштує.
+
+Стенд: файлова SQLite + aiosqlite, CRM — заглушка з затримкою CRM_MS (лічильник запитів),
+кеш — fakeredis. Сценарій одного чека касира:
+  вибір клієнта на касі → (пауза) → async checkout з бонусами → лояльність обробила чек (інвалідація).
+Порівнюються:
+  1. без кешу — кожен чек робить запит у CRM (поведінка до цієї зміни);
+  2. кеш без прогріву — після обробки попереднього чека баланс клієнта скинуто, тож чек знову йде в CRM;
+  3. кеш + прогрів при виборі клієнта (GET /orders/bonus-balance) — сам чек CRM не чекає.
+
+Потрібно: pip install aiosqlite fakeredis[lua]
+Запуск (з папки product_service):  python benchmarks/bench_bonus_cache.py
+"""
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fakeredis
+import httpx
+import requests
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+import models
+import schemas
+from services.bonus_cache import BonusCache
+from services.crm_client import CrmClient
+from services.order_service import OrderService
+
+CRM_MS = 30.0
+CUSTOMERS = 20
+ORDERS = 200
+
+
+class CrmStub:
+    def __init__(self):
+        self.calls = 0
+
+    def balance(self):
+        self.calls += 1
+        return {"bonus_balance": 10_000}
+
+    async def handler(self, request):
+        await asyncio.sleep(CRM_MS / 1000.0)
+        return httpx.Response(200, json=self.balance())
+
+    def get(self, url, timeout=None):
+        time.sleep(CRM_MS / 1000.0)
+        stub = self
+
+        class Response:
+            status_code = 200
+
+            def json(self):
+                return stub.balance()
+        return Response()
+
+
+def make_db():
+    url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bonus.db')}"
+    engine = create_engine(url)
+    models.Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(models.Product.__table__.insert(), [{"id": 1, "name": "Лате", "price": 75, "is_active": True}])
+    async_engine = create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://"))
+    return engine, async_sessionmaker(async_engine, expire_on_commit=False)
+
+
+def hold_of(engine, order_id):
+    """bonus_hold_id з події order.paid чека (так його отримує customer_worker)"""
+    with engine.connect() as conn:
+        for event in conn.execute(models.OutboxEvent.__table__.select().where(models.OutboxEvent.routing_key == "order.paid")):
+            if event.payload["order_id"] == order_id:
+                return event.payload["bonus_hold_id"]
+
+
+async def run(mode):
+    crm = CrmStub()
+    requests.get = crm.get
+    CrmClient.transport = httpx.MockTransport(crm.handler)
+    await CrmClient.aclose()
+    BonusCache.redis = fakeredis.FakeRedis(decode_responses=True)
+    engine, session_factory = make_db()
+
+    latencies, checkout_calls = [], 0
+    for n in range(ORDERS):
+        customer_id = 1 + n % CUSTOMERS
+        if mode == "no_cache":
+            BonusCache.redis.flushall()
+        if mode == "warm":
+            await asyncio.to_thread(OrderService.get_available_bonuses, customer_id)
+
+        calls_before = crm.calls
+        order_data = schemas.OrderCreate(
+            items=[{"product_id": 1, "quantity": 1}], payment_method="card", customer_id=customer_id, use_bonuses=True
+        )
+        started = time.perf_counter()
+        order = await OrderService.process_checkout_async(order_data, session_factory)
+        latencies.append(time.perf_counter() - started)
+        checkout_calls += crm.calls - calls_before
+
+        # customer_worker обробив чек: кеш скинуто, холд знято
+        BonusCache.invalidate(customer_id, hold_of(engine, order.id))
+    latencies.sort()
+    return checkout_calls, latencies[len(latencies) // 2] * 1000, latencies[int(len(latencies) * 0.99) - 1] * 1000
+
+
+def main():
+    print(f"{ORDERS} чеків з бонусами, {CUSTOMERS} постійних клієнтів, CRM {CRM_MS} мс\n")
+    print(f"{'режим':<30} | {'запитів у CRM з чека':>20} | {'p50 мс':>7} | {'p99 мс':>7}")
+    print("-" * 74)
+    for mode, name in (("no_cache", "без кешу"), ("cold", "кеш без прогріву"), ("warm", "кеш + прогрів при виборі")):
+        with contextlib.redirect_stdout(io.StringIO()):
+            calls, p50, p99 = asyncio.run(run(mode))
+        print(f"{name:<30} | {calls:>20} | {p50:>7.2f} | {p99:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
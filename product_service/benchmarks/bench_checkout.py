@@ -0,0 +1,175 @@
+# FILE: product_service/benchmarks/bench_checkout.py
+"""
+Бенчмарк checkout: синхронний OrderService.process_checkout проти async process_checkout_async.
+
+Стенд без мережі: файлова SQLite (WAL), CRM — заглушка, що відповідає за CRM_MS
+(sync: requests.get, async: httpx.MockTransport). RabbitMQ у checkout не бере участі:
+події пишуться в outbox у транзакції чека, а відправляє їх окремий outbox_relay.
+Сценарій: CONCURRENCY кас одночасно пробивають по ORDERS_PER_CLIENT чеків з бонусами.
+Синхронний шлях — по потоку на касу (як def-ендпоінти FastAPI, до 40 потоків), async — в одному event loop.
+
+Зауваження: SQLite має один замок на запис на всю базу, тож транзакція, відкрита через HTTP-запит до CRM,
+тут блокує всі інші каси (хвіст p99 async-шляху — здебільшого очікування того ж замку на короткий запис).
+У Postgres вставки не конфліктують, але кожен такий чек так само тримає з'єднання пулу весь час
+очікування CRM (з типовим пулом 5 + 10 sync-шлях на цьому стенді падає з QueuePool timeout).
+
+Кеш балансу бонусів — fakeredis; у кожного чека свій клієнт, тож кожен чек — промах кешу і запит у CRM.
+
+Потрібно: pip install aiosqlite fakeredis[lua]
+Запуск (з папки product_service):  python benchmarks/bench_checkout.py
+"""
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fakeredis
+import httpx
+import requests
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+import models
+import schemas
+from services.bonus_cache import BonusCache
+from services.crm_client import CrmClient
+from services.order_service import OrderService
+
+CRM_MS = 30.0
+CONCURRENCY = int(os.getenv("BENCH_CONCURRENCY", "32"))
+ORDERS_PER_CLIENT = 5
+PRODUCTS = 20
+
+
+# --- ЗАГЛУШКИ ---
+class StubResponse:
+    status_code = 200
+
+    def json(self):
+        return {"bonus_balance": 15}
+
+
+def stub_requests_get(url, timeout=None):
+    time.sleep(CRM_MS / 1000.0)
+    return StubResponse()
+
+
+async def stub_crm_handler(request):
+    await asyncio.sleep(CRM_MS / 1000.0)
+    return httpx.Response(200, json={"bonus_balance": 15})
+
+
+# --- СТЕНД ---
+def make_db(path):
+    url = f"sqlite:///{path}"
+    # Пул на всі 40 потоків: інакше sync-шлях впирається в QueuePool timeout ще до заміру затримок
+    engine = create_engine(url, connect_args={"check_same_thread": False, "timeout": 60}, pool_size=40)
+
+    @event.listens_for(engine, "connect")
+    def wal(dbapi_conn, _):
+        dbapi_conn.execute("PRAGMA journal_mode=WAL")
+
+    models.Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(models.Product.__table__.insert(), [
+            {"id": i, "name": f"Товар {i}", "price": 40 + i, "is_active": True} for i in range(1, PRODUCTS + 1)
+        ])
+    async_engine = create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://"),
+                                       connect_args={"timeout": 60}, pool_size=40)
+    return engine, async_engine
+
+
+def order_payload(k: int) -> schemas.OrderCreate:
+    return schemas.OrderCreate(
+        items=[{"product_id": 1 + (k + j) % PRODUCTS, "quantity": 1 + j} for j in range(3)],
+        payment_method="card", customer_id=100 + k, use_bonuses=True,
+    )
+
+
+def percentiles(latencies):
+    latencies = sorted(latencies)
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    return p50, p99
+
+
+def run_sync(session_factory):
+    latencies = []
+    lock = threading.Lock()
+
+    def one(k):
+        db = session_factory()
+        try:
+            started = time.perf_counter()
+            OrderService.process_checkout(db, order_payload(k))
+            with lock:
+                latencies.append(time.perf_counter() - started)
+        finally:
+            db.close()
+
+    total = CONCURRENCY * ORDERS_PER_CLIENT
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=min(CONCURRENCY, 40)) as pool:
+        list(pool.map(one, range(total)))
+    return (time.perf_counter() - started) * 1000, latencies
+
+
+async def run_async(session_factory):
+    latencies = []
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def one(k):
+        async with semaphore:
+            started = time.perf_counter()
+            await OrderService.process_checkout_async(order_payload(k), session_factory)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(k) for k in range(CONCURRENCY * ORDERS_PER_CLIENT)))
+    wall = (time.perf_counter() - started) * 1000
+    await CrmClient.aclose()
+    return wall, latencies
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    engine, async_engine = make_db(os.path.join(tmp, "checkout.db"))
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    # Обидва шляхи працюють з тією ж БД і тією ж заглушкою CRM
+    requests.get = stub_requests_get
+    CrmClient.transport = httpx.MockTransport(stub_crm_handler)
+    BonusCache.redis = fakeredis.FakeRedis(decode_responses=True)
+
+    total = CONCURRENCY * ORDERS_PER_CLIENT
+    print(f"{total} чеків, {CONCURRENCY} кас одночасно, CRM {CRM_MS} мс\n")
+    print(f"{'шлях':<8} | {'всього мс':>9} | {'чеків/сек':>9} | {'p50 мс':>8} | {'p99 мс':>8}")
+    print("-" * 54)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        wall, latencies = run_sync(SessionLocal)
+    p50, p99 = percentiles(latencies)
+    print(f"{'sync':<8} | {wall:>9.1f} | {total / wall * 1000:>9.0f} | {p50:>8.1f} | {p99:>8.1f}")
+
+    factory = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    with contextlib.redirect_stdout(io.StringIO()):
+        wall, latencies = asyncio.run(run_async(factory))
+    p50, p99 = percentiles(latencies)
+    print(f"{'async':<8} | {wall:>9.1f} | {total / wall * 1000:>9.0f} | {p50:>8.1f} | {p99:>8.1f}")
+
+    with engine.connect() as conn:
+        orders = conn.execute(models.Order.__table__.select()).fetchall()
+        pending = conn.execute(models.OutboxEvent.__table__.select()).fetchall()
+    print(f"\nчеків у БД: {len(orders)} (очікується {2 * total}), подій в outbox: {len(pending)}")
+
+
+if __name__ == "__main__":
+    main()
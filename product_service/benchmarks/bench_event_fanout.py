@@ -0,0 +1,171 @@
+# FILE: product_service/benchmarks/bench_event_fanout.py
+"""
+Бенчмарк записів у брокер на один чек: публікації в черги напряму проти topic exchange.
+
+Стенд: SQLite у пам'яті, справжній OrderService.process_checkout пише події в outbox,
+Outbox.relay_batch відправляє їх через RabbitMQClient у stub-брокер, що рахує publish (кожен —
+окремий запис + чекання confirm), байти тіл і копії, які брокер розклав по чергах.
+
+Порівнюються:
+  1. старий checkout — order_paid у finance_queue і loyalty_queue ДВІЧІ (сервіс + роутер) + списання складу;
+  2. черги напряму без дубля роутера — 3 publish (склад, фінанси, дубль для лояльності);
+  3. topic exchange — 2 publish (stock.deduct_bom, order.paid), копії робить брокер.
+
+Запуск (з папки product_service):  python benchmarks/bench_event_fanout.py
+"""
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import models
+import schemas
+from database import Base
+from services.order_service import OrderService
+from services.outbox import Outbox
+from services.rabbitmq_client import RabbitMQClient
+
+RTT_MS = 1.0
+ORDERS = 200
+
+
+class StubChannel:
+    is_open = True
+
+    def __init__(self, broker):
+        self.broker = broker
+        self.tx = False
+
+    def confirm_delivery(self):
+        pass
+
+    def tx_select(self):
+        self.tx = True
+
+    def tx_commit(self):
+        time.sleep(RTT_MS / 1000.0)  # один Commit-Ok на всю пачку
+
+    def add_on_return_callback(self, callback):
+        pass
+
+    def exchange_declare(self, exchange, exchange_type, durable):
+        pass
+
+    def queue_declare(self, queue, durable):
+        pass
+
+    def queue_bind(self, queue, exchange, routing_key):
+        self.broker.bindings.append((queue, routing_key))
+
+    def basic_publish(self, exchange, routing_key, body, properties, mandatory=False):
+        if not self.tx:
+            time.sleep(RTT_MS / 1000.0)  # чекаємо Basic.Ack
+        self.broker.publishes += 1
+        self.broker.bytes += len(body)
+        if not exchange:
+            self.broker.deliveries += 1
+            return
+        self.broker.deliveries += sum(
+            1 for _, key in self.broker.bindings
+            if key == routing_key or (key.endswith(".#") and routing_key.startswith(key[:-1]))
+        )
+
+
+class StubConnection:
+    is_closed = False
+
+    def __init__(self, broker):
+        self.broker = broker
+
+    def channel(self):
+        return StubChannel(self.broker)
+
+    def process_data_events(self, time_limit=0):
+        pass
+
+    def close(self):
+        self.is_closed = True
+
+
+class StubBroker:
+    def __init__(self):
+        self.bindings = []
+        self.publishes = 0
+        self.bytes = 0
+        self.deliveries = 0
+
+    def connect(self):
+        return StubConnection(self)
+
+
+def make_session():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(models.Product.__table__.insert(), [
+            {"id": i, "name": f"Товар {i}", "price": 40 + i, "is_active": True} for i in range(1, 6)
+        ])
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+
+
+def checkout(db, n):
+    order_data = schemas.OrderCreate(
+        items=[{"product_id": 1 + (n + j) % 5, "quantity": 1} for j in range(2)], payment_method="card"
+    )
+    return OrderService.process_checkout(db, order_data)
+
+
+def run_direct(queues_per_order):
+    """Старі схеми: ті самі події, адресовані в черги напряму (по publish на кожну чергу)"""
+    broker, db = StubBroker(), make_session()
+    publisher = RabbitMQClient(pool_size=1, connection_factory=broker.connect)
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for n in range(ORDERS):
+            checkout(db, n)
+            events = {e.routing_key: e.payload for e in db.query(models.OutboxEvent).filter(models.OutboxEvent.sent_at.is_(None))}
+            db.query(models.OutboxEvent).update({models.OutboxEvent.sent_at: models.OutboxEvent.created_at})
+            db.commit()
+            for queue_name in queues_per_order:
+                payload = events["stock.deduct_bom"] if queue_name == "inventory_queue" else events["order.paid"]
+                publisher.publish(queue_name, payload, immediate=True)
+    return broker, (time.perf_counter() - started) * 1000
+
+
+def run_exchange():
+    broker, db = StubBroker(), make_session()
+    publisher = RabbitMQClient(pool_size=1, connection_factory=broker.connect)
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for n in range(ORDERS):
+            checkout(db, n)
+            Outbox.relay_batch(db, publisher)
+    return broker, (time.perf_counter() - started) * 1000
+
+
+def main():
+    print(f"{ORDERS} чеків по 2 позиції, брокер RTT {RTT_MS} мс на publish+confirm\n")
+    print(f"{'схема':<34} | {'publish/чек':>11} | {'байт/чек':>8} | {'копій у чергах/чек':>18} | {'всього мс':>9}")
+    print("-" * 94)
+
+    scenarios = [
+        ("черги напряму + дубль роутера", lambda: run_direct(
+            ("inventory_queue", "finance_queue", "loyalty_queue", "finance_queue", "loyalty_queue"))),
+        ("черги напряму", lambda: run_direct(("inventory_queue", "finance_queue", "loyalty_queue"))),
+        ("topic exchange", run_exchange),
+    ]
+    for name, run in scenarios:
+        broker, wall = run()
+        print(f"{name:<34} | {broker.publishes / ORDERS:>11.1f} | {broker.bytes / ORDERS:>8.0f} | "
+              f"{broker.deliveries / ORDERS:>18.1f} | {wall:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# FILE: product_service/benchmarks/bench_fifo_depletion.py
+"""
+Бенчмарк FIFO-списання партій: 1 000 та 5 000 відкритих партій на один інгредієнт.
+Порівнює старий підхід (завантажити ВСІ відкриті партії в ORM і пройти циклом у Python)
+з set-based SupplyClient.deplete_fifo (віконна сума + UPDATE лише потрібних партій).
+Сценарій — 200 продажів поспіль, кожен списує 18 г (партії по 5-20 г, тож чек зачіпає 1-4 партії).
+
+Запуск (з папки product_service):  python benchmarks/bench_fifo_depletion.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import models
+from database import Base
+from services.supply_client import SupplyClient
+
+BATCH_COUNTS = [1000, 5000]
+SALES = 200
+DEDUCT_QTY = 18.0
+
+
+def seed(db, batch_count):
+    rnd = random.Random(7)
+    supply = models.Supply(notes="Бенчмарк")
+    db.add(supply)
+    db.flush()
+    db.bulk_insert_mappings(models.SupplyItem, [
+        {
+            "supply_id": supply.id, "entity_type": "ingredient", "entity_id": 1, "entity_name": "Кава",
+            "quantity": q, "remaining_quantity": q, "cost_per_unit": rnd.uniform(0.5, 1.5), "total_cost": 0
+        }
+        for q in (rnd.uniform(5, 20) for _ in range(batch_count))
+    ])
+    db.commit()
+
+
+def naive_deduct(db, entity_type, entity_id, quantity_needed):
+    """Старий SupplyClient.deduct_fifo: усі відкриті партії з FOR UPDATE і цикл у Python"""
+    batches = db.query(models.SupplyItem).filter(
+        models.SupplyItem.entity_type == entity_type,
+        models.SupplyItem.entity_id == entity_id,
+        models.SupplyItem.remaining_quantity > 0
+    ).order_by(models.SupplyItem.id.asc()).with_for_update().all()
+    total_cost = 0.0
+    left = quantity_needed
+    for batch in batches:
+        if left <= 0:
+            break
+        take = min(batch.remaining_quantity, left)
+        total_cost += take * batch.cost_per_unit
+        batch.remaining_quantity -= take
+        left -= take
+    return total_cost
+
+
+def run(batch_count, deduct):
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+    seed(db, batch_count)
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(1))
+    total_cost = 0.0
+    started = time.perf_counter()
+    for _ in range(SALES):
+        total_cost += deduct(db, "ingredient", 1, DEDUCT_QTY)
+        db.commit()
+        db.expire_all()
+    elapsed_ms = (time.perf_counter() - started) * 1000 / SALES
+    db.close()
+    return elapsed_ms, len(statements) / SALES, total_cost
+
+
+def main():
+    print(f"{'партій':>7} | {'старий: мс/чек':>14} | {'запитів':>7} | {'set-based: мс/чек':>17} | {'запитів':>7} | COGS збігається")
+    print("-" * 88)
+    for batch_count in BATCH_COUNTS:
+        naive_ms, naive_q, naive_cost = run(batch_count, naive_deduct)
+        set_ms, set_q, set_cost = run(batch_count, SupplyClient.deduct_fifo)
+        same = "так" if abs(naive_cost - set_cost) < 1e-6 else f"НІ ({naive_cost:.4f} / {set_cost:.4f})"
+        print(f"{batch_count:>7} | {naive_ms:>14.2f} | {naive_q:>7.1f} | {set_ms:>17.2f} | {set_q:>7.1f} | {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# FILE: product_service/benchmarks/bench_inventory_ledger.py
+"""
+Бенчмарк журналу руху складу: час на запис журналу одного чека (log + commit).
+Порівнює старий InventoryLogger (ORM-об'єкт і db.add на кожен рух) з буферизованим
+(рядки в буфері сесії, один пакетний INSERT при commit).
+
+Запуск (з папки product_service):  python benchmarks/bench_inventory_ledger.py
+"""
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import models
+from database import Base
+from services.inventory_logger import InventoryLogger
+
+LINES_PER_ORDER = [10, 30, 100]
+ORDERS = 200
+
+
+def orm_log(db, entity_type, entity_id, entity_name, balance_before, balance_after, reason, force_change=None):
+    """Старий InventoryLogger.log: окремий ORM-об'єкт на кожен рух"""
+    db.add(models.InventoryTransaction(
+        entity_type=entity_type, entity_id=entity_id, entity_name=entity_name,
+        change_amount=force_change if force_change is not None else balance_after - balance_before,
+        balance_after=balance_after, reason=reason, created_at=datetime.utcnow()
+    ))
+
+
+def run(log, lines):
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(1))
+
+    flush_ms = 0.0
+    started = time.perf_counter()
+    for order_id in range(ORDERS):
+        for i in range(lines):
+            log(db, "ingredient", i, f"Інгредієнт {i}", 1000.0, 990.0, f"sale_order_{order_id}", force_change=-10.0)
+        commit_started = time.perf_counter()
+        db.commit()
+        flush_ms += (time.perf_counter() - commit_started) * 1000
+    total_ms = (time.perf_counter() - started) * 1000
+    db.close()
+    return total_ms / ORDERS, flush_ms / ORDERS, len(statements) / ORDERS
+
+
+def main():
+    print(f"{'рухів/чек':>9} | {'ORM: мс/чек':>11} | {'з них commit':>12} | {'запитів':>7} | {'буфер: мс/чек':>13} | {'з них commit':>12} | {'запитів':>7}")
+    print("-" * 92)
+    for lines in LINES_PER_ORDER:
+        orm_total, orm_flush, orm_q = run(orm_log, lines)
+        buf_total, buf_flush, buf_q = run(InventoryLogger.log, lines)
+        print(f"{lines:>9} | {orm_total:>11.2f} | {orm_flush:>12.2f} | {orm_q:>7.1f} | {buf_total:>13.2f} | {buf_flush:>12.2f} | {buf_q:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+# FILE: product_service/benchmarks/bench_outbox.py
+"""
+Бенчмарк transactional outbox на stub-брокері (затримка RTT_MS на кожен confirm: одне повідомлення або пачку).
+
+1. Вартість подій чека в запиті: 2 публікації з confirm після commit (старий підхід)
+   проти 2 рядків outbox у тій самій транзакції.
+2. Брокер "лежить" під час піку: чеки пробиваються, глибина outbox росте; після відновлення
+   релей вичищає хвіст — видно метрику Outbox.stats (pending / вік найстарішої події).
+
+Запуск (з папки product_service):  python benchmarks/bench_outbox.py
+"""
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import models
+from database import Base
+from services.finance_client import FinanceClient
+from services.outbox import Outbox
+from services.rabbitmq_client import RabbitMQClient
+from services.rabbitmq_topology import ORDER_PAID, STOCK_DEDUCT
+
+RTT_MS = 1.0
+ORDERS = 300
+
+
+class StubChannel:
+    is_open = True
+
+    def __init__(self, broker):
+        self.broker = broker
+        self.tx = False
+
+    def confirm_delivery(self):
+        pass
+
+    def tx_select(self):
+        self.tx = True
+
+    def tx_commit(self):
+        time.sleep(RTT_MS / 1000.0)  # один Commit-Ok на всю пачку
+
+    def add_on_return_callback(self, callback):
+        pass
+
+    def exchange_declare(self, exchange, exchange_type, durable):
+        pass
+
+    def queue_declare(self, queue, durable):
+        pass
+
+    def queue_bind(self, queue, exchange, routing_key):
+        pass
+
+    def basic_publish(self, exchange, routing_key, body, properties, mandatory=False):
+        if self.broker.down:
+            raise ConnectionError("broker down")
+        if not self.tx:
+            time.sleep(RTT_MS / 1000.0)  # чекаємо Basic.Ack
+        self.broker.delivered += 1
+
+
+class StubConnection:
+    is_closed = False
+
+    def __init__(self, broker):
+        self.broker = broker
+
+    def channel(self):
+        return StubChannel(self.broker)
+
+    def process_data_events(self, time_limit=0):
+        pass
+
+    def close(self):
+        self.is_closed = True
+
+
+class StubBroker:
+    def __init__(self):
+        self.down = False
+        self.delivered = 0
+
+    def connect(self):
+        return StubConnection(self)
+
+
+def make_session():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+
+
+def new_order(db, n):
+    order = models.Order(payment_method="card", total_price=50.0 + n, bonuses_spent=0)
+    db.add(order)
+    db.flush()
+    db.add(models.OrderItem(order_id=order.id, product_id=1, product_name="Лате", quantity=1, price_at_moment=order.total_price))
+    return order
+
+
+def paid_event(order):
+    return FinanceClient.order_paid_event(order.id, order.total_price, order.payment_method, 1)
+
+
+def old_checkout(db, publisher, n):
+    order = new_order(db, n)
+    db.commit()
+    event = paid_event(order)
+    for routing_key in (STOCK_DEDUCT, ORDER_PAID):
+        try:
+            publisher.publish_event(routing_key, event, immediate=True)
+        except Exception:
+            pass  # старий код ковтав помилку — подія губилась
+
+
+def outbox_checkout(db, n):
+    order = new_order(db, n)
+    event = paid_event(order)
+    for routing_key in (STOCK_DEDUCT, ORDER_PAID):
+        Outbox.add(db, routing_key, event)
+    db.commit()
+
+
+def timed(fn, count):
+    latencies = []
+    for n in range(count):
+        started = time.perf_counter()
+        fn(n)
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return latencies[len(latencies) // 2] * 1000, latencies[int(len(latencies) * 0.99) - 1] * 1000
+
+
+def main():
+    print(f"{ORDERS} чеків, 2 події на чек, брокер RTT {RTT_MS} мс\n")
+    print(f"{'режим':<34} | {'p50 мс':>7} | {'p99 мс':>7} | {'дійшло':>6} | {'загублено':>9}")
+    print("-" * 76)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        broker, db = StubBroker(), make_session()
+        publisher = RabbitMQClient(pool_size=1, connection_factory=broker.connect)
+        p50, p99 = timed(lambda n: old_checkout(db, publisher, n), ORDERS)
+    print(f"{'publish після commit':<34} | {p50:>7.2f} | {p99:>7.2f} | {broker.delivered:>6} | {0:>9}")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        broker, db = StubBroker(), make_session()
+        publisher = RabbitMQClient(pool_size=1, connection_factory=broker.connect)
+        broker.down = True  # збій посередині піку
+        p50, p99 = timed(lambda n: old_checkout(db, publisher, n), ORDERS)
+    print(f"{'publish після commit, брокер лежить':<34} | {p50:>7.2f} | {p99:>7.2f} | {broker.delivered:>6} | {2 * ORDERS:>9}")
+
+    broker, db = StubBroker(), make_session()
+    publisher = RabbitMQClient(pool_size=1, connection_factory=broker.connect)
+    broker.down = True
+    p50, p99 = timed(lambda n: outbox_checkout(db, n), ORDERS)
+    stats = Outbox.stats(db)
+    print(f"{'outbox, брокер лежить':<34} | {p50:>7.2f} | {p99:>7.2f} | {broker.delivered:>6} | {0:>9}")
+
+    # Брокер повернувся: релей вичищає хвіст пачками
+    broker.down = False
+    started = time.perf_counter()
+    batches = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        while Outbox.relay_batch(db, publisher):
+            batches += 1
+    drain_ms = (time.perf_counter() - started) * 1000
+
+    print(f"\nметрика під час збою: {stats}")
+    print(f"після відновлення: {broker.delivered} подій за {drain_ms:.0f} мс ({batches} пачок), "
+          f"залишок: {Outbox.stats(db)}")
+
+
+if __name__ == "__main__":
+    main()
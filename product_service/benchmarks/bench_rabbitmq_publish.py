@@ -0,0 +1,163 @@
+# FILE: product_service/benchmarks/bench_rabbitmq_publish.py
+"""
+Бенчмарк паблішера RabbitMQ на stub-брокері (без справжнього RabbitMQ).
+Stub імітує мережу: кожна синхронна AMQP-операція (рукостискання, channel.open, queue_declare,
+confirm, close) коштує один round-trip, кожен кадр на відправку рахується як запис у сокет.
+
+Сценарій — "пік на касі": 8 потоків одночасно відправляють по 25 подій.
+Порівнює старий патерн (нове з'єднання + queue_declare на кожне повідомлення)
+з пулом з'єднань RabbitMQClient (з confirms) та пулом з мікро-батчингом (одночасні publish
+чекають на один спільний tx.commit замість confirm кожного).
+
+Запуск (з папки product_service):  python benchmarks/bench_rabbitmq_publish.py
+"""
+import contextlib
+import io
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.rabbitmq_client import RabbitMQClient
+
+RTT_MS = 0.5          # затримка одного round-trip до брокера
+HANDSHAKE_RTT = 4     # protocol header, start/start-ok, tune/tune-ok, open/open-ok
+THREADS = 8
+MESSAGES_PER_THREAD = 25
+
+
+class StubBroker:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.writes = 0
+        self.round_trips = 0
+        self.connections = 0
+        self.messages = 0
+
+    def round_trip(self, writes=1):
+        with self.lock:
+            self.writes += writes
+            self.round_trips += 1
+        time.sleep(RTT_MS / 1000.0)
+
+    def connect(self):
+        self.round_trip(writes=HANDSHAKE_RTT)
+        with self.lock:
+            self.connections += 1
+        return StubConnection(self)
+
+
+class StubChannel:
+    def __init__(self, broker):
+        self.broker = broker
+        self.is_open = True
+        self.confirms = False
+
+    def confirm_delivery(self):
+        self.broker.round_trip()
+        self.confirms = True
+
+    def tx_select(self):
+        self.broker.round_trip()
+
+    def tx_commit(self):
+        self.broker.round_trip()          # один Commit-Ok на всю пачку
+
+    def add_on_return_callback(self, callback):
+        pass
+
+    def queue_declare(self, queue, durable):
+        self.broker.round_trip()
+
+    def basic_publish(self, exchange, routing_key, body, properties, mandatory=False):
+        if self.confirms:
+            self.broker.round_trip()      # чекаємо Basic.Ack
+        else:
+            with self.broker.lock:
+                self.broker.writes += 1   # fire-and-forget
+        with self.broker.lock:
+            self.broker.messages += 1
+
+
+class StubConnection:
+    def __init__(self, broker):
+        self.broker = broker
+        self.is_closed = False
+
+    def channel(self):
+        self.broker.round_trip()
+        return StubChannel(self.broker)
+
+    def process_data_events(self, time_limit=0):
+        pass
+
+    def close(self):
+        self.broker.round_trip()
+        self.is_closed = True
+
+
+def old_publish(broker, queue_name, message):
+    """Старий патерн з inventory_service/order_service: з'єднання на кожне повідомлення"""
+    connection = broker.connect()
+    channel = connection.channel()
+    channel.queue_declare(queue=queue_name, durable=True)
+    channel.basic_publish(exchange='', routing_key=queue_name, body=str(message), properties=None)
+    connection.close()
+
+
+def run_burst(publish):
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(k):
+        for i in range(MESSAGES_PER_THREAD):
+            started = time.perf_counter()
+            publish("finance_queue", {"event_type": "order_paid", "order_id": k * 1000 + i})
+            with lock:
+                latencies.append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=worker, args=(k,)) for k in range(THREADS)]
+    # Паблішер логує кожну відправку — під час заміру ховаємо ці рядки
+    with contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    return (time.perf_counter() - started) * 1000, sorted(latencies)
+
+
+def report(name, broker, wall_ms, latencies):
+    total = THREADS * MESSAGES_PER_THREAD
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(
+        f"{name:<26} | {broker.connections:>6} | {broker.writes:>7} | {broker.round_trips:>6} | "
+        f"{wall_ms:>8.1f} | {total / wall_ms * 1000:>9.0f} | {p50:>6.2f} | {p99:>6.2f} | {broker.messages:>5}"
+    )
+
+
+def main():
+    print(f"{'режим':<26} | {'з-нь':>6} | {'записів':>7} | {'RTT':>6} | {'всього мс':>8} | {'пов./сек':>9} | {'p50 мс':>6} | {'p99 мс':>6} | дійшло")
+    print("-" * 110)
+
+    broker = StubBroker()
+    wall_ms, latencies = run_burst(lambda q, m: old_publish(broker, q, m))
+    report("з'єднання на повідомлення", broker, wall_ms, latencies)
+
+    broker = StubBroker()
+    client = RabbitMQClient(pool_size=4, connection_factory=broker.connect)
+    wall_ms, latencies = run_burst(client.publish)
+    report("пул (4) + confirms", broker, wall_ms, latencies)
+
+    broker = StubBroker()
+    client = RabbitMQClient(pool_size=4, batch_size=8, batch_ms=5, connection_factory=broker.connect)
+    wall_ms, latencies = run_burst(client.publish)
+    report("пул (4) + батч 8/5мс", broker, wall_ms, latencies)
+    print(f"\nстатистика паблішера (батч): {client.stats()}")
+
+
+if __name__ == "__main__":
+    main()
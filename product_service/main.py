@@ -1,10 +1,18 @@
 # FILE: product_service/main.py
 
-from fastapi import FastAPI, Depends
+from contextlib import asynccontextmanager
+from typing import Optional
+from fastapi import FastAPI, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session  # 🔥 ДОДАНО: імпорт Session
 import database, models
-from database import get_db           # 🔥 ДОДАНО: імпорт get_db
+from database import get_db, get_report_db  # 🔥 ДОДАНО: імпорт get_db
+import db_layer
+from services.rabbitmq_client import rabbitmq
+from services.crm_client import CrmClient
+from services.bonus_cache import BonusCache
+from services.outbox import Outbox
+from services.order_feed import OrderFeed, ORDERS_MAX_LIMIT
 
 # Імпортуємо наші нові модульні роутери
 from routers import (
@@ -19,7 +27,16 @@ from routers import (
     adjustments
 )
 
-app = FastAPI(title="HITS POS Product Service", version="2.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Фоновий потік: customer_worker повідомляє про зміну балансу → скидаємо кеш і знімаємо холд чека
+    BonusCache.start_listener()
+    yield
+    # Закриваємо пул keep-alive з'єднань до CRM та async-двигун БД
+    await CrmClient.aclose()
+    await database.async_engine.dispose()
+
+app = FastAPI(title="HITS POS Product Service", version="2.0.0", lifespan=lifespan)
 
 # Налаштування CORS (дозволяємо фронтенду стукатись сюди)
 app.add_middleware(
@@ -28,6 +45,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"], # Курсор наступної сторінки історії
 )
 
 # Створення таблиць в БД при старті (якщо їх немає)
@@ -53,15 +71,38 @@ def read_root():
         "status": "Healthy"
     }
 
+@app.get("/rabbitmq/stats")
+def get_rabbitmq_stats():
+    """Лічильники паблішера: відправлено/підтверджено, затримка publish+confirm, кількість з'єднань"""
+    return rabbitmq.stats()
+
+@app.get("/metrics/db")
+def get_db_metrics():
+    """Пули з'єднань: зайнято, очікування на видачу (p50/p95/p99/max), тайм-аути пулу"""
+    return db_layer.pool_metrics()
+
+@app.get("/outbox/stats")
+def get_outbox_stats(db: Session = Depends(get_db)):
+    """Глибина outbox: скільки подій чекає на релей і наскільки він відстає"""
+    return Outbox.stats(db)
+
 # 🔥 СЛУЖБОВИЙ ЕНДПОІНТ ДЛЯ МІКРОСЕРВІСІВ (Inter-Service API)
 @app.get("/orders/history/{customer_id}")
-def get_customer_order_history(customer_id: int, db: Session = Depends(get_db)):
+def get_customer_order_history(
+    customer_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=ORDERS_MAX_LIMIT),
+    with_summary: bool = False,
+    db: Session = Depends(get_report_db)
+):
     """
     Цей маршрут викликається не фронтендом, а сусіднім мікросервісом customer_service,
-    щоб отримати історію чеків конкретного клієнта.
+    щоб отримати історію чеків конкретного клієнта — посторінково (keyset) і лише потрібними колонками.
+    with_summary=true додає підсумки (візити, сума, середній чек, останній візит) — customer_service їх кешує.
     """
-    orders = db.query(models.Order).filter(
-        models.Order.customer_id == customer_id
-    ).order_by(models.Order.created_at.desc()).all()
-    
-    return orders
\ No newline at end of file
+    orders, next_cursor = OrderFeed.customer_history(db, customer_id, cursor=cursor, limit=limit)
+    return {
+        "items": orders,
+        "next_cursor": next_cursor,
+        "summary": OrderFeed.customer_summary(db, customer_id) if with_summary else None,
+    }
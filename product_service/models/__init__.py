@@ -6,4 +6,5 @@ from .inventory import *
 from .crm import *
 from .supply import *
 from .orders import *
+from .outbox import *
 #from .finance import *
\ No newline at end of file
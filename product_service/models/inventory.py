@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Boolean, Table, JSON, Numeric, Text
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Boolean, Table, JSON, Numeric, Text, Index
 from sqlalchemy.orm import relationship, backref
 from datetime import datetime
 from .base import Base
@@ -264,4 +264,21 @@ class InventoryTransaction(Base):
     change_amount = Column(Float)
     balance_after = Column(Float)
     reason = Column(String)
-    created_at = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Keyset-пагінація історії: картка позиції та загальна стрічка руху, найновіші зверху
+        Index("ix_inventory_tx_entity_created", "entity_type", "entity_id", created_at.desc(), id.desc()),
+        Index("ix_inventory_tx_created", created_at.desc(), id.desc()),
+    )
+# 20. class CatalogueVersion(Base):
+# --- ВЕРСІЯ КАТАЛОГУ МЕНЮ (один рядок з id=1) ---
+class CatalogueVersion(Base):
+    """
+    Лічильник змін каталогу (товари, варіанти, техкарти, категорії, групи процесів).
+    Збільшується в тій самій транзакції, що й зміна; за ним GET /products/ віддає готовий знімок або 304.
+    """
+    __tablename__ = "catalogue_versions"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, JSON, Numeric, Float
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, JSON, Numeric, Float, Index
 from sqlalchemy.orm import relationship, foreign
 from datetime import datetime
 from .base import Base
@@ -30,11 +30,18 @@ class Order(Base):
 
     items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Keyset-стрічка чеків: загальна та з фільтрами (спосіб оплати, клієнт), найновіші зверху
+        Index("ix_orders_created", created_at.desc(), id.desc()),
+        Index("ix_orders_payment_created", "payment_method", created_at.desc(), id.desc()),
+        Index("ix_orders_customer_created", "customer_id", created_at.desc(), id.desc()),
+    )
+
 # 2. class OrderItem(Base):
 class OrderItem(Base):
     __tablename__ = "order_items"
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"))
+    order_id = Column(Integer, ForeignKey("orders.id"), index=True)  # Позиції сторінки — один WHERE order_id IN (...)
     product_id = Column(Integer, nullable=True) 
     variant_id = Column(Integer, nullable=True)
     product_name = Column(String)
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Text, Index
+from datetime import datetime
+from .base import Base
+
+# 1. class OutboxEvent(Base):
+# --- OUTBOX: ПОДІЇ ДЛЯ RABBITMQ, ЗАПИСАНІ В ТІЙ САМІЙ ТРАНЗАКЦІЇ, ЩО Й ЧЕК/НАКЛАДНА ---
+class OutboxEvent(Base):
+    __tablename__ = "outbox_events"
+    id = Column(Integer, primary_key=True)
+    routing_key = Column(String, nullable=False)    # Ключ події в EVENTS_EXCHANGE (order.paid, stock.deduct_bom, ...)
+    payload = Column(JSON, nullable=False)          # Тіло повідомлення
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    sent_at = Column(DateTime, nullable=True)       # NULL = ще не підтверджено брокером
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text, nullable=True)
+
+    __table_args__ = (
+        # Частковий індекс: релей і метрика глибини бачать лише невідправлені рядки
+        Index(
+            "ix_outbox_events_pending", "id",
+            postgresql_where=(sent_at.is_(None)),
+            sqlite_where=(sent_at.is_(None))
+        ),
+        Index("ix_outbox_events_sent_at", "sent_at"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Numeric, Float, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Numeric, Float, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .base import Base
@@ -47,3 +47,12 @@ class SupplyItem(Base):
     total_cost = Column(Float)    # Загальна вартість рядка
     
     supply = relationship("Supply", back_populates="items")
+
+    __table_args__ = (
+        # Частковий індекс для FIFO: у ньому живуть лише відкриті партії (закриті з часом відсіюються самі)
+        Index(
+            "ix_supply_items_open_fifo", "entity_type", "entity_id", "id",
+            postgresql_where=(remaining_quantity > 0),
+            sqlite_where=(remaining_quantity > 0)
+        ),
+    )
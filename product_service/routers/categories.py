@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List
 import database, schemas, models
+from services.catalogue import catalogue
 
 router = APIRouter(prefix="/categories", tags=["Categories"])
 
@@ -20,6 +21,7 @@ def create_category(category: schemas.CategoryCreate, db: Session = Depends(data
         parent_id=category.parent_id
     )
     db.add(new_category)
+    catalogue.bump(db)
     db.commit()
     db.refresh(new_category)
     return new_category
@@ -46,6 +48,7 @@ def update_category(category_id: int, category_data: schemas.CategoryCreate, db:
          
     db_category.parent_id = category_data.parent_id
 
+    catalogue.bump(db)
     db.commit()
     db.refresh(db_category)
     return db_category
@@ -58,5 +61,6 @@ def delete_category(category_id: int, db: Session = Depends(database.get_db)):
         raise HTTPException(status_code=404, detail="Category not found")
     
     db.delete(db_category)
+    catalogue.bump(db)
     db.commit()
     return {"status": "deleted"}
\ No newline at end of file
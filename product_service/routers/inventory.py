@@ -1,10 +1,12 @@
 # FILE: product_service/routers/inventory.py
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import or_, desc
-from typing import List
+from typing import List, Optional
+from datetime import datetime
 import database, schemas, models
+from services.inventory_history import InventoryHistory, HISTORY_MAX_LIMIT
 #from services.inventory_logger import InventoryLogger
 
 router = APIRouter(tags=["Inventory"])
@@ -108,26 +110,29 @@ def delete_consumable(id: int, db: Session = Depends(database.get_db)):
 
 # === ДОДАТИ В КІНЕЦЬ ФАЙЛУ inventory.py ===
 
-# === ІСТОРІЯ РУХУ ===
 # === ІСТОРІЯ РУХУ ===
 @router.get("/history/", response_model=List[schemas.InventoryTransactionRead])
 def get_inventory_history(
-    entity_type: str = None, 
-    entity_id: int = None, 
-    limit: int = 50, 
-    db: Session = Depends(database.get_db)
+    entity_type: str = None,
+    entity_id: int = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    reason: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=HISTORY_MAX_LIMIT),
+    db: Session = Depends(database.get_report_db)
 ):
-    # --- ДІАГНОСТИЧНИЙ ПРІНТ ---
-    print(f"\n[HISTORY REQUEST] Searching for: Type={entity_type}, ID={entity_id}")
-    
+    """
+    Історія руху складу, найновіші зверху. Keyset-пагінація: курсор наступної сторінки
+    приходить у заголовку X-Next-Cursor і передається назад як ?cursor=...
+    """
     query = db.query(models.InventoryTransaction)
-    
+
     if entity_type:
         query = query.filter(models.InventoryTransaction.entity_type == entity_type)
     if entity_id:
         query = query.filter(models.InventoryTransaction.entity_id == entity_id)
-    
-    results = query.order_by(desc(models.InventoryTransaction.created_at)).limit(limit).all()
-    
-    print(f"[HISTORY RESULT] Found {len(results)} records.\n")
-    return results
+    query = InventoryHistory.apply_filters(query, date_from, date_to, reason)
+
+    page, next_cursor = InventoryHistory.page(query, cursor, limit)
+    return InventoryHistory.stream(page, next_cursor)
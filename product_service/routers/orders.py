@@ -2,59 +2,63 @@
 
 from fastapi import APIRouter, Depends, Query, HTTPException
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import datetime
 import database, schemas, models
 from services.order_service import OrderService
-
-# 🔥 Звертаємося ТІЛЬКИ через клієнт-адаптер
-from services.finance_client import FinanceClient
+from services.order_feed import OrderFeed, ORDERS_MAX_LIMIT
 
 router = APIRouter(prefix="/orders", tags=["Orders"])
 
 @router.post("/checkout/")
-def checkout(order_data: schemas.OrderCreate, db: Session = Depends(database.get_db)):
-    # 1. Вся логіка створення замовлення (інкапсульована в сервісі)
-    new_order = OrderService.process_checkout(db, order_data)
-    
-    # 2. ДЕЛЕГУЄМО ФІНАНСИ КЛІЄНТУ
-    user_id = getattr(new_order, 'user_id', 1)
-    # Клієнт сам знайде зміни, рахунки і створить транзакцію, 
-    # а у випадку збою - тихо залогує помилку, не ламаючи чек.
-    FinanceClient.register_order_income(
-        db=db, 
-        order_id=new_order.id, 
-        total_price=new_order.total_price, 
-        payment_method=getattr(order_data, 'payment_method', 'cash'), 
-        user_id=user_id,
-        customer_id=getattr(new_order, 'customer_id', None)
-    )
+async def checkout(order_data: schemas.OrderCreate):
+    # Вся логіка створення замовлення (інкапсульована в сервісі): ціни і CRM паралельно,
+    # коротка транзакція запису, події складу та фінансів (order_paid) після commit
+    new_order = await OrderService.process_checkout_async(order_data)
 
-    # 3. Повертаємо результат на фронтенд
+    # Повертаємо результат на фронтенд
     return {
         "status": "ok", 
         "order_id": new_order.id, 
         "total_price": new_order.total_price
     }
 
+@router.get("/bonus-balance/{customer_id}")
+def get_bonus_balance(customer_id: int):
+    """Вільні бонуси клієнта для каси (з кешу балансу; CRM — лише при промаху)"""
+    available = OrderService.get_available_bonuses(customer_id)
+    if available is None:
+        raise HTTPException(status_code=503, detail="Баланс бонусів зараз недоступний")
+    return {"customer_id": customer_id, "available_bonuses": available}
+
 @router.get("/", response_model=schemas.OrderPaginationResponse)
 def get_orders(
-    page: int = Query(1, ge=1), 
-    limit: int = Query(20, ge=1, le=100), 
-    db: Session = Depends(database.get_db)
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=ORDERS_MAX_LIMIT),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    payment_method: Optional[str] = None,
+    customer_id: Optional[int] = None,
+    with_total: bool = False,
+    db: Session = Depends(database.get_report_db)
 ):
-    skip = (page - 1) * limit
-    total_orders = db.query(models.Order).count()
-    
-    orders = db.query(models.Order)\
-        .order_by(models.Order.created_at.desc())\
-        .offset(skip).limit(limit).all()
-        
+    """
+    Стрічка чеків, найновіші зверху. Наступна сторінка — ?cursor=<next_cursor з попередньої відповіді>.
+    Позиції всієї сторінки завантажуються одним запитом; total — лише з with_total=true і лише оцінка.
+    """
+    query = OrderFeed.apply_filters(db.query(models.Order), date_from, date_to, payment_method, customer_id)
+    orders, next_cursor = OrderFeed.page(query, cursor=cursor, limit=limit)
+
+    total, total_is_estimate = None, True
+    if with_total:
+        total, total_is_estimate = OrderFeed.estimate_total(db, query, (date_from, date_to, payment_method, customer_id))
+
     return {
         "items": orders,
-        "total": total_orders,
-        "page": page,
         "size": limit,
-        "pages": (total_orders + limit - 1) // limit
+        "next_cursor": next_cursor,
+        "total": total,
+        "total_is_estimate": total_is_estimate,
     }
 
 @router.delete("/{order_id}")
@@ -4,6 +4,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List
 import database, schemas, models
+from services.catalogue import catalogue
 
 router = APIRouter(prefix="/processes", tags=["Processes"])
 
@@ -22,6 +23,7 @@ def create_process_group(group: schemas.ProcessGroupCreate, db: Session = Depend
     for opt in group.options:
         db.add(models.ProcessOption(group_id=new_group.id, name=opt.name))
     
+    catalogue.bump(db)
     db.commit()
     db.refresh(new_group)
     return new_group
@@ -33,6 +35,7 @@ def update_process_group(id: int, group_data: schemas.ProcessGroupCreate, db: Se
     
     group.name = group_data.name
     group.parent_option_id = group_data.parent_option_id
+    catalogue.bump(db)
     db.commit()
     db.refresh(group)
     return group
@@ -46,21 +49,21 @@ def read_process_groups(db: Session = Depends(database.get_db)):
 def delete_process_group(id: int, db: Session = Depends(database.get_db)):
     group = db.query(models.ProcessGroup).filter(models.ProcessGroup.id == id).first()
     if not group: raise HTTPException(status_code=404)
-    db.delete(group); db.commit()
+    db.delete(group); catalogue.bump(db); db.commit()
     return {"status": "deleted"}
 
 # --- Опції (напр. Під турку) ---
 @router.post("/options/", response_model=schemas.ProcessOption)
 def add_process_option(option: schemas.ProcessOptionCreate, group_id: int, db: Session = Depends(database.get_db)):
     new_opt = models.ProcessOption(group_id=group_id, name=option.name)
-    db.add(new_opt); db.commit(); db.refresh(new_opt)
+    db.add(new_opt); catalogue.bump(db); db.commit(); db.refresh(new_opt)
     return new_opt
 
 @router.delete("/options/{id}")
 def delete_process_option(id: int, db: Session = Depends(database.get_db)):
     opt = db.query(models.ProcessOption).filter(models.ProcessOption.id == id).first()
     if not opt: raise HTTPException(status_code=404)
-    db.delete(opt); db.commit()
+    db.delete(opt); catalogue.bump(db); db.commit()
     return {"status": "deleted"}
 
 # 🔥 НОВЕ: Роут для редагування вже існуючої опції процесу
@@ -73,6 +76,7 @@ def update_process_option(id: int, option_data: schemas.ProcessOptionCreate, db:
     # Оновлюємо назву
     opt.name = option_data.name
     
+    catalogue.bump(db)
     db.commit()
     db.refresh(opt)
     return opt
\ No newline at end of file
@@ -7,6 +7,7 @@ import models, schemas, database
 
 # 🔥 Імпортуємо наш новий сервіс
 from services.product_room_service import ProductRoomService
+from services.catalogue import catalogue
 
 router = APIRouter(
     prefix="/product_rooms",
@@ -46,6 +47,7 @@ def delete_room(room_id: int, db: Session = Depends(database.get_db)):
     # Відв'язуємо товари перед видаленням
     db.query(models.Product).filter(models.Product.room_id == room_id).update({"room_id": None})
     db.delete(room)
+    catalogue.bump(db)
     db.commit()
     return {"message": "Кімнату успішно видалено"}
 
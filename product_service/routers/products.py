@@ -1,12 +1,17 @@
 # FILE: product_service/routers/products.py
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session, joinedload
-from typing import List
+from typing import List, Optional
+from datetime import datetime
 import database, schemas, models
 
 from services.product_service import ProductService
 from services.inventory_client import InventoryClient # 🔥 Використовуємо адаптер
+from services.bom_cache import bom_cache
+from services.availability_service import AvailabilityService
+from services.catalogue import catalogue, if_none_match
+from services.inventory_history import HISTORY_MAX_LIMIT
 
 router = APIRouter(prefix="/products", tags=["Products"])
 
@@ -15,20 +20,51 @@ router = APIRouter(prefix="/products", tags=["Products"])
 def calculate_cost(data: schemas.ProductCostCheck, db: Session = Depends(database.get_db)):
     return {"total_cost": ProductService.calculate_product_cost(db, data)}
 
+# --- МЕТРИКИ КЕШУ СКОМПІЛЬОВАНИХ ТЕХКАРТ (BoM) ---
+@router.get("/bom-cache/stats")
+def get_bom_cache_stats():
+    return bom_cache.stats()
+
+# --- КАРТА ДОСТУПНОСТІ: скільки порцій кожного варіанту можна продати (одним викликом) ---
+@router.get("/availability")
+def get_availability(db: Session = Depends(database.get_db)):
+    return AvailabilityService.sellable_quantities(db)
+
+# --- ЗАЛИШКИ ДЛЯ КАТАЛОГУ: товари з обліком і варіанти (на техкартах — скільки порцій можна продати) ---
+@router.get("/stock")
+def get_catalogue_stock(db: Session = Depends(database.get_db)):
+    return catalogue.stock(db)
+
+# --- МЕТРИКИ ЗНІМКА КАТАЛОГУ (версія, перебудови, 304) ---
+@router.get("/catalogue/stats")
+def get_catalogue_stats():
+    return catalogue.stats()
+
 @router.get("/{product_id}/variants/{variant_id}/calculated-stock")
 def get_variant_calculated_stock(product_id: int, variant_id: int, db: Session = Depends(database.get_db)):
     return {"calculated_stock": ProductService.calculate_max_possible_stock(db, variant_id)}
 
 @router.get("/{product_id}/history", response_model=List[schemas.InventoryTransactionRead])
-def get_product_history(product_id: int, db: Session = Depends(database.get_db)):
-    product = db.query(models.Product).options(joinedload(models.Product.variants)).filter(models.Product.id == product_id).first()
-    if not product:
+def get_product_history(
+    product_id: int,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    reason: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=HISTORY_MAX_LIMIT),
+    db: Session = Depends(database.get_db)
+):
+    """Історія руху товару та його варіантів посторінково (курсор наступної сторінки — у X-Next-Cursor)"""
+    if not db.query(models.Product.id).filter(models.Product.id == product_id).first():
         raise HTTPException(status_code=404, detail="Product not found")
 
-    variant_ids = [v.id for v in product.variants] if product.variants else []
-    
+    variant_ids = [v_id for (v_id,) in db.query(models.ProductVariant.id).filter(models.ProductVariant.product_id == product_id)]
+
     # 🔥 ДЕЛЕГУЄМО: Товари більше не лізуть в таблиці складу напряму!
-    return InventoryClient.get_product_history(db, product_id, variant_ids)
+    return InventoryClient.get_product_history(
+        db, product_id, variant_ids, cursor=cursor, limit=limit,
+        date_from=date_from, date_to=date_to, reason=reason
+    )
 
 # --- CRUD ОПЕРАЦІЇ (КАТАЛОГ) ---
 
@@ -44,54 +80,16 @@ def update_product(product_id: int, product_data: schemas.ProductCreate, db: Ses
     return updated_product
 
 @router.get("/", response_model=List[schemas.Product])
-def read_products(db: Session = Depends(database.get_db)):
-    # 🔥 СТЯГУЄМО ЗАЛИШКИ ЗІ СКЛАДУ ОДИН РАЗ ДЛЯ ВСІХ ТОВАРІВ
-    from services.inventory_client import InventoryClient
-    ing_stock, con_stock = InventoryClient.get_all_stocks()
-    # 🔥 ВИПРАВЛЕНО: Видалені JOIN-и з базами складу!
-    products = db.query(models.Product).options(
-        joinedload(models.Product.category),
-        joinedload(models.Product.variants).joinedload(models.ProductVariant.consumables),
-        joinedload(models.Product.variants).joinedload(models.ProductVariant.ingredients),
-        joinedload(models.Product.variants).joinedload(models.ProductVariant.master_recipe).joinedload(models.MasterRecipe.items),
-        joinedload(models.Product.consumables),
-        joinedload(models.Product.ingredients)
-    ).all()
-
-    for p in products:
-        if p.stock_quantity is None: p.stock_quantity = 0.0
-        if p.price is None: p.price = 0.0
-        if p.output_weight is None: p.output_weight = 0.0
-
-        for c in p.consumables:
-            c.consumable_name = f"ID Матеріалу: {c.consumable_id}"
-        for i in p.ingredients:
-            i.ingredient_name = f"ID Інгредієнта: {i.ingredient_id}"
-            
-        for v in p.variants:
-            if v.stock_quantity is None: v.stock_quantity = 0.0
-            if v.price is None: v.price = 0.0
-            if v.output_weight is None: v.output_weight = 0.0
-
-            if v.master_recipe:
-                for item in v.master_recipe.items:
-                    item.ingredient_name = f"ID Інгредієнта: {item.ingredient_id}"
-
-            if v.master_recipe_id and not p.track_stock:
-                try:
-                    # 🔥 ПЕРЕДАЄМО СЛОВНИКИ В КАЛЬКУЛЯТОР
-                    v.stock_quantity = ProductService.calculate_max_possible_stock(db, v.id, ing_stock, con_stock)
-                except Exception:
-                    v.stock_quantity = 0.0
-            
-            if v.stock_quantity is None: v.stock_quantity = 0.0
-
-            for vc in v.consumables:
-                vc.consumable_name = f"ID Матеріалу: {vc.consumable_id}"
-            for vi in v.ingredients:
-                vi.ingredient_name = f"ID Інгредієнта: {vi.ingredient_id}"
-                    
-    return products
+def read_products(request: Request, db: Session = Depends(database.get_db)):
+    """
+    Каталог меню без залишків: готовий JSON поточної версії (services/catalogue.py).
+    ETag = версія каталогу; If-None-Match з тією ж версією → 304 без тіла. Залишки — GET /products/stock.
+    """
+    snapshot = catalogue.get(db)
+    if if_none_match(request.headers.get("if-none-match"), snapshot.etag):
+        catalogue.not_modified += 1
+        return Response(status_code=304, headers=snapshot.headers)
+    return Response(content=snapshot.body, media_type="application/json", headers=snapshot.headers)
 
 @router.get("/{product_id}", response_model=schemas.Product)
 def read_product(product_id: int, db: Session = Depends(database.get_db)):
@@ -4,6 +4,8 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session, joinedload
 from typing import List
 import database, schemas, models
+from services.bom_cache import bom_cache
+from services.catalogue import catalogue
 
 router = APIRouter(prefix="/recipes", tags=["Recipes"])
 
@@ -21,6 +23,7 @@ def create_recipe(recipe: schemas.MasterRecipeCreate, db: Session = Depends(data
             is_percentage=item.is_percentage
         ))
     
+    catalogue.bump(db)
     db.commit()
     db.refresh(new_recipe)
     return new_recipe
@@ -61,7 +64,10 @@ def update_recipe(recipe_id: int, recipe_data: schemas.MasterRecipeCreate, db: S
             is_percentage=item.is_percentage
         ))
         
+    catalogue.bump(db)
     db.commit()
+    # Усі товари/варіанти на цій техкарті треба перекомпілювати
+    bom_cache.invalidate_recipe(recipe_id)
     db.refresh(db_recipe)
     return db_recipe
 
@@ -87,5 +93,7 @@ def delete_recipe(recipe_id: int, db: Session = Depends(database.get_db)):
     if not db_recipe:
         raise HTTPException(status_code=404, detail="Рецепт не знайдено")
     db.delete(db_recipe)
+    catalogue.bump(db)
     db.commit()
+    bom_cache.invalidate_recipe(recipe_id)
     return {"status": "deleted"}
\ No newline at end of file
@@ -6,7 +6,6 @@ from typing import List
 import models, schemas, database
 
 from services.supply_service import SupplyService
-from services.finance_client import FinanceClient
 
 router = APIRouter(prefix="/supplies", tags=["Supplies"])
 
@@ -27,23 +26,8 @@ def create_supply(data: schemas.SupplyCreate, db: Session = Depends(database.get
     """
     Створює нове постачання (накладну), формує партії та перераховує собівартість.
     """
-    new_supply = SupplyService.create_supply(db, data)
-
-    # 🔥 ДЕЛЕГУЄМО ФІНАНСИ КЛІЄНТУ (Ізоляція доменів збережена)
-    payment_account_id = getattr(data, 'payment_account_id', None)
-    paid_amount = getattr(data, 'paid_amount', 0)
-    
-    if payment_account_id and paid_amount > 0:
-        user_id = getattr(data, 'user_id', 1) 
-        FinanceClient.register_supply_expense(
-            db=db, 
-            supply_id=new_supply.id, 
-            total_cost=float(paid_amount), 
-            account_id=payment_account_id, 
-            user_id=user_id
-        )
-
-    return new_supply
+    # Накладна, партії та подія оплати для фінансів — однією транзакцією (див. SupplyService)
+    return SupplyService.create_supply(db, data)
 
 @router.get("/", response_model=List[schemas.SupplyResponse])
 def get_supplies(skip: int = 0, limit: int = 50, db: Session = Depends(database.get_db)):
@@ -57,12 +57,13 @@ class OrderRead(BaseModel):
     class Config: 
         from_attributes = True
 
-# --- ПАГІНАЦІЯ ДЛЯ СПИСКУ ЧЕКІВ ---
+# --- ПАГІНАЦІЯ ДЛЯ СПИСКУ ЧЕКІВ (keyset) ---
 class OrderPaginationResponse(BaseModel):
-    total: int
     items: List[OrderRead] = []
-    page: int
-    pages: int
+    size: int
+    next_cursor: Optional[str] = None   # Передається назад як ?cursor=... ; None — це остання сторінка
+    total: Optional[int] = None         # Лише з with_total=true; на Postgres це ОЦІНКА з плану запиту
+    total_is_estimate: bool = True      # False — total порахований точним COUNT
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
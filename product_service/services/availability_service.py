@@ -0,0 +1,116 @@
+# FILE: product_service/services/availability_service.py
+
+import threading
+import time
+import numpy as np
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+import models
+from services.bom_service import BomService
+from services.bom_cache import bom_cache
+
+
+class AvailabilityService:
+    """
+    Векторний розрахунок "скільки порцій можна продати" для всього меню одразу.
+
+    Скомпільовані техкарти (BomService / bom_cache) складаються в розріджену матрицю
+    варіанти × сировина (формат COO: рядок, стовпець, потреба на 1 порцію),
+    після чого floor(min(залишок / потреба)) рахується одним проходом NumPy.
+    Побудована матриця кешується до наступної інвалідації bom_cache (або до TTL),
+    тож на кожен запит лишається тільки вектор залишків і одна векторна операція.
+    """
+    _matrix_lock = threading.Lock()
+    _matrix = None  # (generation, expires_at, keys, matrix)
+
+    @staticmethod
+    def build_matrix(compiled: dict):
+        """
+        compiled: {variant_id: скомпільований BoM}.
+        Повертає (variant_ids, rows, cols, requirements, materials), де materials — список
+        ключів стовпців ('ingredient', id) / ('consumable', id). Нульові потреби не потрапляють у матрицю.
+        """
+        variant_ids = list(compiled)
+        columns = {}
+        rows, cols, requirements = [], [], []
+
+        for row, variant_id in enumerate(variant_ids):
+            entry = compiled[variant_id]
+            for kind, vector in (("ingredient", entry["ingredients"]), ("consumable", entry["consumables"])):
+                for entity_id, req_qty in vector.items():
+                    if not req_qty or req_qty <= 0:
+                        continue
+                    col = columns.setdefault((kind, entity_id), len(columns))
+                    rows.append(row)
+                    cols.append(col)
+                    requirements.append(req_qty)
+
+        return (
+            variant_ids,
+            np.asarray(rows, dtype=np.intp),
+            np.asarray(cols, dtype=np.intp),
+            np.asarray(requirements, dtype=np.float64),
+            list(columns)
+        )
+
+    @staticmethod
+    def compute(matrix, ing_stock: dict, con_stock: dict) -> dict:
+        """Повертає {variant_id: кількість порцій} для всіх рядків побудованої матриці"""
+        variant_ids, rows, cols, requirements, materials = matrix
+        if not variant_ids:
+            return {}
+
+        stock_vector = np.fromiter(
+            ((ing_stock if kind == "ingredient" else con_stock).get(entity_id, 0.0) or 0.0 for kind, entity_id in materials),
+            dtype=np.float64,
+            count=len(materials)
+        )
+
+        # min(залишок / потреба) по кожному рядку; варіант без жодної потреби лишається inf -> 0
+        max_qty = np.full(len(variant_ids), np.inf)
+        np.minimum.at(max_qty, rows, stock_vector[cols] / requirements)
+        result = np.where(np.isinf(max_qty), 0.0, np.floor(max_qty))
+
+        return dict(zip(variant_ids, result.tolist()))
+
+    @staticmethod
+    def matrix_for(db: Session, keys: list):
+        """Матриця BoM для набору [(product_id, variant_id)] — з кешу, якщо техкарти не змінювались"""
+        generation = bom_cache.generation
+        frozen_keys = tuple(keys)
+        with AvailabilityService._matrix_lock:
+            cached = AvailabilityService._matrix
+        if cached and cached[0] == generation and cached[1] > time.monotonic() and cached[2] == frozen_keys:
+            return cached[3]
+
+        compiled_units = BomService.compiled_units(db, keys)
+        compiled = {v_id: compiled_units[(p_id, v_id)] for p_id, v_id in keys if (p_id, v_id) in compiled_units}
+        matrix = AvailabilityService.build_matrix(compiled)
+        with AvailabilityService._matrix_lock:
+            AvailabilityService._matrix = (generation, time.monotonic() + bom_cache.ttl, frozen_keys, matrix)
+        return matrix
+
+    @staticmethod
+    def sellable_quantities(db: Session, keys=None, ing_stock: dict = None, con_stock: dict = None) -> dict:
+        """
+        Карта доступності {variant_id: кількість порцій} ОДНИМ викликом.
+        keys — [(product_id, variant_id)]; якщо не передано, беруться всі варіанти на техкартах
+        у товарів без власного складського обліку (як у GET /products/).
+        """
+        if keys is None:
+            keys = db.query(models.ProductVariant.product_id, models.ProductVariant.id)\
+                .join(models.Product, models.Product.id == models.ProductVariant.product_id)\
+                .filter(
+                    models.ProductVariant.master_recipe_id != None,
+                    or_(models.Product.track_stock == False, models.Product.track_stock == None)
+                ).all()
+        keys = sorted((p_id, v_id) for p_id, v_id in keys)
+        if not keys:
+            return {}
+
+        # Якщо словники не передали, стягуємо залишки зі складу один раз
+        if ing_stock is None or con_stock is None:
+            from services.inventory_client import InventoryClient
+            ing_stock, con_stock = InventoryClient.get_all_stocks()
+
+        return AvailabilityService.compute(AvailabilityService.matrix_for(db, keys), ing_stock, con_stock)
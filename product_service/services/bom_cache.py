@@ -0,0 +1,118 @@
+# FILE: product_service/services/bom_cache.py
+
+import os
+import threading
+import time
+
+# Страховка для ІНШИХ процесів (order_worker, інші uvicorn-воркери): явна інвалідація
+# спрацьовує лише в процесі, який зберіг зміни, тому записи ще й старіють за TTL.
+BOM_CACHE_TTL = float(os.getenv("BOM_CACHE_TTL", "300"))
+
+
+class CompiledBomCache:
+    """
+    In-process кеш скомпільованих техкарт (BoM).
+
+    units:   {(product_id, variant_id): {"ingredients": {id: qty}, "consumables": {id: qty}, "recipe_id": id}}
+             — плаский вектор сировини на ОДНУ одиницю товару, відсотки рецепту вже перераховані від ваги виходу.
+    recipes: {recipe_id: [(ingredient_id, quantity, is_percentage), ...]} — для калькулятора собівартості.
+
+    Інвалідація: invalidate_product() / invalidate_recipe() після коміту змін товару чи техкарти.
+    Кожна інвалідація збільшує generation — запис, скомпільований до неї, вже не потрапить у кеш.
+    """
+
+    def __init__(self, ttl_seconds: float = BOM_CACHE_TTL):
+        self.ttl = ttl_seconds
+        self._lock = threading.Lock()
+        self._units = {}          # {(product_id, variant_id): (expires_at, entry)}
+        self._recipes = {}        # {recipe_id: (expires_at, items)}
+        self._variant_owner = {}  # {variant_id: product_id}
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _lookup(self, store: dict, key):
+        record = store.get(key)
+        if record is None or record[0] < time.monotonic():
+            if record is not None:
+                store.pop(key, None)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return record[1]
+
+    # --- ТОВАРИ / ВАРІАНТИ ---
+    def get_unit(self, product_id: int, variant_id: int = None):
+        with self._lock:
+            return self._lookup(self._units, (product_id, variant_id))
+
+    def get_variant(self, variant_id: int):
+        """Пошук тільки за ID варіанту (калькулятор залишків не знає product_id). Повертає entry або None"""
+        with self._lock:
+            product_id = self._variant_owner.get(variant_id)
+            if product_id is None:
+                self.misses += 1
+                return None
+            return self._lookup(self._units, (product_id, variant_id))
+
+    def put_unit(self, product_id: int, variant_id: int, entry: dict, generation: int):
+        with self._lock:
+            if generation != self.generation:
+                return  # Поки ми компілювали, товар/рецепт змінили — не кешуємо застарілі дані
+            self._units[(product_id, variant_id)] = (time.monotonic() + self.ttl, entry)
+            if variant_id:
+                self._variant_owner[variant_id] = product_id
+
+    # --- ТЕХКАРТИ ---
+    def get_recipe(self, recipe_id: int):
+        with self._lock:
+            return self._lookup(self._recipes, recipe_id)
+
+    def put_recipe(self, recipe_id: int, items: list, generation: int):
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._recipes[recipe_id] = (time.monotonic() + self.ttl, items)
+
+    # --- ІНВАЛІДАЦІЯ ---
+    def invalidate_product(self, product_id: int):
+        with self._lock:
+            self.generation += 1
+            self.invalidations += 1
+            for key in [k for k in self._units if k[0] == product_id]:
+                del self._units[key]
+            for v_id in [v for v, p in self._variant_owner.items() if p == product_id]:
+                del self._variant_owner[v_id]
+
+    def invalidate_recipe(self, recipe_id: int):
+        with self._lock:
+            self.generation += 1
+            self.invalidations += 1
+            self._recipes.pop(recipe_id, None)
+            for key in [k for k, (_, entry) in self._units.items() if entry.get("recipe_id") == recipe_id]:
+                del self._units[key]
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._units.clear()
+            self._recipes.clear()
+            self._variant_owner.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "invalidations": self.invalidations,
+                "cached_units": len(self._units),
+                "cached_recipes": len(self._recipes),
+                "ttl_seconds": self.ttl
+            }
+
+
+# Єдиний екземпляр на процес (як і rabbitmq)
+bom_cache = CompiledBomCache()
@@ -0,0 +1,223 @@
+# FILE: product_service/services/bom_service.py
+
+from sqlalchemy.orm import Session, joinedload
+import models
+from services.bom_cache import bom_cache
+
+
+def _item_field(item, name: str, default=None):
+    """Читає поле позиції чека незалежно від формату (dict, Pydantic-модель або ORM OrderItem)"""
+    if isinstance(item, dict):
+        value = item.get(name, default)
+    else:
+        value = getattr(item, name, default)
+    return default if value is None else value
+
+
+class BomService:
+    """
+    Розпакування чека до рівня сировини (Bill of Materials).
+    Каталог для всього чека завантажується пакетно (по набору ID одним запитом на товари
+    і одним на варіанти), а сам BoM рахується в пам'яті — кількість запитів не росте
+    разом із кількістю позицій у чеку. Скомпільовані вектори "на одиницю" живуть у bom_cache.
+    """
+
+    @staticmethod
+    def load_catalog(db: Session, product_ids, variant_ids):
+        """Повертає ({id: Product}, {id: ProductVariant}) разом із рецептами та зв'язками"""
+        products = {}
+        if product_ids:
+            rows = db.query(models.Product).options(
+                joinedload(models.Product.ingredients),
+                joinedload(models.Product.consumables),
+                joinedload(models.Product.master_recipe).joinedload(models.MasterRecipe.items)
+            ).filter(models.Product.id.in_(list(product_ids))).all()
+            products = {p.id: p for p in rows}
+
+        variants = {}
+        if variant_ids:
+            rows = db.query(models.ProductVariant).options(
+                joinedload(models.ProductVariant.ingredients),
+                joinedload(models.ProductVariant.consumables),
+                joinedload(models.ProductVariant.master_recipe).joinedload(models.MasterRecipe.items)
+            ).filter(models.ProductVariant.id.in_(list(variant_ids))).all()
+            variants = {v.id: v for v in rows}
+
+        return products, variants
+
+    @staticmethod
+    def unit_bom(product, variant=None) -> dict:
+        """
+        Компілює BoM для ОДНІЄЇ одиниці товару/варіанту.
+        Повертає {"ingredients": {id: кількість}, "consumables": {id: кількість}, "recipe_id": id},
+        відсоткові позиції рецепту вже перераховані від ваги виходу.
+        """
+        ingredients = {}
+        consumables = {}
+        recipe = None
+        target_weight = 0.0
+
+        # 1. ВАРІАНТ (S, M, L): власний рецепт, інгредієнти та пакування
+        if variant:
+            target_weight = variant.output_weight or 0.0
+            if variant.master_recipe_id:
+                recipe = variant.master_recipe
+            for vc in variant.consumables:
+                consumables[vc.consumable_id] = consumables.get(vc.consumable_id, 0) + vc.quantity
+            for vi in variant.ingredients:
+                ingredients[vi.ingredient_id] = ingredients.get(vi.ingredient_id, 0) + vi.quantity
+
+        # 2. ПРОСТИЙ ТОВАР (або варіант без власного рецепту)
+        if not recipe and product.master_recipe_id:
+            recipe = product.master_recipe
+            target_weight = product.output_weight or 0.0
+
+        # 3. Інгредієнти з РЕЦЕПТУ (з правильними відсотками)
+        if recipe:
+            for ri in recipe.items:
+                amount = (ri.quantity / 100.0) * target_weight if getattr(ri, 'is_percentage', False) else ri.quantity
+                ingredients[ri.ingredient_id] = ingredients.get(ri.ingredient_id, 0) + amount
+
+        # 4. Базові інгредієнти та витратні матеріали ПРОДУКТУ
+        for pi in product.ingredients:
+            ingredients[pi.ingredient_id] = ingredients.get(pi.ingredient_id, 0) + pi.quantity
+        for pc in product.consumables:
+            consumables[pc.consumable_id] = consumables.get(pc.consumable_id, 0) + pc.quantity
+
+        return {
+            "ingredients": ingredients,
+            "consumables": consumables,
+            "recipe_id": recipe.id if recipe else None
+        }
+
+    @staticmethod
+    def compiled_units(db: Session, keys) -> dict:
+        """
+        Повертає {(product_id, variant_id): скомпільований BoM} з кешу.
+        Промахи компілюються одним пакетним завантаженням каталогу і кладуться в кеш.
+        Ключі з неіснуючим товаром у результат не потрапляють.
+        """
+        result = {}
+        missing = []
+        for key in keys:
+            entry = bom_cache.get_unit(*key)
+            if entry is None:
+                missing.append(key)
+            else:
+                result[key] = entry
+
+        if missing:
+            generation = bom_cache.generation
+            products, variants = BomService.load_catalog(
+                db,
+                {p_id for p_id, _ in missing if p_id},
+                {v_id for _, v_id in missing if v_id}
+            )
+            for p_id, v_id in missing:
+                product = products.get(p_id)
+                if not product:
+                    continue
+                entry = BomService.unit_bom(product, variants.get(v_id) if v_id else None)
+                bom_cache.put_unit(p_id, v_id, entry, generation)
+                result[(p_id, v_id)] = entry
+
+        return result
+
+    @staticmethod
+    def compiled_variant(db: Session, variant_id: int):
+        """Скомпільований BoM варіанту лише за його ID (для калькулятора залишків). None — якщо варіанту немає"""
+        entry = bom_cache.get_variant(variant_id)
+        if entry is not None:
+            return entry
+
+        product_id = db.query(models.ProductVariant.product_id).filter(models.ProductVariant.id == variant_id).scalar()
+        if product_id is None:
+            return None
+        return BomService.compiled_units(db, [(product_id, variant_id)]).get((product_id, variant_id))
+
+    @staticmethod
+    def compiled_recipe(db: Session, recipe_id: int) -> list:
+        """Позиції техкарти [(ingredient_id, quantity, is_percentage)] з кешу"""
+        items = bom_cache.get_recipe(recipe_id)
+        if items is not None:
+            return items
+
+        generation = bom_cache.generation
+        rows = db.query(
+            models.MasterRecipeItem.ingredient_id,
+            models.MasterRecipeItem.quantity,
+            models.MasterRecipeItem.is_percentage
+        ).filter(models.MasterRecipeItem.recipe_id == recipe_id).all()
+        items = [(ing_id, qty or 0.0, bool(is_pct)) for ing_id, qty, is_pct in rows]
+        bom_cache.put_recipe(recipe_id, items, generation)
+        return items
+
+    @staticmethod
+    def expand_bom(db: Session, items: list) -> dict:
+        """
+        Розпаковує позиції чека (dict, Pydantic SoldItem або ORM OrderItem) до сировини.
+        Повертає {
+            "ingredients": {id: загальна_кількість},
+            "consumables": {id: загальна_кількість},
+            "lines": [{"product_id", "variant_id", "qty", "name", "stock"}]
+        }
+        Вектори на одиницю беруться з кешу скомпільованих BoM; з бази читаються лише
+        назви та поточні залишки (легкий запит по набору ID).
+        Позиції з неіснуючим товаром пропускаються (як і раніше).
+        """
+        parsed = []
+        for item in items:
+            parsed.append((
+                _item_field(item, "product_id"),
+                _item_field(item, "variant_id"),
+                float(_item_field(item, "quantity", 1.0))
+            ))
+
+        product_ids = {p_id for p_id, _, _ in parsed if p_id}
+        variant_ids = {v_id for _, v_id, _ in parsed if v_id}
+        products = {}
+        if product_ids:
+            products = {row.id: row for row in db.query(
+                models.Product.id, models.Product.name, models.Product.stock_quantity
+            ).filter(models.Product.id.in_(list(product_ids))).all()}
+        variants = {}
+        if variant_ids:
+            variants = {row.id: row for row in db.query(
+                models.ProductVariant.id, models.ProductVariant.name, models.ProductVariant.stock_quantity
+            ).filter(models.ProductVariant.id.in_(list(variant_ids))).all()}
+
+        compiled = BomService.compiled_units(db, {(p_id, v_id) for p_id, v_id, _ in parsed if p_id in products})
+
+        bom_ingredients = {}
+        bom_consumables = {}
+        lines = []
+
+        for p_id, v_id, qty in parsed:
+            product = products.get(p_id)
+            entry = compiled.get((p_id, v_id))
+            if not product or entry is None:
+                continue
+            variant = variants.get(v_id) if v_id else None
+
+            item_name = product.name
+            if variant and variant.name:
+                item_name += f" ({variant.name})"
+
+            for ing_id, unit_qty in entry["ingredients"].items():
+                bom_ingredients[ing_id] = bom_ingredients.get(ing_id, 0) + unit_qty * qty
+            for cons_id, unit_qty in entry["consumables"].items():
+                bom_consumables[cons_id] = bom_consumables.get(cons_id, 0) + unit_qty * qty
+
+            lines.append({
+                "product_id": p_id,
+                "variant_id": v_id,
+                "qty": qty,
+                "name": item_name,
+                "stock": (variant.stock_quantity if variant else product.stock_quantity) or 0.0
+            })
+
+        return {
+            "ingredients": bom_ingredients,
+            "consumables": bom_consumables,
+            "lines": lines
+        }
@@ -0,0 +1,170 @@
+# FILE: product_service/services/bonus_cache.py
+
+import json
+import os
+import threading
+import time
+from decimal import Decimal, ROUND_DOWN
+from typing import Optional
+import redis
+
+REDIS_HOST = os.getenv("REDIS_HOST", "pos_redis")
+REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
+BALANCE_TTL_SECONDS = int(os.getenv("BONUS_BALANCE_TTL", "30"))   # Скільки живе закешований баланс CRM
+HOLD_TTL_SECONDS = int(os.getenv("BONUS_HOLD_TTL", "86400"))       # Холди живуть, поки чек не оброблено лояльністю
+INVALIDATION_CHANNEL = "crm:balance_invalidated"                   # Сюди customer_worker шле зміну балансу
+
+# Баланс у копійках; холди — hash hold_id → копійки; покоління — лічильник інвалідацій
+BALANCE_KEY = "crm:balance:{}"
+HOLDS_KEY = "crm:holds:{}"
+GENERATION_KEY = "crm:balance_gen:{}"
+
+# Спільний початок скриптів. KEYS: баланс, холди, покоління.
+# ARGV[1..3]: баланс з CRM (копійки, '' — немає), покоління на момент запиту до CRM, TTL балансу.
+# Якщо балансу в кеші немає, кладе переданий (лише при незмінному поколінні), інакше повертає nil — потрібен CRM.
+LOAD_BALANCE_LUA = """
+local balance = redis.call('GET', KEYS[1])
+if not balance then
+    if ARGV[1] == '' or (redis.call('GET', KEYS[3]) or '0') ~= ARGV[2] then
+        return nil
+    end
+    redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[3])
+    balance = ARGV[1]
+end
+local held = 0
+for _, amount in ipairs(redis.call('HVALS', KEYS[2])) do
+    held = held + tonumber(amount)
+end
+local free = tonumber(balance) - held
+"""
+
+# Вільні бонуси (баланс − холди) у копійках
+AVAILABLE_LUA = LOAD_BALANCE_LUA + """
+return math.max(free, 0)
+"""
+
+# ARGV[4..6]: ліміт (копійки), hold_id, TTL холдів. Повертає зарезервовані копійки
+RESERVE_LUA = LOAD_BALANCE_LUA + """
+local spend = math.min(tonumber(ARGV[4]), free)
+if spend <= 0 then
+    return 0
+end
+redis.call('HSET', KEYS[2], ARGV[5], spend)
+redis.call('EXPIRE', KEYS[2], ARGV[6])
+return spend
+"""
+
+# KEYS: баланс, холди, покоління. ARGV: hold_id (може бути порожнім)
+INVALIDATE_LUA = """
+redis.call('DEL', KEYS[1])
+if ARGV[1] ~= '' then
+    redis.call('HDEL', KEYS[2], ARGV[1])
+end
+return redis.call('INCR', KEYS[3])
+"""
+
+
+def to_cents(amount) -> int:
+    """Гривні → копійки з округленням ВНИЗ (ніколи не списуємо більше, ніж є)"""
+    return int((Decimal(str(amount)) * 100).to_integral_value(rounding=ROUND_DOWN))
+
+
+class BonusCache:
+    """
+    Кеш бонусного балансу CRM з холдами (read-through, у спільному Redis).
+    - Чек резервує бонуси атомарно (Lua): доступно = закешований баланс − сума холдів, тож два чеки
+      одного клієнта не витратять більше, ніж є на рахунку, навіть поки CRM ще не отримала жодного з них.
+    - Промах кешу → один запит до CRM; баланс кладеться в кеш лише якщо між запитом і записом
+      не було інвалідації (покоління не змінилось), інакше застарілий баланс не потрапить у кеш.
+    - customer_worker після зміни балансу шле подію в INVALIDATION_CHANNEL: кеш скидається,
+      а холд цього чека знімається (його сума вже врахована в балансі CRM).
+    Загублена інвалідація лише призводить до недовикористання бонусів до закінчення TTL, не до перевитрати.
+    """
+    redis = None  # Підміняється в тестах і бенчмарку (fakeredis)
+
+    @classmethod
+    def client(cls):
+        if cls.redis is None:
+            cls.redis = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=0, decode_responses=True,
+                                    socket_timeout=1.0, socket_connect_timeout=1.0)
+        return cls.redis
+
+    @classmethod
+    def peek(cls, customer_id: int) -> tuple:
+        """
+        (покоління, чи є баланс у кеші) одним round-trip. Покоління читається ДО запиту в CRM
+        і передається в reserve разом з отриманим балансом.
+        """
+        pipe = cls.client().pipeline(transaction=False)
+        pipe.get(GENERATION_KEY.format(customer_id))
+        pipe.exists(BALANCE_KEY.format(customer_id))
+        generation, cached = pipe.execute()
+        return generation or "0", bool(cached)
+
+    @classmethod
+    def _keys(cls, customer_id: int) -> tuple:
+        return BALANCE_KEY.format(customer_id), HOLDS_KEY.format(customer_id), GENERATION_KEY.format(customer_id)
+
+    @staticmethod
+    def _balance_args(balance: Optional[float], generation: Optional[str]) -> tuple:
+        return "" if balance is None else to_cents(balance), generation or "0", BALANCE_TTL_SECONDS
+
+    @classmethod
+    def available(cls, customer_id: int, balance: float = None, generation: str = None) -> Optional[float]:
+        """Вільні бонуси (баланс − холди незавершених чеків) або None, якщо балансу в кеші немає"""
+        free = cls.client().eval(AVAILABLE_LUA, 3, *cls._keys(customer_id), *cls._balance_args(balance, generation))
+        return None if free is None else int(free) / 100
+
+    @classmethod
+    def reserve(cls, customer_id: int, limit: float, hold_id: str,
+                balance: float = None, generation: str = None) -> Optional[float]:
+        """
+        Резервує до limit гривень бонусів під hold_id. Повертає суму холду (може бути 0),
+        або None, якщо балансу в кеші немає і переданий з CRM баланс уже застарів.
+        """
+        reserved = cls.client().eval(
+            RESERVE_LUA, 3, *cls._keys(customer_id), *cls._balance_args(balance, generation),
+            to_cents(limit), hold_id, HOLD_TTL_SECONDS,
+        )
+        return None if reserved is None else int(reserved) / 100
+
+    @classmethod
+    def release(cls, customer_id: int, hold_id: str):
+        """Знімає холд чека, який так і не зберігся (помилка транзакції)"""
+        try:
+            cls.client().hdel(HOLDS_KEY.format(customer_id), hold_id)
+        except redis.RedisError as e:
+            print(f"⚠️ [LOYALTY] Не вдалося зняти холд {hold_id}: {e}")
+
+    @classmethod
+    def invalidate(cls, customer_id: int, hold_id: str = None):
+        """Скидає баланс, знімає холд обробленого чека і піднімає покоління"""
+        cls.client().eval(INVALIDATE_LUA, 3, *cls._keys(customer_id), hold_id or "")
+
+    @classmethod
+    def listen(cls):
+        """Нескінченно слухає INVALIDATION_CHANNEL (перепідключення при збоях Redis)"""
+        while True:
+            try:
+                pubsub = cls.client().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+                print(f"🎧 [LOYALTY] Слухаю інвалідації балансу '{INVALIDATION_CHANNEL}'")
+                while True:
+                    # get_message з таймаутом, а не listen(): короткий socket_timeout клієнта не рве підписку
+                    message = pubsub.get_message(timeout=1.0)
+                    if not message:
+                        continue
+                    try:
+                        data = json.loads(message["data"])
+                        cls.invalidate(data["customer_id"], data.get("hold_id"))
+                    except (ValueError, KeyError) as e:
+                        print(f"⚠️ [LOYALTY] Некоректна інвалідація {message['data']!r}: {e}")
+            except redis.RedisError as e:
+                print(f"⚠️ [LOYALTY] Канал інвалідації обірвався ({e}). Повтор через 2 сек...")
+                time.sleep(2)
+
+    @classmethod
+    def start_listener(cls) -> threading.Thread:
+        thread = threading.Thread(target=cls.listen, name="bonus-cache-invalidation", daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,177 @@
+# FILE: product_service/services/catalogue.py
+
+import threading
+import orjson
+from sqlalchemy.orm import Session, joinedload, selectinload
+import models
+import schemas
+from db_layer import upsert
+from services.availability_service import AvailabilityService
+
+V = models.CatalogueVersion
+
+# Залишки не входять у знімок каталогу — вони змінюються з кожним чеком (див. MenuCatalogue.stock)
+STOCK_FIELDS = {"stock_quantity": True, "variants": {"__all__": {"stock_quantity"}}}
+
+
+def if_none_match(header: str, etag: str) -> bool:
+    """Чи є etag серед значень If-None-Match (слабке порівняння: nginx з gzip додає W/)"""
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
+
+
+class CatalogueSnapshot:
+    """Каталог однієї версії, вже серіалізований у JSON-байти"""
+
+    def __init__(self, version: int, body: bytes, products: int):
+        self.version = version
+        self.body = body
+        self.products = products
+        self.etag = f'"catalogue-v{version}"'
+        # no-cache: клієнт кешує відповідь, але щоразу перепитує її свіжість (If-None-Match → 304)
+        self.headers = {"ETag": self.etag, "Cache-Control": "no-cache", "X-Catalogue-Version": str(version)}
+
+
+class MenuCatalogue:
+    """
+    Версійований каталог меню для GET /products/.
+
+    - Версія (catalogue_versions) збільшується bump() в тій самій транзакції, що й зміна товару, варіанту,
+      техкарти, категорії чи групи процесів — тож її бачать усі процеси API одразу після коміту.
+    - Знімок будується один раз на версію: повний граф schemas.Product одним набором eager-запитів,
+      серіалізований orjson у байти. Кожен наступний запит — один SELECT версії і готові байти (або 304).
+    - Залишки у знімок не входять: їх віддає легкий stock() (GET /products/stock), фронтенд накладає їх сам.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self.builds = 0
+        self.hits = 0
+        self.not_modified = 0
+
+    @staticmethod
+    def version(db: Session) -> int:
+        return db.query(V.version).filter(V.id == 1).scalar() or 0
+
+    @staticmethod
+    def bump(db: Session):
+        """Збільшує версію каталогу в транзакції сесії (комітить викликач разом зі своєю зміною)"""
+        stmt = upsert(db, V).values(id=1, version=1)
+        db.execute(stmt.on_conflict_do_update(index_elements=[V.id], set_={"version": V.version + 1}))
+
+    def get(self, db: Session) -> CatalogueSnapshot:
+        # Спочатку версія, потім дані: знімок може бути новішим за свою версію, але ніколи не старішим
+        version = self.version(db)
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == version:
+            self.hits += 1
+            return snapshot
+
+        with self._lock:
+            # Поки чекали на блокування, знімок цієї версії міг зібрати інший запит
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.version == version:
+                self.hits += 1
+                return snapshot
+            body, count = self.build(db)
+            snapshot = CatalogueSnapshot(version, body, count)
+            self._snapshot = snapshot
+            self.builds += 1
+        print(f"📖 [Catalogue] Зібрано знімок каталогу v{version}: товарів {count}, {len(body)} байт")
+        return snapshot
+
+    @staticmethod
+    def build(db: Session):
+        """Повний каталог без залишків → (JSON-байти, кількість товарів)"""
+        # Окрема сесія лише для читання: значення за замовчуванням і назви-заглушки ставляться
+        # на її об'єкти і зникають разом із нею, а не потрапляють у flush сесії запиту
+        with Session(bind=db.get_bind(), autoflush=False) as scratch:
+            products = scratch.query(models.Product).options(
+                joinedload(models.Product.category),
+                joinedload(models.Product.master_recipe).selectinload(models.MasterRecipe.items),
+                selectinload(models.Product.variants).selectinload(models.ProductVariant.consumables),
+                selectinload(models.Product.variants).selectinload(models.ProductVariant.ingredients),
+                selectinload(models.Product.variants).joinedload(models.ProductVariant.master_recipe)
+                    .selectinload(models.MasterRecipe.items),
+                selectinload(models.Product.modifier_groups).selectinload(models.ProductModifierGroup.modifiers),
+                selectinload(models.Product.process_groups).selectinload(models.ProcessGroup.options),
+                selectinload(models.Product.consumables),
+                selectinload(models.Product.ingredients)
+            ).order_by(models.Product.id).all()
+
+            catalogue = []
+            for p in products:
+                if p.price is None: p.price = 0.0
+                if p.output_weight is None: p.output_weight = 0.0
+
+                for c in p.consumables:
+                    c.consumable_name = f"ID Матеріалу: {c.consumable_id}"
+                for i in p.ingredients:
+                    i.ingredient_name = f"ID Інгредієнта: {i.ingredient_id}"
+                if p.master_recipe:
+                    for item in p.master_recipe.items:
+                        item.ingredient_name = f"ID Інгредієнта: {item.ingredient_id}"
+
+                for v in p.variants:
+                    if v.price is None: v.price = 0.0
+                    if v.output_weight is None: v.output_weight = 0.0
+
+                    if v.master_recipe:
+                        for item in v.master_recipe.items:
+                            item.ingredient_name = f"ID Інгредієнта: {item.ingredient_id}"
+                    for vc in v.consumables:
+                        vc.consumable_name = f"ID Матеріалу: {vc.consumable_id}"
+                    for vi in v.ingredients:
+                        vi.ingredient_name = f"ID Інгредієнта: {vi.ingredient_id}"
+
+                # Ті самі ключі, що й у response_model (by_alias), лише без залишків
+                catalogue.append(schemas.Product.model_validate(p).model_dump(mode="json", by_alias=True, exclude=STOCK_FIELDS))
+
+        return orjson.dumps(catalogue), len(catalogue)
+
+    @staticmethod
+    def stock(db: Session) -> dict:
+        """
+        Залишки для накладання на каталог: {"products": {id: к-сть}, "variants": {id: к-сть}}.
+        Варіанти на техкартах (у товарів без власного обліку) — скільки порцій можна продати зараз.
+        """
+        products, variants = {}, {}
+        for product_id, quantity in db.query(models.Product.id, models.Product.stock_quantity):
+            products[product_id] = quantity or 0.0
+
+        try:
+            availability = AvailabilityService.sellable_quantities(db)
+        except Exception:
+            availability = {}
+
+        rows = db.query(
+            models.ProductVariant.id, models.ProductVariant.stock_quantity,
+            models.ProductVariant.master_recipe_id, models.Product.track_stock
+        ).join(models.Product, models.Product.id == models.ProductVariant.product_id)
+        for variant_id, quantity, recipe_id, track_stock in rows:
+            if recipe_id and not track_stock:
+                variants[variant_id] = availability.get(variant_id, 0.0)
+            else:
+                variants[variant_id] = quantity or 0.0
+        return {"products": products, "variants": variants}
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "version": snapshot.version if snapshot else None,
+            "products": snapshot.products if snapshot else 0,
+            "bytes": len(snapshot.body) if snapshot else 0,
+            "builds": self.builds,
+            "hits": self.hits,
+            "not_modified": self.not_modified
+        }
+
+    def clear(self):
+        with self._lock:
+            self._snapshot = None
+
+
+catalogue = MenuCatalogue()
@@ -0,0 +1,49 @@
+# FILE: product_service/services/crm_client.py
+
+import os
+from typing import Optional
+import httpx
+
+CRM_URL = os.getenv("CRM_URL", "http://customer_api:8003")
+CRM_TIMEOUT = float(os.getenv("CRM_TIMEOUT", "3.0"))
+CRM_MAX_CONNECTIONS = int(os.getenv("CRM_MAX_CONNECTIONS", "20"))
+
+
+class CrmClient:
+    """
+    Async-клієнт до CRM (customer_service) для checkout.
+    Один httpx.AsyncClient на процес: keep-alive з'єднання перевикористовуються між чеками,
+    тож запит балансу не платить за TCP-рукостискання щоразу.
+    """
+    _client: Optional[httpx.AsyncClient] = None
+    transport = None  # Підміняється в бенчмарку (імітація CRM без мережі)
+
+    @classmethod
+    def client(cls) -> httpx.AsyncClient:
+        if cls._client is None:
+            cls._client = httpx.AsyncClient(
+                base_url=CRM_URL,
+                timeout=CRM_TIMEOUT,
+                limits=httpx.Limits(max_connections=CRM_MAX_CONNECTIONS, max_keepalive_connections=CRM_MAX_CONNECTIONS),
+                transport=cls.transport,
+            )
+        return cls._client
+
+    @classmethod
+    async def get_bonus_balance(cls, customer_id: int) -> Optional[float]:
+        """Баланс бонусів клієнта або None, якщо CRM відмовив чи недоступний (чек тоді йде без знижки)"""
+        try:
+            response = await cls.client().get(f"/customers/{customer_id}/balance")
+        except httpx.HTTPError as e:
+            print(f"⚠️ [LOYALTY] Сервіс CRM недоступний ({e}). Пробиваємо чек без знижки.")
+            return None
+        if response.status_code != 200:
+            print(f"⚠️ [LOYALTY] Відмова CRM! Статус {response.status_code}. Чек пробивається без знижки.")
+            return None
+        return float(response.json().get("bonus_balance", 0))
+
+    @classmethod
+    async def aclose(cls):
+        if cls._client is not None:
+            await cls._client.aclose()
+            cls._client = None
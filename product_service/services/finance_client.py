@@ -1,71 +1,58 @@
 # FILE: product_service/services/finance_client.py
 
 from sqlalchemy.orm import Session
-# 🔥 Імпортуємо наш новий брокер повідомлень
-from services.rabbitmq_client import rabbitmq
+# 🔥 Події йдуть у RabbitMQ через transactional outbox (релей відправляє їх після commit)
+from services.outbox import Outbox
+from services.rabbitmq_topology import ORDER_PAID, ORDER_REFUNDED, SUPPLY_PAID
 
 class FinanceClient:
     """
     Адаптер для зв'язку між модулем Продажів (Orders) та Фінансами (Finance).
     Тепер працює АСИНХРОННО через RabbitMQ (Event-Driven Architecture).
-    Це робить збереження чека миттєвим і повністю ізолює бази даних.
+    Події записуються в outbox у транзакції викликача — commit робить викликач разом з чеком/накладною.
     """
     
     @staticmethod
-    def register_order_income(db: Session, order_id: int, total_price: float, payment_method: str, user_id: int, customer_id: int = None, bonuses_spent: float = 0.0, use_bonuses: bool = False):
-        """Відправляє подію про новий дохід у черги Фінансів та Лояльності"""
-        try:
-            event_data = {
-                "event_type": "order_paid",
-                "order_id": order_id,
-                "amount": total_price,
-                "payment_method": payment_method,
-                "user_id": user_id,
-                "customer_id": customer_id,
-                "bonuses_spent": bonuses_spent, # Точна сума списання
-                "use_bonuses": use_bonuses      # Прапорець для воркера
-            }
-            
-            # 2. Публікуємо подію в чергу фінансів
-            rabbitmq.publish(queue_name="finance_queue", message=event_data)
-            # Дублюємо подію в чергу лояльності
-            rabbitmq.publish(queue_name="loyalty_queue", message=event_data)
+    def order_paid_event(order_id: int, total_price: float, payment_method: str, user_id: int, customer_id: int = None, bonuses_spent: float = 0.0, use_bonuses: bool = False, bonus_hold_id: str = None) -> dict:
+        """Тіло події 'order_paid' (спільне для синхронного та async checkout)"""
+        return {
+            "event_type": "order_paid",
+            "order_id": order_id,
+            "amount": total_price,
+            "payment_method": payment_method,
+            "user_id": user_id,
+            "customer_id": customer_id,
+            "bonuses_spent": bonuses_spent, # Точна сума списання
+            "use_bonuses": use_bonuses,     # Прапорець для воркера
+            "bonus_hold_id": bonus_hold_id  # Холд у кеші балансу (знімається після обробки лояльністю)
+        }
 
-            print(f"✅ [FinanceClient] Подію 'order_paid' розіслано (списано бонусів: {bonuses_spent})")
-            
-        except Exception as e:
-            # Якщо RabbitMQ впав, каса все одно проб'є чек (надійність!)
-            print(f"⚠️ [FinanceClient] Помилка відправки в RabbitMQ (order_income): {e}")
+    @staticmethod
+    def register_order_income(db: Session, order_id: int, total_price: float, payment_method: str, user_id: int, customer_id: int = None, bonuses_spent: float = 0.0, use_bonuses: bool = False, bonus_hold_id: str = None):
+        """Ставить подію про новий дохід (через outbox). Одна публікація: exchange доставить її і Фінансам, і Лояльності"""
+        event_data = FinanceClient.order_paid_event(
+            order_id, total_price, payment_method, user_id, customer_id, bonuses_spent, use_bonuses, bonus_hold_id
+        )
+        Outbox.add(db, ORDER_PAID, event_data)
 
     @staticmethod
     def register_supply_expense(db: Session, supply_id: int, total_cost: float, account_id: int, user_id: int):
-        """Відправляє подію про нові витрати на закупівлю у чергу"""
-        try:
-            # 1. Формуємо "тіло" повідомлення
-            event_data = {
-                "event_type": "supply_paid",
-                "supply_id": supply_id,
-                "amount": total_cost,
-                "account_id": account_id,
-                "user_id": user_id
-            }
-            
-            # 2. Публікуємо подію
-            rabbitmq.publish(queue_name="finance_queue", message=event_data)
-            
-        except Exception as e:
-            print(f"⚠️ [FinanceClient] Помилка відправки в RabbitMQ (supply_expense): {e}")
+        """Ставить подію про нові витрати на закупівлю для фінансів (через outbox)"""
+        Outbox.add(db, SUPPLY_PAID, {
+            "event_type": "supply_paid",
+            "supply_id": supply_id,
+            "amount": total_cost,
+            "account_id": account_id,
+            "user_id": user_id
+        })
 
     @staticmethod
-    def register_order_refund(order_id: int, amount: float, payment_method: str):
-        """Відправляє подію про скасування чека та повернення коштів"""
-        try:
-            event_data = {
-                "event_type": "order_refunded",
-                "order_id": order_id,
-                "amount": amount,
-                "payment_method": payment_method
-            }
-            rabbitmq.publish(queue_name="finance_queue", message=event_data)
-        except Exception as e:
-            print(f"⚠️ [FinanceClient] Помилка відправки в RabbitMQ (refund): {e}")
\ No newline at end of file
+    def register_order_refund(db: Session, order_id: int, amount: float, payment_method: str, customer_id: int = None):
+        """Ставить подію про скасування чека та повернення коштів (через outbox); лояльність скидає підсумки клієнта"""
+        Outbox.add(db, ORDER_REFUNDED, {
+            "event_type": "order_refunded",
+            "order_id": order_id,
+            "amount": amount,
+            "payment_method": payment_method,
+            "customer_id": customer_id
+        })
@@ -1,31 +1,72 @@
+from sqlalchemy import event, insert
 from sqlalchemy.orm import Session
 from datetime import datetime
 import models
 
+# Ключ у session.info, під яким живе буфер рядків журналу поточної транзакції
+LEDGER_BUFFER_KEY = "inventory_ledger"
+
 class InventoryLogger:
+    """
+    Буферизований журнал руху складу (InventoryTransaction).
+    log() не створює ORM-об'єкт, а лише додає рядок у буфер сесії; весь буфер записується
+    ОДНИМ пакетним INSERT (executemany) безпосередньо перед commit. Відкат транзакції очищує буфер.
+    """
+
     @staticmethod
     def log(db: Session, entity_type: str, entity_id: int, entity_name: str,
-            balance_before: float, balance_after: float, reason: str, 
+            balance_before: float, balance_after: float, reason: str,
             force_change: float = None): # 🔥 Додаємо опціональний параметр
         try:
             # Якщо передано явну зміну (наприклад, продаж), використовуємо її
             # Якщо ні - вираховуємо автоматично
             change_amount = force_change if force_change is not None else (balance_after - balance_before)
 
-            # Тепер ми ігноруємо запис ТІЛЬКИ якщо зміна дійсно нульова 
+            # Тепер ми ігноруємо запис ТІЛЬКИ якщо зміна дійсно нульова
             # і ми не намагаємось зафіксувати продаж
             if change_amount == 0 and force_change is None:
                 return
 
-            transaction = models.InventoryTransaction(
-                entity_type=entity_type,
-                entity_id=entity_id,
-                entity_name=entity_name,
-                change_amount=change_amount, # Запишеться напр. -2
-                balance_after=balance_after,
-                reason=reason,
-                created_at=datetime.utcnow(),
-            )
-            db.add(transaction)
+            buffer = db.info.get(LEDGER_BUFFER_KEY)
+            if buffer is None:
+                # Прив'язуємо буфер до транзакції сесії: rollback() до першого SQL-запиту теж має його відкинути
+                db.connection()
+                buffer = db.info[LEDGER_BUFFER_KEY] = []
+            buffer.append({
+                "entity_type": entity_type,
+                "entity_id": entity_id,
+                "entity_name": entity_name,
+                "change_amount": change_amount, # Запишеться напр. -2
+                "balance_after": balance_after,
+                "reason": reason,
+                "created_at": datetime.utcnow(),
+            })
         except Exception as e:
-            print(f"⚠️ Помилка логування складу: {e}")
\ No newline at end of file
+            print(f"⚠️ Помилка логування складу: {e}")
+
+    @staticmethod
+    def pending(db: Session) -> int:
+        """Скільки рядків журналу чекає на запис у поточній транзакції"""
+        return len(db.info.get(LEDGER_BUFFER_KEY, ()))
+
+    @staticmethod
+    def flush(db: Session):
+        """Записує буфер одним INSERT. Викликається автоматично перед commit, вручну — якщо журнал треба прочитати до коміту"""
+        rows = db.info.pop(LEDGER_BUFFER_KEY, None)
+        if rows:
+            db.execute(insert(models.InventoryTransaction.__table__), rows)
+
+    @staticmethod
+    def discard(db: Session):
+        db.info.pop(LEDGER_BUFFER_KEY, None)
+
+
+@event.listens_for(Session, "before_commit")
+def _write_ledger_before_commit(session):
+    InventoryLogger.flush(session)
+
+@event.listens_for(Session, "after_transaction_end")
+def _drop_ledger_after_transaction(session, transaction):
+    # Після commit буфер вже порожній; після rollback/close — рядки відкинутої транзакції не мають "воскреснути"
+    if transaction.parent is None:
+        InventoryLogger.discard(session)
@@ -0,0 +1,101 @@
+# FILE: product_service/services/inventory_replica.py
+
+import os
+import threading
+import time
+import requests
+
+INVENTORY_URL = os.getenv("INVENTORY_URL", "http://inventory_api:8004")
+INVENTORY_SYNC_INTERVAL = float(os.getenv("INVENTORY_SYNC_INTERVAL", "1"))  # Не частіше ніж раз на N сек
+INVENTORY_SYNC_TIMEOUT = float(os.getenv("INVENTORY_SYNC_TIMEOUT", "2"))
+
+
+class InventoryReplica:
+    """
+    Локальна копія залишків складу (інгредієнти, матеріали) для калькулятора доступності.
+
+    Замість двох повних списків /ingredients/ і /consumables/ на кожен розрахунок —
+    стрічка змін /inventory/changes?since=<курсор>: повне завантаження один раз, далі лише рядки,
+    змінені після курсора, і видалені позиції. Сторінки застосовуються до копії словників, яка
+    підміняє робочу лише після успішної синхронізації.
+    Якщо склад недоступний — віддаємо останню синхронізовану копію (порожню, якщо її ще не було).
+    """
+
+    def __init__(self, base_url: str = INVENTORY_URL, interval: float = INVENTORY_SYNC_INTERVAL):
+        self.base_url = base_url
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._cursor = None
+        self._stocks = {"ingredient": {}, "consumable": {}}
+        self._checked_at = float("-inf")
+        self.syncs = 0
+        self.full_syncs = 0
+        self.rows_applied = 0
+        self.errors = 0
+
+    def stocks(self):
+        """(ing_stock, con_stock) — {id: залишок}; синхронізується, якщо копія старша за interval"""
+        with self._lock:
+            # Невдала спроба теж рахується: недоступний склад не смикаємо на кожен розрахунок
+            if time.monotonic() - self._checked_at >= self.interval:
+                self._checked_at = time.monotonic()
+                try:
+                    self._sync()
+                except Exception as e:
+                    self.errors += 1
+                    print(f"⚠️ [Inventory Replica] Не вдалося синхронізувати залишки зі складу: {e}")
+            return dict(self._stocks["ingredient"]), dict(self._stocks["consumable"])
+
+    def _fetch(self, since):
+        params = {} if since is None else {"since": since}
+        response = requests.get(f"{self.base_url}/inventory/changes", params=params, timeout=INVENTORY_SYNC_TIMEOUT)
+        response.raise_for_status()
+        return response.json()
+
+    def _sync(self):
+        since = self._cursor
+        stocks = {kind: dict(rows) for kind, rows in self._stocks.items()}
+        while True:
+            data = self._fetch(since)
+            if since is not None and data["latest"] < since:
+                # Склад перестворено — курсор більше нічого не означає, починаємо з повного завантаження
+                since = None
+                continue
+            if since is None:
+                stocks = {"ingredient": {}, "consumable": {}}
+                self.full_syncs += 1
+
+            for kind, key in (("ingredient", "ingredients"), ("consumable", "consumables")):
+                for row in data[key]:
+                    stocks[kind][row["id"]] = row.get("stock_quantity") or 0
+                    self.rows_applied += 1
+            for deleted in data["deleted"]:
+                stocks.get(deleted["entity_type"], {}).pop(deleted["id"], None)
+
+            since = data["next"]  # Наступні сторінки (і повного завантаження теж) — вже з курсором
+            if not data["has_more"]:
+                break
+
+        self._stocks = stocks
+        self._cursor = since
+        self.syncs += 1
+
+    def stats(self) -> dict:
+        return {
+            "cursor": self._cursor,
+            "ingredients": len(self._stocks["ingredient"]),
+            "consumables": len(self._stocks["consumable"]),
+            "syncs": self.syncs,
+            "full_syncs": self.full_syncs,
+            "rows_applied": self.rows_applied,
+            "errors": self.errors
+        }
+
+    def clear(self):
+        with self._lock:
+            self._cursor = None
+            self._stocks = {"ingredient": {}, "consumable": {}}
+            self._checked_at = float("-inf")
+
+
+inventory_replica = InventoryReplica()
@@ -0,0 +1,189 @@
+# FILE: product_service/services/order_feed.py
+
+import base64
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional
+from fastapi import HTTPException
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Query, Session, selectinload
+import models
+
+ORDERS_MAX_LIMIT = 100
+# Скільки живе оцінка кількості чеків (на ключ фільтрів). Точне число сторінок касі не потрібне
+ORDER_COUNT_TTL = float(os.getenv("ORDER_COUNT_TTL", "60"))
+ORDER_COUNT_CACHE_SIZE = int(os.getenv("ORDER_COUNT_CACHE_SIZE", "256"))  # Межа ключів (фільтри — довільні дати)
+
+O = models.Order
+I = models.OrderItem
+# Проєкція для міжсервісної історії клієнта: лише те, що показує картка клієнта
+HISTORY_COLUMNS = (O.id, O.created_at, O.total_price, O.payment_method, O.bonuses_spent)
+HISTORY_ITEM_COLUMNS = (I.order_id, I.id, I.product_name, I.quantity, I.price_at_moment, I.details)
+
+
+class OrderFeed:
+    """
+    Стрічка чеків з keyset-пагінацією по (created_at, id), найновіші зверху.
+    - Жодного OFFSET: кожна сторінка — діапазон по індексу, однаково швидкий на першій і на тисячній сторінці.
+    - Позиції (items) підтягуються ОДНИМ запитом WHERE order_id IN (...) на всю сторінку, а не по запиту на чек.
+    - Загальна кількість — лише на запит (with_total) і лише оцінкою: план запиту Postgres
+      (без сканування таблиці), кешована на ORDER_COUNT_TTL секунд для кожного набору фільтрів
+      (LRU на ORDER_COUNT_CACHE_SIZE ключів; протухлі ключі прибираються при кожному записі).
+    """
+    _count_cache = OrderedDict()  # {ключ фільтрів: (expires_at, total, is_estimate)}
+    _count_lock = threading.Lock()
+
+    @staticmethod
+    def encode_cursor(created_at: datetime, row_id: int) -> str:
+        raw = f"{created_at.isoformat()}|{row_id}".encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str):
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+            created_at, row_id = raw.rsplit("|", 1)
+            return datetime.fromisoformat(created_at), int(row_id)
+        except (ValueError, UnicodeDecodeError):
+            raise HTTPException(status_code=400, detail="Некоректний курсор пагінації")
+
+    @staticmethod
+    def apply_filters(query: Query, date_from: datetime = None, date_to: datetime = None,
+                      payment_method: str = None, customer_id: int = None) -> Query:
+        """Діапазон дат [date_from, date_to), спосіб оплати, клієнт — кожен фільтр має свій складений індекс"""
+        if date_from:
+            query = query.filter(O.created_at >= date_from)
+        if date_to:
+            query = query.filter(O.created_at < date_to)
+        if payment_method:
+            query = query.filter(O.payment_method == payment_method)
+        if customer_id is not None:
+            query = query.filter(O.customer_id == customer_id)
+        return query
+
+    @staticmethod
+    def keyset(query: Query, cursor: str = None) -> Query:
+        """Рядки після курсора, найновіші зверху"""
+        if cursor:
+            c_created_at, c_id = OrderFeed.decode_cursor(cursor)
+            # (created_at, id) < (c_created_at, c_id) — розгорнуто для будь-якого діалекту
+            query = query.filter(or_(
+                O.created_at < c_created_at,
+                and_(O.created_at == c_created_at, O.id < c_id)
+            ))
+        return query.order_by(O.created_at.desc(), O.id.desc())
+
+    @staticmethod
+    def page(query: Query, cursor: str = None, limit: int = 20):
+        """
+        Повертає (чеки сторінки з позиціями, курсор наступної сторінки або None).
+        query — запит з уже накладеними фільтрами (без сортування).
+        """
+        # +1 рядок: чи є наступна сторінка, без COUNT
+        orders = OrderFeed.keyset(query, cursor)\
+            .options(selectinload(O.items), selectinload(O.customer))\
+            .limit(limit + 1).all()
+        next_cursor = None
+        if len(orders) > limit:
+            orders = orders[:limit]
+            next_cursor = OrderFeed.encode_cursor(orders[-1].created_at, orders[-1].id)
+        return orders, next_cursor
+
+    @staticmethod
+    def customer_history(db: Session, customer_id: int, cursor: str = None, limit: int = 20):
+        """
+        Сторінка історії клієнта для customer_service: (список dict-ів чеків з позиціями, курсор або None).
+        Лише потрібні колонки (без ORM-об'єктів), позиції — одним запитом WHERE order_id IN (...).
+        """
+        query = db.query(*HISTORY_COLUMNS).filter(O.customer_id == customer_id)
+        rows = OrderFeed.keyset(query, cursor).limit(limit + 1).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = OrderFeed.encode_cursor(rows[-1].created_at, rows[-1].id)
+
+        items_by_order = {row.id: [] for row in rows}
+        if items_by_order:
+            item_rows = db.query(*HISTORY_ITEM_COLUMNS)\
+                .filter(I.order_id.in_(list(items_by_order)))\
+                .order_by(I.order_id, I.id).all()
+            for item in item_rows:
+                items_by_order[item.order_id].append({
+                    "id": item.id,
+                    "product_name": item.product_name,
+                    "quantity": item.quantity,
+                    "price_at_moment": item.price_at_moment,
+                    "details": item.details,
+                })
+
+        orders = [{
+            "id": row.id,
+            "created_at": row.created_at.isoformat() if row.created_at else None,
+            "total_price": row.total_price,
+            "payment_method": row.payment_method,
+            "bonuses_spent": float(row.bonuses_spent or 0),
+            "items": items_by_order[row.id],
+        } for row in rows]
+        return orders, next_cursor
+
+    @staticmethod
+    def customer_summary(db: Session, customer_id: int) -> dict:
+        """Підсумки клієнта одним агрегатом по ix_orders_customer_created: візити, сума покупок, останній візит"""
+        visits, total_spent, last_visit = db.query(
+            func.count(O.id), func.coalesce(func.sum(O.total_price), 0), func.max(O.created_at)
+        ).filter(O.customer_id == customer_id).one()
+        return {
+            "visits": visits,
+            "total_spent": round(float(total_spent), 2),
+            "average_check": round(float(total_spent) / visits, 2) if visits else 0.0,
+            "last_visit": last_visit.isoformat() if last_visit else None,
+        }
+
+    @staticmethod
+    def _planner_estimate(db: Session, query: Query) -> Optional[int]:
+        """Оцінка кількості рядків з плану Postgres (EXPLAIN не виконує запит). None — не Postgres"""
+        bind = db.get_bind()
+        if bind.dialect.name != "postgresql":
+            return None
+        statement = query.with_entities(O.id).statement
+        sql = str(statement.compile(dialect=bind.dialect, compile_kwargs={"literal_binds": True}))
+        plan = db.connection().exec_driver_sql("EXPLAIN (FORMAT JSON) " + sql).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    @classmethod
+    def estimate_total(cls, db: Session, query: Query, filters_key: tuple):
+        """
+        Кількість чеків під фільтрами → (total, is_estimate): з кешу, інакше з плану Postgres (оцінка).
+        На інших БД (SQLite у тестах) — точний COUNT (is_estimate=False), теж кешований.
+        """
+        now = time.monotonic()
+        with cls._count_lock:
+            cached = cls._count_cache.get(filters_key)
+            if cached and cached[0] > now:
+                cls._count_cache.move_to_end(filters_key)
+                return cached[1], cached[2]
+
+        total = cls._planner_estimate(db, query)
+        is_estimate = total is not None
+        if total is None:
+            total = query.order_by(None).count()
+
+        with cls._count_lock:
+            for key in [key for key, entry in cls._count_cache.items() if entry[0] <= now]:
+                del cls._count_cache[key]
+            cls._count_cache[filters_key] = (now + ORDER_COUNT_TTL, total, is_estimate)
+            cls._count_cache.move_to_end(filters_key)
+            while len(cls._count_cache) > ORDER_COUNT_CACHE_SIZE:
+                cls._count_cache.popitem(last=False)
+        return total, is_estimate
+
+    @classmethod
+    def clear_cache(cls):
+        with cls._count_lock:
+            cls._count_cache.clear()
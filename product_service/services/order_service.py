@@ -3,7 +3,11 @@
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
 from datetime import datetime
+import asyncio
+import uuid
+import redis
 import requests # 🔥 ДОДАНО ДЛЯ HTTP-ЗАПИТІВ ДО ІНШИХ МІКРОСЕРВІСІВ
+import database
 import models
 import schemas
 import traceback
@@ -11,9 +15,101 @@ import traceback
 # Імпортуємо Клієнти-Адаптери
 from services.inventory_client import InventoryClient 
 from services.finance_client import FinanceClient
+from services.crm_client import CrmClient, CRM_URL
+from services.bonus_cache import BonusCache
 
 class OrderService:
 
+    @staticmethod
+    def _queue_order_events(db: Session, order: models.Order, items: list, use_bonuses: bool, bonus_hold_id: str = None):
+        """Списання складу (BoM) і дохід/бонуси чека — в outbox поточної транзакції"""
+        InventoryClient.deduct_stock_async(db, order.id, f"sale_order_{order.id}", items)
+        FinanceClient.register_order_income(
+            db=db,
+            order_id=order.id,
+            total_price=order.total_price,
+            payment_method=order.payment_method,
+            user_id=1,
+            customer_id=order.customer_id,
+            bonuses_spent=float(order.bonuses_spent or 0),
+            use_bonuses=use_bonuses,
+            bonus_hold_id=bonus_hold_id
+        )
+
+    @staticmethod
+    def _fetch_crm_balance(customer_id: int):
+        """Синхронний запит балансу в CRM (лише при промаху кешу). None — CRM відмовив чи недоступний"""
+        try:
+            # Звертаємось по внутрішній Docker-мережі до легкого ендпоінту балансу в pos_customer_api
+            response = requests.get(f"{CRM_URL}/customers/{customer_id}/balance", timeout=3.0)
+        except requests.exceptions.RequestException as e:
+            print(f"⚠️ [LOYALTY] Сервіс CRM недоступний ({e}). Пробиваємо чек без знижки.")
+            return None
+        if response.status_code != 200:
+            print(f"⚠️ [LOYALTY] Відмова CRM! Статус {response.status_code}. Чек пробивається без знижки.")
+            return None
+        return float(response.json().get("bonus_balance", 0))
+
+    @staticmethod
+    def reserve_bonuses(customer_id: int, limit: float, hold_id: str, generation: str = None, balance: float = None):
+        """
+        Резервує бонуси під чек через кеш балансу: влучання — без жодного запиту в CRM,
+        промах — один синхронний запит (якщо баланс не передано готовим з async-шляху).
+        Повертає суму холду або None, якщо бонуси зараз списати не можна (чек іде без знижки).
+        """
+        try:
+            reserved = BonusCache.reserve(customer_id, limit, hold_id)
+            if reserved is None:
+                if balance is None:
+                    generation, _ = BonusCache.peek(customer_id)
+                    balance = OrderService._fetch_crm_balance(customer_id)
+                    if balance is None:
+                        return None
+                reserved = BonusCache.reserve(customer_id, limit, hold_id, balance, generation)
+        except redis.RedisError as e:
+            # Без кешу немає й холдів — списання могло б перевищити баланс, тож чек без знижки
+            print(f"⚠️ [LOYALTY] Кеш балансу недоступний ({e}). Пробиваємо чек без знижки.")
+            return None
+        if reserved is None:
+            print(f"⚠️ [LOYALTY] Баланс клієнта #{customer_id} змінився під час перевірки. Чек без знижки.")
+        return reserved
+
+    @staticmethod
+    def get_available_bonuses(customer_id: int):
+        """
+        Вільні бонуси клієнта (баланс CRM − холди незавершених чеків) через той самий кеш.
+        Каса питає це при виборі клієнта — кеш прогрівається, і сам чек уже не йде в CRM.
+        """
+        try:
+            available = BonusCache.available(customer_id)
+            if available is None:
+                generation, _ = BonusCache.peek(customer_id)
+                balance = OrderService._fetch_crm_balance(customer_id)
+                if balance is None:
+                    return None
+                available = BonusCache.available(customer_id, balance, generation)
+        except redis.RedisError as e:
+            print(f"⚠️ [LOYALTY] Кеш балансу недоступний ({e}).")
+            return None
+        return available
+
+    @staticmethod
+    def _order_items(order_id: int, processed_items: list, items: list) -> list:
+        """Рядки чека з вже порахованих позицій (InventoryClient.process_order_items)"""
+        return [
+            models.OrderItem(
+                order_id=order_id,
+                product_id=orig_item.product_id,
+                variant_id=orig_item.variant_id,
+                product_name=p_item["product_name"],
+                quantity=p_item["quantity"],
+                price_at_moment=p_item["price_at_moment"], 
+                details=p_item["details"],
+                consumable_overrides=p_item["consumable_overrides"]
+            )
+            for p_item, orig_item in zip(processed_items, items)
+        ]
+
     @staticmethod
     def cancel_order(db: Session, order_id: int) -> bool:
         """
@@ -27,18 +123,21 @@ class OrderService:
 
             print(f"🔄 [REFUND] Початок скасування чека #{order_id}...")
 
+            # Події повернення йдуть в outbox тієї ж транзакції, що й видалення чека
             FinanceClient.register_order_refund(
+                db=db,
                 order_id=order.id,
                 amount=float(order.total_price),
-                payment_method=order.payment_method
+                payment_method=order.payment_method,
+                customer_id=order.customer_id
             )
 
-            InventoryClient.refund_stock_async(order.id, order.items)
+            InventoryClient.refund_stock_async(db, order.id, order.items)
 
             db.delete(order)
             db.commit()
             
-            print(f"✅ [REFUND] Чек #{order_id} скасовано. RabbitMQ відпрацює повернення на фоні.")
+            print(f"✅ [REFUND] Чек #{order_id} скасовано. Outbox-релей відправить повернення на фоні.")
             return True
 
         except Exception as e:
@@ -49,95 +148,146 @@ class OrderService:
 
     @staticmethod
     def process_checkout(db: Session, order_data: schemas.OrderCreate):
+        """
+        Синхронний checkout (бенчмарки; каса йде через order_worker або process_checkout_async).
+        Як і в async-версії, транзакція не відкрита під час мережевого I/O: спершу ціни (читання закриваємо),
+        потім холд бонусів (Redis, при промаху кешу — запит у CRM), і лише потім транзакція запису чека.
+        """
+        bonus_hold_id = None
         try:
             print(f"🛒 [CHECKOUT] Початок обробки замовлення. Позицій: {len(order_data.items)}")
             bonuses_to_spend = 0.0
+
+            processed_items, total_price = InventoryClient.process_order_items(db, order_data.items, None)
+            db.commit()  # Завершуємо транзакцію читання до запитів у Redis/CRM
+
+            # --- 🔥 БОНУСИ: холд у кеші балансу CRM (запит до CRM лише при промаху кешу) ---
+            if getattr(order_data, 'use_bonuses', False) and order_data.customer_id:
+                bonus_hold_id = uuid.uuid4().hex
+                # Не більше ніж вільний баланс (баланс − холди інших чеків) і не більше ніж сума чека
+                reserved = OrderService.reserve_bonuses(order_data.customer_id, total_price, bonus_hold_id)
+                if reserved is None:
+                    order_data.use_bonuses = False # Скасовуємо списання
+                    bonus_hold_id = None
+                else:
+                    bonuses_to_spend = reserved
+                    total_price -= bonuses_to_spend
+                    print(f"💎 [LOYALTY] Бонуси зарезервовано: {bonuses_to_spend} ₴")
+
+            # Підсумкова сума вже з урахуванням знижки
             new_order = models.Order(
                 created_at=datetime.utcnow(),
                 payment_method=order_data.payment_method,
-                total_price=0, 
+                total_price=round(total_price, 2),
                 customer_id=order_data.customer_id,
                 bonuses_spent=bonuses_to_spend
             )
             db.add(new_order)
             db.flush()
-            
-            transaction_reason = f"sale_order_{new_order.id}"
-
-            processed_items, total_price = InventoryClient.process_order_items(
-                db, order_data.items, transaction_reason
-            )
-
-            # --- 🔥 ПРАВИЛЬНИЙ МІКРОСЕРВІСНИЙ ПІДХІД ДО БОНУСІВ ---
-            
-            if getattr(order_data, 'use_bonuses', False) and order_data.customer_id:
-                try:
-                    # 1. Робимо синхронний HTTP-запит до мікросервісу CRM
-                    # Звертаємось по внутрішній Docker-мережі до контейнера pos_customer_api
-                    crm_url = f"http://customer_api:8003/customers/{order_data.customer_id}"
-                    response = requests.get(crm_url, timeout=3.0)
-                    
-                    if response.status_code == 200:
-                        customer_data = response.json()
-                        available_bonuses = float(customer_data.get("bonus_balance", 0))
-                        
-                        # 2. Розраховуємо скільки РЕАЛЬНО можна списати 
-                        # (не більше ніж баланс і не більше ніж сума чека)
-                        bonuses_to_spend = min(available_bonuses, total_price)
-                        print(f"💎 [LOYALTY] Баланс підтверджено сервісом CRM: {available_bonuses} ₴. Буде списано: {bonuses_to_spend} ₴")
-                        
-                        # 3. Віднімаємо бонуси від підсумкової ціни
-                        total_price -= bonuses_to_spend
-                    else:
-                        print(f"⚠️ [LOYALTY] Відмова CRM! Статус {response.status_code}. Чек пробивається без знижки.")
-                        order_data.use_bonuses = False # Скасовуємо списання
-                except requests.exceptions.RequestException as e:
-                    print(f"⚠️ [LOYALTY] Сервіс CRM недоступний ({e}). Пробиваємо чек без знижки.")
-                    order_data.use_bonuses = False # Скасовуємо списання
 
             # Зберігаємо позиції
-            for p_item, orig_item in zip(processed_items, order_data.items):
-                db.add(models.OrderItem(
-                    order_id=new_order.id,
-                    product_id=orig_item.product_id,
-                    variant_id=orig_item.variant_id,
-                    product_name=p_item["product_name"],
-                    quantity=p_item["quantity"],
-                    price_at_moment=p_item["price_at_moment"], 
-                    details=p_item["details"],
-                    consumable_overrides=p_item["consumable_overrides"]
-                ))
-
-            # Фіксуємо підсумкову суму з урахуванням знижки
-            new_order.total_price = round(total_price, 2)
-            # Перезаписуємо 0 на реальну суму знижки!
-            new_order.bonuses_spent = bonuses_to_spend
+            db.add_all(OrderService._order_items(new_order.id, processed_items, order_data.items))
+
+            # 🔥 Події складу та фінансів — в outbox тієї ж транзакції (use_bonuses — справжнє, перевірене значення)
+            OrderService._queue_order_events(
+                db, new_order, order_data.items, getattr(order_data, 'use_bonuses', False), bonus_hold_id
+            )
             
             db.commit()
+            bonus_hold_id = None  # Чек закомічено: холд тепер знімає лояльність за подією order.paid
             db.refresh(new_order)
             
-            InventoryClient.deduct_stock_async(new_order.id, transaction_reason, order_data.items)
-            
-            # 🔥 Передаємо use_bonuses (справжнє значення, яке ми перевірили)
-            FinanceClient.register_order_income(
-                db=db,
-                order_id=new_order.id,
-                total_price=new_order.total_price,
-                payment_method=order_data.payment_method,
-                user_id=1, 
-                customer_id=order_data.customer_id,
-                bonuses_spent=bonuses_to_spend,
-                use_bonuses=getattr(order_data, 'use_bonuses', False)
-                
-            )
-            
             print(f"✅ [CHECKOUT] Замовлення #{new_order.id} успішно створено! До сплати: {new_order.total_price}")
             return new_order
 
         except HTTPException as http_ex:
             db.rollback()
+            if bonus_hold_id:
+                BonusCache.release(order_data.customer_id, bonus_hold_id)
             raise http_ex
         except Exception as e:
             db.rollback()
+            if bonus_hold_id:
+                BonusCache.release(order_data.customer_id, bonus_hold_id)
             print(traceback.format_exc())
-            raise HTTPException(status_code=500, detail="Помилка обробки замовлення.")
\ No newline at end of file
+            raise HTTPException(status_code=500, detail="Помилка обробки замовлення.")
+
+    @staticmethod
+    async def process_checkout_async(order_data: schemas.OrderCreate, session_factory=None):
+        """
+        Async checkout. Жодна транзакція БД не відкрита під час мережевого I/O:
+        1. Ціни позицій (коротка сесія лише на читання); якщо балансу бонусів немає в кеші — паралельно запит у CRM.
+           Бонуси резервуються холдом у кеші (Redis, суб-мілісекундний виклик), тож більшість чеків CRM не чекає.
+        2. Чек і позиції — окрема коротка транзакція запису, лише після резервування бонусів.
+           У ній же BoM зі (здебільшого закешованих) техкарт і події складу/фінансів/лояльності
+           пишуться в outbox — RabbitMQ чек не чекає, події відправить релей.
+        """
+        session_factory = session_factory or database.AsyncSessionLocal
+        print(f"🛒 [CHECKOUT] Початок обробки замовлення. Позицій: {len(order_data.items)}")
+
+        use_bonuses = bool(getattr(order_data, 'use_bonuses', False) and order_data.customer_id)
+        bonus_hold_id = uuid.uuid4().hex if use_bonuses else None
+        generation, crm_task = None, None
+        if use_bonuses:
+            try:
+                generation, cached = BonusCache.peek(order_data.customer_id)
+            except redis.RedisError as e:
+                print(f"⚠️ [LOYALTY] Кеш балансу недоступний ({e}). Пробиваємо чек без знижки.")
+                use_bonuses, cached = False, True
+            if not cached:
+                crm_task = asyncio.ensure_future(CrmClient.get_bonus_balance(order_data.customer_id))
+
+        # 1. Ціни та назви позицій — та сама синхронна логіка, виконана всередині async-сесії
+        try:
+            async with session_factory() as session:
+                processed_items, total_price = await session.run_sync(
+                    InventoryClient.process_order_items, order_data.items, None
+                )
+        except BaseException:
+            if crm_task:
+                crm_task.cancel()
+            raise
+
+        # --- БОНУСИ: холд у кеші балансу (баланс з CRM — лише якщо його не було в кеші) ---
+        bonuses_to_spend = 0.0
+        if use_bonuses:
+            balance = await crm_task if crm_task else None
+            reserved = None
+            if not crm_task or balance is not None:
+                # Не більше ніж вільний баланс (баланс − холди інших чеків) і не більше ніж сума чека.
+                # У потоці: Redis — синхронний клієнт, а якщо кеш протух після peek, буде ще й запит у CRM
+                reserved = await asyncio.to_thread(
+                    OrderService.reserve_bonuses, order_data.customer_id, total_price, bonus_hold_id, generation, balance
+                )
+            if reserved is None:
+                use_bonuses, bonus_hold_id = False, None # Скасовуємо списання
+            else:
+                bonuses_to_spend = reserved
+                total_price -= bonuses_to_spend
+                print(f"💎 [LOYALTY] Бонуси зарезервовано: {bonuses_to_spend} ₴")
+
+        # 2. Коротка транзакція запису (без мережевих викликів усередині)
+        try:
+            async with session_factory() as session:
+                async with session.begin():
+                    new_order = models.Order(
+                        created_at=datetime.utcnow(),
+                        payment_method=order_data.payment_method,
+                        total_price=round(total_price, 2),
+                        customer_id=order_data.customer_id,
+                        bonuses_spent=bonuses_to_spend
+                    )
+                    session.add(new_order)
+                    await session.flush()
+                    session.add_all(OrderService._order_items(new_order.id, processed_items, order_data.items))
+                    await session.run_sync(
+                        OrderService._queue_order_events, new_order, order_data.items, use_bonuses, bonus_hold_id
+                    )
+        except Exception:
+            if bonus_hold_id:
+                BonusCache.release(order_data.customer_id, bonus_hold_id)
+            print(traceback.format_exc())
+            raise HTTPException(status_code=500, detail="Помилка обробки замовлення.")
+
+        print(f"✅ [CHECKOUT] Замовлення #{new_order.id} успішно створено! До сплати: {new_order.total_price}")
+        return new_order
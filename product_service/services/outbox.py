@@ -0,0 +1,81 @@
+# FILE: product_service/services/outbox.py
+
+import os
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+import models
+
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+OUTBOX_RETENTION_HOURS = float(os.getenv("OUTBOX_RETENTION_HOURS", "24"))  # Скільки тримаємо вже відправлені рядки
+
+E = models.OutboxEvent
+
+
+class Outbox:
+    """
+    Transactional outbox. Доменна подія для RabbitMQ записується рядком у ту саму транзакцію, що й чек/накладна:
+    або є і чек, і подія, або немає нічого. Відправляє їх окремий процес-релей (outbox_relay.py)
+    пачками з одним підтвердженням брокера на пачку, тож HTTP-запит ніколи не чекає на брокер
+    і не втрачає подію при його збої.
+    Доставка "щонайменше один раз": якщо релей впаде між confirm і позначкою sent_at, подія піде повторно.
+    """
+
+    @staticmethod
+    def add(db: Session, routing_key: str, message: dict):
+        """Додає подію в поточну транзакцію (commit робить викликач разом з основними даними)"""
+        db.add(E(routing_key=routing_key, payload=message))
+
+    @staticmethod
+    def relay_batch(db: Session, publisher, batch_size: int = OUTBOX_BATCH_SIZE) -> int:
+        """
+        Відправляє до batch_size найстаріших невідправлених подій однією пачкою і позначає їх відправленими.
+        Брокер підтверджує всю пачку разом (publish_events), тож пачка або підтверджена вся, або ні:
+        при помилці жоден рядок не позначається, у всіх збільшується attempts, виняток пробрасується.
+        Повертає кількість відправлених подій.
+        """
+        # SKIP LOCKED: кілька релеїв не візьмуть ті самі рядки (SQLite ігнорує FOR UPDATE)
+        rows = db.query(E.id, E.routing_key, E.payload)\
+            .filter(E.sent_at.is_(None))\
+            .order_by(E.id)\
+            .limit(batch_size)\
+            .with_for_update(skip_locked=True)\
+            .all()
+        if not rows:
+            db.commit()
+            return 0
+
+        ids = [row.id for row in rows]
+        try:
+            # Одна публікація на подію (копії по чергах робить exchange), один confirm на пачку
+            publisher.publish_events([(row.routing_key, row.payload) for row in rows])
+        except Exception as e:
+            db.query(E).filter(E.id.in_(ids)).update(
+                {E.attempts: E.attempts + 1, E.last_error: str(e)[:500]}, synchronize_session=False
+            )
+            db.commit()
+            raise
+        db.query(E).filter(E.id.in_(ids)).update({E.sent_at: datetime.utcnow()}, synchronize_session=False)
+        db.commit()
+        return len(ids)
+
+    @staticmethod
+    def cleanup(db: Session, retention_hours: float = OUTBOX_RETENTION_HOURS) -> int:
+        """Видаляє відправлені події, старші за retention_hours"""
+        border = datetime.utcnow() - timedelta(hours=retention_hours)
+        deleted = db.query(E).filter(E.sent_at.isnot(None), E.sent_at < border).delete(synchronize_session=False)
+        db.commit()
+        return deleted
+
+    @staticmethod
+    def stats(db: Session) -> dict:
+        """Глибина outbox і вік найстарішої невідправленої події (відставання релею від транзакцій)"""
+        pending, oldest, retrying = db.query(
+            func.count(E.id), func.min(E.created_at), func.count(E.id).filter(E.attempts > 0)
+        ).filter(E.sent_at.is_(None)).one()
+        lag = (datetime.utcnow() - oldest).total_seconds() if oldest else 0.0
+        return {
+            "pending": pending,
+            "retrying": retrying,
+            "oldest_pending_age_sec": round(lag, 3),
+        }
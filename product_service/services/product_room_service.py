@@ -3,6 +3,7 @@
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
 import models
+from services.catalogue import catalogue
 
 class ProductRoomService:
     @staticmethod
@@ -25,6 +26,7 @@ class ProductRoomService:
             )
 
         product.room_id = room_id
+        catalogue.bump(db)
         db.commit()
         return {"message": f"Товар '{product.name}' успішно додано до кімнати '{room.name}'"}
 
@@ -35,5 +37,6 @@ class ProductRoomService:
             raise HTTPException(status_code=404, detail="Товар не знайдено в цій кімнаті")
         
         product.room_id = None
+        catalogue.bump(db)
         db.commit()
         return {"message": f"Товар '{product.name}' видалено з кімнати"}
\ No newline at end of file
@@ -4,6 +4,9 @@ from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException
 import models
 import schemas
+from services.bom_service import BomService
+from services.bom_cache import bom_cache
+from services.catalogue import catalogue
 
 class ProductService:
     """
@@ -13,34 +16,34 @@ class ProductService:
 
     @staticmethod
     def calculate_product_cost(db: Session, data: schemas.ProductCostCheck) -> float:
-        total_cost = 0.0
+        # Збираємо потрібну кількість кожної сировини, а ціни тягнемо ОДНИМ запитом на тип
+        ing_needs = {}
+        cons_needs = {}
 
         # 1. Прямі інгредієнти
         for link in data.ingredients:
-            ing = db.query(models.Ingredient).filter(models.Ingredient.id == link.ingredient_id).first()
-            if ing:
-                total_cost += ing.cost_per_unit * link.quantity
+            ing_needs[link.ingredient_id] = ing_needs.get(link.ingredient_id, 0) + link.quantity
 
         # 2. Витратні матеріали
         for link in data.consumables:
-            cons = db.query(models.Consumable).filter(models.Consumable.id == link.consumable_id).first()
-            if cons:
-                total_cost += cons.cost_per_unit * link.quantity
+            cons_needs[link.consumable_id] = cons_needs.get(link.consumable_id, 0) + link.quantity
 
-        # 3. Рецепт (Техкарта)
+        # 3. Рецепт (Техкарта) — позиції беремо з кешу скомпільованих техкарт
         if data.master_recipe_id:
-            recipe = db.query(models.MasterRecipe).filter(models.MasterRecipe.id == data.master_recipe_id).first()
-            if recipe:
-                for item in recipe.items:
-                    if item.ingredient:
-                        # Логіка: Якщо в рецепті %, беремо від ваги виходу. Якщо ні - пряма кількість.
-                        qty = 0
-                        if item.is_percentage:
-                            qty = (item.quantity / 100) * (data.output_weight or 0)
-                        else:
-                            qty = item.quantity
-                        
-                        total_cost += item.ingredient.cost_per_unit * qty
+            for ingredient_id, quantity, is_percentage in BomService.compiled_recipe(db, data.master_recipe_id):
+                # Логіка: Якщо в рецепті %, беремо від ваги виходу. Якщо ні - пряма кількість.
+                qty = (quantity / 100) * (data.output_weight or 0) if is_percentage else quantity
+                ing_needs[ingredient_id] = ing_needs.get(ingredient_id, 0) + qty
+
+        total_cost = 0.0
+        if ing_needs:
+            for ing_id, cost in db.query(models.Ingredient.id, models.Ingredient.cost_per_unit)\
+                    .filter(models.Ingredient.id.in_(list(ing_needs))).all():
+                total_cost += (cost or 0.0) * ing_needs[ing_id]
+        if cons_needs:
+            for cons_id, cost in db.query(models.Consumable.id, models.Consumable.cost_per_unit)\
+                    .filter(models.Consumable.id.in_(list(cons_needs))).all():
+                total_cost += (cost or 0.0) * cons_needs[cons_id]
 
         return round(total_cost, 2)
 
@@ -49,10 +52,10 @@ class ProductService:
     @staticmethod
     def calculate_max_possible_stock(db, variant_id: int, ing_stock: dict = None, con_stock: dict = None) -> float:
         import math
-        import models
         
-        variant = db.query(models.ProductVariant).filter(models.ProductVariant.id == variant_id).first()
-        if not variant: return 0.0
+        # Плаский вектор сировини на 1 порцію з кешу скомпільованих BoM
+        compiled = BomService.compiled_variant(db, variant_id)
+        if not compiled: return 0.0
 
         # Якщо словники не передали (наприклад, одиночний виклик), стягуємо їх зі складу
         if ing_stock is None or con_stock is None:
@@ -60,32 +63,14 @@ class ProductService:
             ing_stock, con_stock = InventoryClient.get_all_stocks()
 
         max_qty = float('inf')
-        product = variant.product
-        recipe = variant.master_recipe if variant.master_recipe_id else product.master_recipe
-        target_weight = variant.output_weight or product.output_weight or 0.0
 
-        def update_max(req_qty, avail_qty):
-            nonlocal max_qty
+        for ing_id, req_qty in compiled["ingredients"].items():
             if req_qty > 0:
-                max_qty = min(max_qty, avail_qty / req_qty)
-
-        if recipe:
-            for item in recipe.items:
-                req = (item.quantity / 100.0) * target_weight if getattr(item, 'is_percentage', False) else item.quantity
-                avail = ing_stock.get(item.ingredient_id, 0.0)
-                update_max(req, avail)
+                max_qty = min(max_qty, ing_stock.get(ing_id, 0.0) / req_qty)
 
-        for vc in variant.consumables:
-            update_max(vc.quantity, con_stock.get(vc.consumable_id, 0.0))
-            
-        for vi in variant.ingredients:
-            update_max(vi.quantity, ing_stock.get(vi.ingredient_id, 0.0))
-
-        for pc in product.consumables:
-            update_max(pc.quantity, con_stock.get(pc.consumable_id, 0.0))
-
-        for pi in product.ingredients:
-            update_max(pi.quantity, ing_stock.get(pi.ingredient_id, 0.0))
+        for cons_id, req_qty in compiled["consumables"].items():
+            if req_qty > 0:
+                max_qty = min(max_qty, con_stock.get(cons_id, 0.0) / req_qty)
 
         # Округлюємо до меншого цілого (з 5.9 Лате ми можемо продати тільки 5)
         return float(math.floor(max_qty)) if max_qty != float('inf') else 0.0
@@ -186,6 +171,7 @@ class ProductService:
                 if pg:
                     db_product.process_groups.append(pg)
 
+        catalogue.bump(db)
         db.commit()
         db.refresh(db_product)
         return db_product
@@ -319,7 +305,10 @@ class ProductService:
                 if pg:
                     db_product.process_groups.append(pg)
 
+        catalogue.bump(db)
         db.commit()
+        # Техкарта товару могла змінитись — скидаємо скомпільований BoM
+        bom_cache.invalidate_product(product_id)
         db.refresh(db_product)
         return db_product
 
@@ -335,7 +324,9 @@ class ProductService:
             # Коли ми видаляємо ОБ'ЄКТ (а не через query.delete()), 
             # SQLAlchemy запускає каскадне видалення варіантів, інгредієнтів тощо.
             db.delete(product)
+            catalogue.bump(db)
             db.commit()
+            bom_cache.invalidate_product(product_id)
             return True
         except Exception as e:
             db.rollback()
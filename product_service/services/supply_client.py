@@ -1,5 +1,6 @@
 # FILE: product_service/services/supply_client.py
 
+from sqlalchemy import func, select, update, bindparam, text
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
 import models
@@ -11,34 +12,84 @@ class SupplyClient:
     """
 
     @staticmethod
-    def deduct_fifo(db: Session, entity_type: str, entity_id: int, quantity_needed: float) -> float:
+    def deplete_fifo(db: Session, entity_type: str, entity_id: int, quantity_needed: float) -> dict:
+        """
+        Set-based FIFO: одним запитом з віконною сумою (SUM() OVER (ORDER BY id)) вибирає лише ті
+        відкриті партії, які реально потрібні для списання, і оновлює тільки їх.
+        Повертає {
+            "consumed": [{"batch_id", "quantity", "cost_per_unit", "cost"}],  # поштучно по партіях
+            "cost": собівартість списаного,
+            "shortage": скільки не вистачило у партіях
+        }
+        """
+        result = {"consumed": [], "cost": 0.0, "shortage": 0.0}
         if quantity_needed <= 0:
-            return 0.0
+            return result
 
-        batches = db.query(models.SupplyItem).filter(
-            models.SupplyItem.entity_type == entity_type,
-            models.SupplyItem.entity_id == entity_id,
-            models.SupplyItem.remaining_quantity > 0
-        ).order_by(models.SupplyItem.id.asc()).with_for_update().all()
+        db.flush()  # сесії без autoflush: нові партії цієї ж транзакції мають потрапити у вибірку
+        if db.get_bind().dialect.name == "postgresql":
+            # FOR UPDATE не поєднується з віконними функціями, тому серіалізуємо списання
+            # однієї позиції транзакційним advisory-lock (знімається сам на commit/rollback)
+            db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:entity_type), :entity_id)"),
+                       {"entity_type": entity_type, "entity_id": entity_id})
 
-        total_cost_of_deducted = 0.0
-        qty_left_to_deduct = quantity_needed
+        items = models.SupplyItem.__table__
+        open_batches = select(
+            items.c.id,
+            items.c.remaining_quantity,
+            items.c.cost_per_unit,
+            (func.sum(items.c.remaining_quantity).over(order_by=items.c.id) - items.c.remaining_quantity).label("taken_before")
+        ).where(
+            items.c.entity_type == entity_type,
+            items.c.entity_id == entity_id,
+            items.c.remaining_quantity > 0
+        ).subquery()
 
-        for batch in batches:
-            if qty_left_to_deduct <= 0:
-                break
-            take_from_batch = min(batch.remaining_quantity, qty_left_to_deduct)
-            total_cost_of_deducted += take_from_batch * batch.cost_per_unit
-            
-            batch.remaining_quantity -= take_from_batch
+        # Партії, до яких черга списання дійде: все, що лежить ДО партії, менше за потрібну кількість
+        needed = db.execute(
+            select(open_batches).where(open_batches.c.taken_before < quantity_needed).order_by(open_batches.c.id)
+        ).all()
+
+        qty_left_to_deduct = quantity_needed
+        updates = []
+        for batch_id, remaining, cost_per_unit, _ in needed:
+            take_from_batch = min(remaining, qty_left_to_deduct)
+            cost_per_unit = cost_per_unit or 0.0
+            result["consumed"].append({
+                "batch_id": batch_id,
+                "quantity": take_from_batch,
+                "cost_per_unit": cost_per_unit,
+                "cost": take_from_batch * cost_per_unit
+            })
+            result["cost"] += take_from_batch * cost_per_unit
+            updates.append({"batch_id": batch_id, "take": take_from_batch})
             qty_left_to_deduct -= take_from_batch
-            db.add(batch)
+
+        if updates:
+            db.connection().execute(
+                update(items)
+                .where(items.c.id == bindparam("batch_id"))
+                .values(remaining_quantity=items.c.remaining_quantity - bindparam("take")),
+                updates
+            )
+            # ORM-об'єкти цих партій (якщо вже завантажені в сесію) мають перечитатися
+            for row in updates:
+                cached = db.identity_map.get(db.identity_key(models.SupplyItem, row["batch_id"]))
+                if cached is not None:
+                    db.expire(cached, ["remaining_quantity"])
 
         if qty_left_to_deduct > 0:
-             last_price = batches[-1].cost_per_unit if batches else 0.0
-             total_cost_of_deducted += qty_left_to_deduct * last_price
+            # Партій не вистачило — решту оцінюємо за ціною останньої відкритої партії (як і раніше)
+            result["shortage"] = qty_left_to_deduct
+            last_price = result["consumed"][-1]["cost_per_unit"] if result["consumed"] else 0.0
+            result["cost"] += qty_left_to_deduct * last_price
+
+        return result
 
-        return total_cost_of_deducted
+    @staticmethod
+    def deduct_fifo(db: Session, entity_type: str, entity_id: int, quantity_needed: float) -> float:
+        """Списує кількість з найстаріших партій і повертає собівартість списаного"""
+        return SupplyClient.deplete_fifo(db, entity_type, entity_id, quantity_needed)["cost"]
 
     @staticmethod
     def deduct_manual(db: Session, batch_id: int, quantity_needed: float) -> float:
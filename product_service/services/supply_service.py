@@ -6,6 +6,7 @@ import models, schemas
 
 # 🔥 Єдиний місток до складу:
 from services.inventory_client import InventoryClient
+from services.finance_client import FinanceClient
 
 class SupplyService:
     @staticmethod
@@ -58,6 +59,18 @@ class SupplyService:
             db.add(db_item)
 
         supply.total_cost = total_supply_cost
+
+        # 5. ДЕЛЕГУЄМО ФІНАНСИ КЛІЄНТУ: подія оплати йде в outbox тієї ж транзакції, що й накладна
+        paid_amount = getattr(data, 'paid_amount', 0)
+        if data.payment_account_id and paid_amount and paid_amount > 0:
+            FinanceClient.register_supply_expense(
+                db=db,
+                supply_id=supply.id,
+                total_cost=float(paid_amount),
+                account_id=data.payment_account_id,
+                user_id=getattr(data, 'user_id', 1)
+            )
+
         db.commit()
         db.refresh(supply)
         return supply
\ No newline at end of file
@@ -10,10 +10,12 @@ from fastapi.testclient import TestClient
 # щоб можна було імпортувати main, database, models
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from database import Base, get_db
+from database import Base, get_db, get_report_db
 from main import app
 # Імпортуємо моделі, щоб SQLAlchemy знала про них при створенні таблиць
 import models 
+from services.bom_cache import bom_cache
+from services.catalogue import catalogue
 
 # 2. Налаштування тестової бази даних (SQLite in-memory)
 # check_same_thread=False потрібен для SQLite, коли він працює з FastAPI
@@ -35,6 +37,9 @@ def db_session():
     """
     # Створюємо всі таблиці, визначені в models.py
     Base.metadata.create_all(bind=engine)
+    # Кеш техкарт живе в процесі — між тестами ID перевикористовуються
+    bom_cache.clear()
+    catalogue.clear()  # Версія каталогу в новій базі знову починається з 0
     
     session = TestingSessionLocal()
     try:
@@ -58,6 +63,7 @@ def client(db_session):
 
     # Підміняємо реальну залежність (PostgreSQL) на тестову (SQLite)
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_report_db] = override_get_db  # Звіти — у ту саму тестову базу
     
     # Створюємо клієнта для запитів (використовує httpx під капотом)
     with TestClient(app) as c:
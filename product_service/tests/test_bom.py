@@ -0,0 +1,134 @@
+import pytest
+from sqlalchemy import event
+import models
+from services.bom_service import BomService
+from services.product_service import ProductService
+from services.bom_cache import bom_cache
+from services.availability_service import AvailabilityService
+
+def setup_bom_menu(db):
+    """
+    Мінімальне меню для BoM: Лате з варіантом L (рецепт у відсотках + стакан)
+    та простий Еспресо з рецептом у грамах і базовим інгредієнтом товару.
+    """
+    recipe_latte = models.MasterRecipe(name="Лате")
+    recipe_latte.items = [
+        models.MasterRecipeItem(ingredient_id=1, quantity=80, is_percentage=True),   # молоко 80%
+        models.MasterRecipeItem(ingredient_id=2, quantity=18, is_percentage=False),  # кава 18 г
+    ]
+    recipe_espresso = models.MasterRecipe(name="Еспресо")
+    recipe_espresso.items = [models.MasterRecipeItem(ingredient_id=2, quantity=9, is_percentage=False)]
+    db.add_all([recipe_latte, recipe_espresso])
+    db.flush()
+
+    latte = models.Product(name="Лате", price=0, has_variants=True)
+    db.add(latte)
+    db.flush()
+    variant_l = models.ProductVariant(
+        product_id=latte.id, name="L", price=80, master_recipe_id=recipe_latte.id, output_weight=400
+    )
+    db.add(variant_l)
+    db.flush()
+    db.add(models.ProductVariantConsumable(variant_id=variant_l.id, consumable_id=10, quantity=1))
+
+    espresso = models.Product(name="Еспресо", price=40, master_recipe_id=recipe_espresso.id, output_weight=30)
+    db.add(espresso)
+    db.flush()
+    db.add(models.ProductIngredient(product_id=espresso.id, ingredient_id=3, quantity=5))  # цукор
+    db.commit()
+
+    return {"latte_id": latte.id, "variant_l_id": variant_l.id, "espresso_id": espresso.id}
+
+def test_expand_bom_totals(db_session):
+    """Варіант з відсотковим рецептом + простий товар: BoM сумується по всьому чеку"""
+    menu = setup_bom_menu(db_session)
+    items = [
+        {"product_id": menu["latte_id"], "variant_id": menu["variant_l_id"], "quantity": 2},
+        {"product_id": menu["espresso_id"], "variant_id": None, "quantity": 3},
+    ]
+
+    bom = BomService.expand_bom(db_session, items)
+
+    # Молоко: 80% від 400 г * 2 = 640; Кава: 18*2 + 9*3 = 63; Цукор: 5*3 = 15
+    assert bom["ingredients"] == {1: 640.0, 2: 63.0, 3: 15.0}
+    # Стакан для кожного Лате
+    assert bom["consumables"] == {10: 2.0}
+    assert [line["name"] for line in bom["lines"]] == ["Лате (L)", "Еспресо"]
+
+def test_expand_bom_skips_unknown_products(db_session):
+    menu = setup_bom_menu(db_session)
+    bom = BomService.expand_bom(db_session, [
+        {"product_id": 9999, "quantity": 1},
+        {"product_id": menu["espresso_id"], "quantity": 1},
+    ])
+    assert len(bom["lines"]) == 1
+    assert bom["ingredients"] == {2: 9.0, 3: 5.0}
+
+def test_expand_bom_query_count_is_flat(db_session):
+    """Кількість SQL-запитів не залежить від кількості позицій у чеку"""
+    menu = setup_bom_menu(db_session)
+    statements = []
+
+    def count_query(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", count_query)
+    try:
+        line = {"product_id": menu["latte_id"], "variant_id": menu["variant_l_id"], "quantity": 1}
+        db_session.expire_all()
+        BomService.expand_bom(db_session, [line])
+        small_order = len(statements)
+
+        statements.clear()
+        bom_cache.clear()
+        db_session.expire_all()
+        big_cart = [line] * 12 + [{"product_id": menu["espresso_id"], "quantity": 1}] * 12
+        BomService.expand_bom(db_session, big_cart)
+        big_order = len(statements)
+
+        # Другий такий самий чек: техкарти вже скомпільовані, лишаються тільки легкі запити назв/залишків
+        statements.clear()
+        BomService.expand_bom(db_session, big_cart)
+        cached_order = len(statements)
+    finally:
+        event.remove(engine, "before_cursor_execute", count_query)
+
+    assert small_order == big_order == 4
+    assert cached_order == 2
+
+def test_compiled_bom_invalidated_on_product_update(client, db_session):
+    """Після редагування товару калькулятор залишків бачить нову техкарту, а не кешовану"""
+    menu = setup_bom_menu(db_session)
+    stocks = ({1: 1000.0, 2: 1000.0}, {10: 100.0})
+
+    # Молоко 320 г на порцію -> з 1000 г можна зробити 3 Лате
+    assert ProductService.calculate_max_possible_stock(db_session, menu["variant_l_id"], *stocks) == 3.0
+    assert bom_cache.stats()["cached_units"] == 1
+
+    recipe_id = db_session.query(models.ProductVariant).get(menu["variant_l_id"]).master_recipe_id
+    response = client.put(f"/products/{menu['latte_id']}", json={
+        "name": "Лате", "price": 0, "has_variants": True,
+        "variants": [{"name": "L", "price": 80, "master_recipe_id": recipe_id, "output_weight": 200}]
+    })
+    assert response.status_code == 200
+
+    # Вага виходу вдвічі менша (160 г молока) -> 6 порцій
+    assert ProductService.calculate_max_possible_stock(db_session, menu["variant_l_id"], *stocks) == 6.0
+    assert bom_cache.stats()["invalidations"] == 1
+
+def test_availability_map_matches_single_variant_calculator(db_session):
+    """Векторний розрахунок доступності дає те саме, що й покроковий калькулятор"""
+    menu = setup_bom_menu(db_session)
+    variant_m = models.ProductVariant(product_id=menu["latte_id"], name="M", price=60, output_weight=300,
+                                      master_recipe_id=db_session.query(models.ProductVariant).get(menu["variant_l_id"]).master_recipe_id)
+    db_session.add(variant_m)
+    db_session.commit()
+    ing_stock, con_stock = {1: 1000.0, 2: 90.0}, {10: 2.0}
+
+    availability = AvailabilityService.sellable_quantities(db_session, None, ing_stock, con_stock)
+
+    # L: молоко 320 г (3 порції), кава 18 г (5), стакан (2) -> 2;  M: молоко 240 г (4), кава (5) -> 4
+    assert availability == {menu["variant_l_id"]: 2.0, variant_m.id: 4.0}
+    for variant_id, qty in availability.items():
+        assert ProductService.calculate_max_possible_stock(db_session, variant_id, ing_stock, con_stock) == qty
@@ -0,0 +1,75 @@
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+from services.bonus_cache import BonusCache
+
+
+@pytest.fixture
+def cache():
+    BonusCache.redis = fakeredis.FakeRedis(decode_responses=True)
+    yield BonusCache
+    BonusCache.redis = None
+
+
+def test_invalidation_releases_hold_and_rejects_stale_balance(cache):
+    generation, cached = cache.peek(7)
+    assert not cached
+    assert cache.reserve(7, 25.0, "order-1", balance=30.0, generation=generation) == 25.0
+
+    # Чек оброблено лояльністю: CRM тепер 5 ₴, кеш скинуто, холд знято
+    stale_generation, _ = cache.peek(7)
+    cache.invalidate(7, "order-1")
+
+    # Відповідь CRM, отримана ДО інвалідації (ще 30 ₴), у кеш не потрапляє
+    assert cache.reserve(7, 25.0, "order-2", balance=30.0, generation=stale_generation) is None
+    generation, _ = cache.peek(7)
+    assert cache.reserve(7, 25.0, "order-2", balance=5.0, generation=generation) == 5.0
+
+
+def test_released_hold_frees_bonuses(cache):
+    generation, _ = cache.peek(3)
+    assert cache.reserve(3, 10.0, "a", balance=10.0, generation=generation) == 10.0
+    assert cache.reserve(3, 10.0, "b") == 0.0
+
+    cache.release(3, "a")  # транзакція чека "a" не вдалась
+    assert cache.reserve(3, 10.0, "b") == 10.0
+
+
+def test_available_shows_balance_minus_open_holds(cache):
+    assert cache.available(5) is None  # промах — потрібен CRM
+    generation, _ = cache.peek(5)
+    assert cache.available(5, balance=12.5, generation=generation) == 12.5
+
+    cache.reserve(5, 10.0, "open-order")
+    assert cache.available(5) == 2.5
+
+
+def test_sync_checkout_holds_bonuses_outside_transaction(cache, db_session, monkeypatch):
+    """Холд і запит у CRM — без відкритої транзакції; невдалий запис чека знімає холд"""
+    from fastapi import HTTPException
+    import models
+    import schemas
+    from services.order_service import OrderService
+
+    db_session.add(models.Product(id=1, name="Еспресо", price=40))
+    db_session.commit()
+    in_transaction = []
+
+    def crm_balance(customer_id):
+        in_transaction.append(db_session.in_transaction())
+        return 30.0
+
+    monkeypatch.setattr(OrderService, "_fetch_crm_balance", staticmethod(crm_balance))
+    order_data = lambda customer_id: schemas.OrderCreate(
+        items=[{"product_id": 1, "quantity": 2}], payment_method="card", customer_id=customer_id, use_bonuses=True
+    )
+
+    order = OrderService.process_checkout(db_session, order_data(7))
+    assert (order.bonuses_spent, order.total_price) == (30.0, 50.0)
+    assert in_transaction == [False]
+
+    monkeypatch.setattr(OrderService, "_queue_order_events", staticmethod(lambda *args: 1 / 0))
+    with pytest.raises(HTTPException):
+        OrderService.process_checkout(db_session, order_data(8))
+    assert cache.available(8) == 30.0  # холд невдалого чека знято
+    assert db_session.query(models.Order).count() == 1
@@ -0,0 +1,72 @@
+import pytest
+import models
+from services.catalogue import catalogue
+from services.inventory_client import InventoryClient
+
+def test_catalogue_etag_and_not_modified(client):
+    """Незмінний каталог віддається з кешу і за If-None-Match — 304; запис у каталог змінює ETag"""
+    client.post("/products/", json={
+        "name": "Лате", "price": 0, "has_variants": True,
+        "variants": [{"name": "L", "price": 80, "ingredients": [{"ingredient_id": 2, "quantity": 18}]}]
+    })
+
+    first = client.get("/products/")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert etag == '"catalogue-v1"'
+
+    product = first.json()[0]
+    assert product["name"] == "Лате"
+    # Залишків у каталозі немає — вони в /products/stock
+    assert "stock_quantity" not in product
+    assert "stock_quantity" not in product["variants"][0]
+    assert product["variants"][0]["ingredients"][0]["ingredient_name"] == "ID Інгредієнта: 2"
+
+    cached = client.get("/products/", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    # Слабкий ETag (nginx з gzip) теж збігається
+    assert client.get("/products/", headers={"If-None-Match": f"W/{etag}"}).status_code == 304
+
+    client.post("/categories/", json={"name": "Кава", "slug": "coffee"})
+    changed = client.get("/products/", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] == '"catalogue-v2"'
+
+    stats = catalogue.stats()
+    assert stats["builds"] == 2
+    assert stats["not_modified"] == 2
+
+def test_catalogue_does_not_touch_request_session(client, db_session):
+    """Значення за замовчуванням ставляться на окремій сесії і не записуються в базу"""
+    product = models.Product(name="Старий товар", price=None, output_weight=None)
+    db_session.add(product)
+    db_session.commit()
+    product_id = product.id
+
+    response = client.get("/products/")
+    assert response.status_code == 200
+    assert response.json()[0]["price"] == 0.0
+
+    assert db_session.get(models.Product, product_id).price is None
+
+def test_catalogue_stock_overlay(client, db_session, monkeypatch):
+    """/products/stock: власний облік товару/варіанту і кількість порцій для варіантів на техкартах"""
+    recipe = models.MasterRecipe(name="Еспресо")
+    recipe.items = [models.MasterRecipeItem(ingredient_id=2, quantity=9, is_percentage=False)]
+    dessert = models.Product(name="Чізкейк", price=90, track_stock=True, stock_quantity=4)
+    espresso = models.Product(name="Еспресо", price=40, has_variants=True)
+    db_session.add_all([recipe, dessert, espresso])
+    db_session.flush()
+    variant = models.ProductVariant(product_id=espresso.id, name="Single", price=40,
+                                    master_recipe_id=recipe.id, output_weight=30)
+    db_session.add(variant)
+    db_session.commit()
+    dessert_id, variant_id = dessert.id, variant.id
+    monkeypatch.setattr(InventoryClient, "get_all_stocks", staticmethod(lambda: ({2: 50.0}, {})))
+
+    stock = client.get("/products/stock").json()
+
+    assert stock["products"][str(dessert_id)] == 4.0
+    # 50 г кави / 9 г на порцію -> 5 порцій
+    assert stock["variants"][str(variant_id)] == 5.0
@@ -0,0 +1,106 @@
+import asyncio
+import httpx
+import pytest
+from sqlalchemy import create_engine
+
+pytest.importorskip("aiosqlite")
+fakeredis = pytest.importorskip("fakeredis")
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+import models
+import schemas
+from database import Base
+from services.bonus_cache import BonusCache
+from services.crm_client import CrmClient
+from services.order_service import OrderService
+
+
+@pytest.fixture
+def checkout_env(tmp_path):
+    # Файлова SQLite: синхронний двигун для наповнення меню, async — для самого checkout
+    url = f"sqlite:///{tmp_path / 'checkout.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(models.Product.__table__.insert(), [{"id": 1, "name": "Еспресо", "price": 40, "is_active": True}])
+
+    async_engine = create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://"))
+    BonusCache.redis = fakeredis.FakeRedis(decode_responses=True)
+    yield engine, async_sessionmaker(async_engine, expire_on_commit=False)
+
+    BonusCache.redis = None
+
+    asyncio.run(CrmClient.aclose())
+    CrmClient.transport = None
+    asyncio.run(async_engine.dispose())
+    engine.dispose()
+
+
+def outbox_events(engine):
+    with engine.connect() as conn:
+        return conn.execute(models.OutboxEvent.__table__.select().order_by(models.OutboxEvent.id)).fetchall()
+
+
+def crm_returning(status_code, balance=0, calls=None):
+    def handler(request):
+        if calls is not None:
+            calls.append(request.url.path)
+        return httpx.Response(status_code, json={"bonus_balance": balance})
+    return httpx.MockTransport(handler)
+
+
+def test_async_checkout_spends_confirmed_bonuses(checkout_env):
+    engine, session_factory = checkout_env
+    CrmClient.transport = crm_returning(200, balance=30)
+    order_data = schemas.OrderCreate(
+        items=[{"product_id": 1, "quantity": 2}], payment_method="card", customer_id=7, use_bonuses=True
+    )
+
+    order = asyncio.run(OrderService.process_checkout_async(order_data, session_factory))
+
+    assert order.total_price == 50.0
+    assert float(order.bonuses_spent) == 30.0
+    with engine.connect() as conn:
+        rows = conn.execute(models.OrderItem.__table__.select()).fetchall()
+    assert [(r.order_id, r.product_name, r.quantity) for r in rows] == [(order.id, "Еспресо", 2)]
+
+    # Події складу та оплати лежать в outbox, записані тією ж транзакцією, що й чек (по одній на подію)
+    events = outbox_events(engine)
+    assert [e.routing_key for e in events] == ["stock.deduct_bom", "order.paid"]
+    assert all(e.sent_at is None for e in events)
+    paid = events[1].payload
+    assert paid["order_id"] == order.id and paid["bonuses_spent"] == 30.0 and paid["use_bonuses"] is True
+    assert paid["bonus_hold_id"]
+
+
+def test_cached_balance_skips_crm_and_holds_prevent_overspend(checkout_env):
+    _, session_factory = checkout_env
+    calls = []
+    CrmClient.transport = crm_returning(200, balance=50, calls=calls)
+
+    def order_data():
+        return schemas.OrderCreate(
+            items=[{"product_id": 1, "quantity": 1}], payment_method="card", customer_id=7, use_bonuses=True
+        )
+
+    first = asyncio.run(OrderService.process_checkout_async(order_data(), session_factory))
+    # Лояльність ще не обробила перший чек, а CRM досі показує 50: другий чек бачить лише вільні 10
+    second = asyncio.run(OrderService.process_checkout_async(order_data(), session_factory))
+    third = asyncio.run(OrderService.process_checkout_async(order_data(), session_factory))
+
+    assert [float(o.bonuses_spent) for o in (first, second, third)] == [40.0, 10.0, 0.0]
+    assert calls == ["/customers/7/balance"]  # один запит у CRM на три чеки
+
+
+def test_async_checkout_without_crm_goes_without_discount(checkout_env):
+    engine, session_factory = checkout_env
+    CrmClient.transport = crm_returning(503)
+    order_data = schemas.OrderCreate(
+        items=[{"product_id": 1, "quantity": 1}], payment_method="cash", customer_id=7, use_bonuses=True
+    )
+
+    order = asyncio.run(OrderService.process_checkout_async(order_data, session_factory))
+
+    assert order.total_price == 40.0
+    assert float(order.bonuses_spent) == 0.0
+    assert outbox_events(engine)[1].payload["use_bonuses"] is False
@@ -0,0 +1,72 @@
+import threading
+
+import pytest
+from sqlalchemy import Column, Integer, String, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import declarative_base
+
+import db_layer
+
+Base = declarative_base()
+
+
+class Note(Base):
+    __tablename__ = "notes"
+    id = Column(Integer, primary_key=True)
+    body = Column(String)
+
+
+@pytest.fixture
+def database(tmp_path):
+    db = db_layer.Database(f"sqlite:///{tmp_path}/primary.db", f"sqlite:///{tmp_path}/replica.db")
+    for engine in (db.engine, db.replica_engine):
+        Base.metadata.create_all(bind=engine)
+    with db.replica_engine.begin() as conn:
+        conn.execute(text("INSERT INTO notes (id, body) VALUES (1, 'з репліки')"))
+    yield db
+    db.engine.dispose()
+    db.replica_engine.dispose()
+
+
+def test_report_session_reads_replica_and_writes_primary(database):
+    report = database.get_report_db()
+    db = next(report)
+    assert [n.body for n in db.query(Note)] == ["з репліки"]
+
+    # Запис зі звітної сесії все одно йде в основну базу
+    db.add(Note(id=2, body="запис"))
+    db.commit()
+    report.close()
+    with database.engine.connect() as conn:
+        assert conn.execute(text("SELECT body FROM notes")).scalars().all() == ["запис"]
+
+    regular = database.get_db()
+    db = next(regular)
+    assert db.query(Note).count() == 1  # Звичайні маршрути — лише основна база
+    assert db.info["statement_timeout_ms"] == db_layer.DB_STATEMENT_TIMEOUT_MS
+    regular.close()
+
+
+def test_pool_metrics_count_in_use_waits_and_timeouts(tmp_path):
+    engine = db_layer.make_engine(f"sqlite:///{tmp_path}/pool.db", "test_pool", pool_size=1,
+                                  max_overflow=0, pool_timeout=0.2)
+    held = engine.connect()
+    assert db_layer.pool_metrics()["test_pool"]["in_use"] == 1
+
+    released = threading.Timer(0.05, held.close)
+    released.start()
+    with engine.connect():  # Чекає, поки перше з'єднання повернуть у пул
+        pass
+    released.join()
+
+    held = engine.connect()
+    with pytest.raises(PoolTimeoutError):
+        engine.connect()
+    held.close()
+
+    stats = db_layer.pool_metrics()["test_pool"]
+    assert stats["in_use"] == 0 and stats["peak_in_use"] == 1
+    assert stats["timeouts"] == 1
+    assert stats["wait_ms"]["max"] >= 150
+    assert stats["wait_ms"]["samples"] == stats["checkouts"] + 1
+    engine.dispose()
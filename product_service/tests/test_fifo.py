@@ -0,0 +1,45 @@
+import pytest
+import models
+from services.supply_client import SupplyClient
+
+def seed_batches(db, quantities, prices, entity_id=1):
+    supply = models.Supply(notes="Тестова накладна")
+    db.add(supply)
+    db.flush()
+    items = []
+    for qty, price in zip(quantities, prices):
+        item = models.SupplyItem(
+            supply_id=supply.id, entity_type="ingredient", entity_id=entity_id, entity_name="Молоко",
+            quantity=qty, remaining_quantity=qty, cost_per_unit=price, total_cost=qty * price
+        )
+        db.add(item)
+        items.append(item)
+    db.commit()
+    return [item.id for item in items]
+
+def test_deplete_fifo_consumes_only_needed_batches(db_session):
+    """Списання зачіпає лише найстаріші потрібні партії і повертає собівартість по кожній"""
+    ids = seed_batches(db_session, [100, 50, 200, 300], [1.0, 2.0, 3.0, 4.0])
+    seed_batches(db_session, [500], [9.0], entity_id=2)  # інша позиція не чіпається
+
+    result = SupplyClient.deplete_fifo(db_session, "ingredient", 1, 180)
+    db_session.commit()
+
+    assert [(c["batch_id"], c["quantity"]) for c in result["consumed"]] == [(ids[0], 100), (ids[1], 50), (ids[2], 30)]
+    assert result["cost"] == 100 * 1.0 + 50 * 2.0 + 30 * 3.0
+    assert result["shortage"] == 0.0
+
+    remaining = {i.id: i.remaining_quantity for i in db_session.query(models.SupplyItem).filter(models.SupplyItem.entity_id == 1)}
+    assert remaining == {ids[0]: 0, ids[1]: 0, ids[2]: 170, ids[3]: 300}
+
+    # Наступне списання починається з частково використаної партії
+    assert SupplyClient.deduct_fifo(db_session, "ingredient", 1, 170) == 170 * 3.0
+
+def test_deplete_fifo_shortage_is_costed_by_last_batch(db_session):
+    seed_batches(db_session, [10, 20], [1.0, 5.0])
+
+    result = SupplyClient.deplete_fifo(db_session, "ingredient", 1, 50)
+
+    assert result["shortage"] == 20
+    assert result["cost"] == 10 * 1.0 + 20 * 5.0 + 20 * 5.0
+    assert SupplyClient.deplete_fifo(db_session, "ingredient", 1, 5)["consumed"] == []
@@ -0,0 +1,49 @@
+import pytest
+from datetime import datetime, timedelta
+import models
+
+def seed_history(db):
+    """7 рухів молока (два з однаковим часом — перевірка тай-брейку по id) і 1 рух кави"""
+    base = datetime(2026, 3, 1, 12, 0, 0)
+    for i in range(7):
+        db.add(models.InventoryTransaction(
+            entity_type="ingredient", entity_id=1, entity_name="Молоко",
+            change_amount=-10, balance_after=1000 - 10 * i,
+            reason="supply_in_1" if i == 0 else f"sale_order_{i}",
+            created_at=base + timedelta(days=min(i, 5))
+        ))
+    db.add(models.InventoryTransaction(
+        entity_type="ingredient", entity_id=2, entity_name="Кава",
+        change_amount=-5, balance_after=100, reason="sale_order_1", created_at=base
+    ))
+    db.commit()
+
+def test_history_keyset_pages_cover_all_rows_once(client, db_session):
+    seed_history(db_session)
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        params = {"entity_type": "ingredient", "entity_id": 1, "limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/history/", params=params)
+        assert response.status_code == 200
+        seen += [row["id"] for row in response.json()]
+        pages += 1
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            break
+
+    assert pages == 3
+    assert len(seen) == len(set(seen)) == 7
+    # Найновіші зверху: при однаковому created_at більший id іде першим
+    assert seen[:2] == [7, 6]
+
+def test_history_filters_by_date_and_reason(client, db_session):
+    seed_history(db_session)
+
+    response = client.get("/history/", params={"entity_id": 1, "reason": "sale_order_", "date_from": "2026-03-02T00:00:00", "date_to": "2026-03-04T00:00:00"})
+    assert [row["reason"] for row in response.json()] == ["sale_order_2", "sale_order_1"]
+    assert "x-next-cursor" not in response.headers
+
+    assert client.get("/history/", params={"cursor": "не-курсор"}).status_code == 400
@@ -0,0 +1,39 @@
+import pytest
+from sqlalchemy import event
+import models
+from services.inventory_logger import InventoryLogger
+
+def test_ledger_rows_written_in_one_insert_at_commit(db_session):
+    """Рядки журналу не потрапляють у сесію як ORM-об'єкти і пишуться одним INSERT при commit"""
+    for i in range(30):
+        InventoryLogger.log(db_session, "ingredient", i, f"Інгредієнт {i}", 100, 100 - i - 1, "sale_order_1")
+    # Нульова зміна без force_change не логується (як і раніше)
+    InventoryLogger.log(db_session, "ingredient", 99, "Без змін", 5, 5, "sale_order_1")
+
+    assert InventoryLogger.pending(db_session) == 30
+    assert not db_session.new
+
+    inserts = []
+    def count_insert(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT INTO inventory_transactions"):
+            inserts.append(executemany)
+
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", count_insert)
+    try:
+        db_session.commit()
+    finally:
+        event.remove(engine, "before_cursor_execute", count_insert)
+
+    assert len(inserts) == 1
+    rows = db_session.query(models.InventoryTransaction).order_by(models.InventoryTransaction.entity_id).all()
+    assert len(rows) == 30
+    assert (rows[3].change_amount, rows[3].balance_after) == (-4, 96)
+
+def test_ledger_buffer_dropped_on_rollback(db_session):
+    InventoryLogger.log(db_session, "consumable", 1, "Стакан", 10, 9, "sale_order_2")
+    db_session.rollback()
+    db_session.commit()
+
+    assert InventoryLogger.pending(db_session) == 0
+    assert db_session.query(models.InventoryTransaction).count() == 0
@@ -0,0 +1,70 @@
+import pytest
+from services.inventory_replica import InventoryReplica
+
+def page(since, next_seq, latest, ingredients=(), consumables=(), deleted=(), has_more=False):
+    return {"since": since, "next": next_seq, "latest": latest, "has_more": has_more,
+            "units": [], "suppliers": [], "ingredients": list(ingredients), "consumables": list(consumables),
+            "deleted": list(deleted)}
+
+class FakeFeed:
+    """Відповіді /inventory/changes по черзі; запам'ятовує, з якими курсорами питали"""
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requested = []
+
+    def __call__(self, since):
+        self.requested.append(since)
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+def make_replica(monkeypatch, feed):
+    replica = InventoryReplica(base_url="http://inventory.test", interval=0)
+    monkeypatch.setattr(replica, "_fetch", feed)
+    return replica
+
+def test_replica_full_sync_then_deltas(monkeypatch):
+    """Повне завантаження сторінками, далі лише зміни після курсора і видалені позиції"""
+    feed = FakeFeed(
+        page(None, 3, 5, ingredients=[{"id": 1, "stock_quantity": 1000.0}, {"id": 2, "stock_quantity": 500.0}], has_more=True),
+        page(3, 5, 5, consumables=[{"id": 10, "stock_quantity": 100}]),
+        page(5, 7, 7, ingredients=[{"id": 2, "stock_quantity": 450.0}],
+             deleted=[{"entity_type": "consumable", "id": 10, "change_seq": 7}]),
+    )
+    replica = make_replica(monkeypatch, feed)
+
+    assert replica.stocks() == ({1: 1000.0, 2: 500.0}, {10: 100})
+    assert replica.stocks() == ({1: 1000.0, 2: 450.0}, {})
+    assert feed.requested == [None, 3, 5]
+    assert replica.stats()["full_syncs"] == 1
+
+def test_replica_resets_on_recreated_inventory(monkeypatch):
+    """Курсор новіший за latest складу — база перестворена, копія будується заново"""
+    feed = FakeFeed(
+        page(None, 9, 9, ingredients=[{"id": 1, "stock_quantity": 10.0}]),
+        page(9, 9, 2),
+        page(None, 2, 2, ingredients=[{"id": 5, "stock_quantity": 3.0}]),
+    )
+    replica = make_replica(monkeypatch, feed)
+    replica.stocks()
+
+    assert replica.stocks() == ({5: 3.0}, {})
+    assert feed.requested == [None, 9, None]
+    assert replica.stats()["full_syncs"] == 2
+
+def test_replica_keeps_last_copy_when_inventory_is_down(monkeypatch):
+    """Помилка посеред синхронізації не псує копію і не зсуває курсор"""
+    feed = FakeFeed(
+        page(None, 4, 4, ingredients=[{"id": 1, "stock_quantity": 10.0}]),
+        page(4, 6, 8, ingredients=[{"id": 1, "stock_quantity": 7.0}], has_more=True),
+        ConnectionError("inventory_api недоступний"),
+        page(4, 8, 8, ingredients=[{"id": 1, "stock_quantity": 5.0}]),
+    )
+    replica = make_replica(monkeypatch, feed)
+    replica.stocks()
+
+    assert replica.stocks() == ({1: 10.0}, {})
+    assert replica.stats()["errors"] == 1
+    assert replica.stocks() == ({1: 5.0}, {})
+    assert feed.requested == [None, 4, 6, 4]
@@ -0,0 +1,91 @@
+import pytest
+from datetime import datetime, timedelta
+import models
+from services import order_feed
+from services.order_feed import OrderFeed
+
+def seed_orders(db):
+    """7 чеків (два з однаковим часом — перевірка тай-брейку по id), у кожному по 2 позиції"""
+    base = datetime(2026, 3, 1, 12, 0, 0)
+    for i in range(7):
+        order = models.Order(
+            created_at=base + timedelta(hours=min(i, 5)), total_price=100 + i,
+            payment_method="cash" if i % 2 else "card", customer_id=42 if i < 3 else None
+        )
+        order.items = [
+            models.OrderItem(product_name=f"Товар {i}-{j}", quantity=1, price_at_moment=50) for j in range(2)
+        ]
+        db.add(order)
+    db.commit()
+    OrderFeed.clear_cache()
+
+def test_orders_keyset_pages_cover_all_orders_once(client, db_session):
+    seed_orders(db_session)
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        data = client.get("/orders/", params=params).json()
+        seen += [order["id"] for order in data["items"]]
+        assert all(len(order["items"]) == 2 for order in data["items"])
+        assert data["total"] is None  # без with_total кількість не рахується
+        pages += 1
+        cursor = data["next_cursor"]
+        if not cursor:
+            break
+
+    assert pages == 3
+    assert len(seen) == len(set(seen)) == 7
+    # Найновіші зверху: при однаковому created_at більший id іде першим
+    assert seen[:2] == [7, 6]
+
+def test_orders_filters_and_cached_total(client, db_session):
+    seed_orders(db_session)
+
+    data = client.get("/orders/", params={"payment_method": "card", "customer_id": 42, "with_total": True}).json()
+    assert [order["id"] for order in data["items"]] == [3, 1]
+    assert data["total"] == 2 and data["next_cursor"] is None
+    assert data["total_is_estimate"] is False  # SQLite — точний COUNT, а не план Postgres
+
+    data = client.get("/orders/", params={"date_from": "2026-03-01T13:00:00", "date_to": "2026-03-01T15:00:00"}).json()
+    assert [order["id"] for order in data["items"]] == [3, 2]
+
+    # Оцінка кешується на ключ фільтрів: новий чек не змушує рахувати знову
+    assert client.get("/orders/", params={"with_total": True}).json()["total"] == 7
+    db_session.add(models.Order(total_price=1, payment_method="card"))
+    db_session.commit()
+    assert client.get("/orders/", params={"with_total": True}).json()["total"] == 7
+
+    assert client.get("/orders/", params={"cursor": "не-курсор"}).status_code == 400
+
+def test_order_count_cache_is_bounded(db_session, monkeypatch):
+    """Кеш кількості не росте з кожним новим діапазоном дат: протухлі ключі і найстаріші понад межу — геть"""
+    monkeypatch.setattr(order_feed, "ORDER_COUNT_CACHE_SIZE", 3)
+    OrderFeed.clear_cache()
+    query = db_session.query(models.Order)
+
+    for day in range(5):
+        assert OrderFeed.estimate_total(db_session, query, (day,)) == (0, False)
+    assert list(OrderFeed._count_cache) == [(2,), (3,), (4,)]
+
+    monkeypatch.setattr(order_feed, "ORDER_COUNT_TTL", -1)  # (5,) записується вже протухлим
+    OrderFeed.estimate_total(db_session, query, (5,))
+    OrderFeed.estimate_total(db_session, query, (6,))
+    assert list(OrderFeed._count_cache) == [(3,), (4,), (6,)]
+
+def test_customer_history_is_projected_paged_and_summarised(client, db_session):
+    seed_orders(db_session)
+
+    data = client.get("/orders/history/42", params={"limit": 2, "with_summary": True}).json()
+    assert [order["id"] for order in data["items"]] == [3, 2]
+    assert set(data["items"][0]) == {"id", "created_at", "total_price", "payment_method", "bonuses_spent", "items"}
+    assert [item["product_name"] for item in data["items"][0]["items"]] == ["Товар 2-0", "Товар 2-1"]
+    assert data["summary"] == {
+        "visits": 3, "total_spent": 303.0, "average_check": 101.0, "last_visit": "2026-03-01T14:00:00"
+    }
+
+    data = client.get("/orders/history/42", params={"limit": 2, "cursor": data["next_cursor"]}).json()
+    assert [order["id"] for order in data["items"]] == [1]
+    assert data["next_cursor"] is None and data["summary"] is None
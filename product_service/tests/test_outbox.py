@@ -0,0 +1,64 @@
+import pytest
+import models
+from services.outbox import Outbox
+from services.finance_client import FinanceClient
+
+class StubPublisher:
+    """Паблішер у пам'яті: пачка підтверджується вся або (down=True) не підтверджується зовсім"""
+    def __init__(self, down=False):
+        self.sent = []
+        self.batches = []
+        self.down = down
+
+    def publish_events(self, items):
+        if self.down:
+            raise ConnectionError("broker down")
+        self.batches.append(len(items))
+        self.sent += items
+
+def test_outbox_event_is_part_of_caller_transaction(db_session):
+    """Подія з'являється лише разом з даними викликача: rollback прибирає і її"""
+    FinanceClient.register_order_refund(db_session, order_id=1, amount=10.0, payment_method="cash")
+    db_session.rollback()
+    assert db_session.query(models.OutboxEvent).count() == 0
+
+    FinanceClient.register_order_income(db_session, order_id=2, total_price=50.0, payment_method="card", user_id=1)
+    db_session.commit()
+    # Одна подія order.paid (а не дубль на кожну чергу) — копії для фінансів і лояльності робить exchange
+    assert [e.routing_key for e in db_session.query(models.OutboxEvent)] == ["order.paid"]
+    assert Outbox.stats(db_session)["pending"] == 1
+
+def test_relay_sends_whole_batch_and_retries_after_broker_failure(db_session):
+    for n in range(5):
+        Outbox.add(db_session, "order.paid", {"n": n})
+    db_session.commit()
+
+    # Брокер лежить: пачка не підтверджена — жоден рядок не позначений відправленим
+    publisher = StubPublisher(down=True)
+    with pytest.raises(ConnectionError):
+        Outbox.relay_batch(db_session, publisher)
+    stats = Outbox.stats(db_session)
+    assert stats["pending"] == 5 and stats["retrying"] == 5
+
+    # Брокер повернувся: пачки по batch_size, кожна — одна публікація, порядок збережено
+    publisher.down = False
+    assert Outbox.relay_batch(db_session, publisher, batch_size=3) == 3
+    assert Outbox.relay_batch(db_session, publisher, batch_size=3) == 2
+    assert Outbox.relay_batch(db_session, publisher) == 0
+    assert publisher.batches == [3, 2]
+    assert [m["n"] for _, m in publisher.sent] == [0, 1, 2, 3, 4]
+    assert Outbox.stats(db_session) == {"pending": 0, "retrying": 0, "oldest_pending_age_sec": 0.0}
+
+    # Відправлені рядки прибираються після терміну зберігання
+    assert Outbox.cleanup(db_session, retention_hours=0) == 5
+
+def test_cancelled_order_event_names_customer(db_session):
+    """order.refunded несе customer_id — лояльність скидає кешовані підсумки історії клієнта"""
+    from services.order_service import OrderService
+    order = models.Order(total_price=80.0, payment_method="card", customer_id=7)
+    db_session.add(order)
+    db_session.commit()
+
+    assert OrderService.cancel_order(db_session, order.id)
+    event = db_session.query(models.OutboxEvent).filter(models.OutboxEvent.routing_key == "order.refunded").one()
+    assert event.payload["customer_id"] == 7
@@ -0,0 +1,221 @@
+import json
+import threading
+import pika
+import pytest
+from services.rabbitmq_client import RabbitMQClient
+from services.rabbitmq_topology import EVENTS_EXCHANGE
+
+class StubChannel:
+    def __init__(self, broker):
+        self.broker = broker
+        self.is_open = True
+        self.confirms = False
+        self.tx = False
+        self.uncommitted = []
+        self.on_return = None
+
+    def confirm_delivery(self):
+        self.confirms = True
+
+    def tx_select(self):
+        self.tx = True
+
+    def tx_commit(self):
+        if self.broker.lose_commits:
+            raise pika.exceptions.StreamLostError("connection reset")
+        self.broker.commits += 1
+        self.broker.messages += self.uncommitted
+        self.uncommitted = []
+
+    def add_on_return_callback(self, callback):
+        self.on_return = callback
+
+    def exchange_declare(self, exchange, exchange_type, durable):
+        self.broker.declares.append(exchange)
+
+    def queue_declare(self, queue, durable):
+        self.broker.declares.append(queue)
+
+    def queue_bind(self, queue, exchange, routing_key):
+        self.broker.bindings.append((queue, routing_key))
+
+    def basic_publish(self, exchange, routing_key, body, properties, mandatory=False):
+        if self.broker.drop_next:
+            self.broker.drop_next = False
+            raise pika.exceptions.StreamLostError("connection reset")
+        assert self.confirms or self.tx, "публікація без publisher confirms"
+        self.broker.publishes += 1
+        # У транзакції повідомлення потрапляють у черги лише на tx_commit
+        target = self.uncommitted if self.tx else self.broker.messages
+        if not exchange:
+            target.append((routing_key, json.loads(body), properties.delivery_mode))
+            return
+        # Topic exchange: копія в кожну чергу з підходящою прив'язкою ('#' — будь-який хвіст)
+        queues = [q for q, key in self.broker.bindings
+                  if key == routing_key or (key.endswith(".#") and routing_key.startswith(key[:-1]))]
+        if not queues and mandatory:
+            if self.tx:
+                self.on_return(self, pika.spec.Basic.Return(routing_key=routing_key), properties, body)
+                return
+            raise pika.exceptions.UnroutableError([])
+        for q in queues:
+            target.append((q, json.loads(body), properties.delivery_mode))
+
+class StubConnection:
+    def __init__(self, broker):
+        self.broker = broker
+        self.is_closed = False
+
+    def channel(self):
+        return StubChannel(self.broker)
+
+    def process_data_events(self, time_limit=0):
+        pass
+
+    def close(self):
+        self.is_closed = True
+
+class StubBroker:
+    """Брокер у пам'яті: рахує з'єднання, декларації черг та отримані повідомлення"""
+    def __init__(self):
+        self.connections = 0
+        self.declares = []
+        self.bindings = []
+        self.messages = []
+        self.publishes = 0
+        self.commits = 0
+        self.drop_next = False
+        self.lose_commits = False
+
+    def connect(self):
+        self.connections += 1
+        return StubConnection(self)
+
+def test_publish_reuses_connection_and_declares_queue_once():
+    broker = StubBroker()
+    client = RabbitMQClient(pool_size=2, connection_factory=broker.connect)
+
+    for i in range(5):
+        client.publish("finance_queue", {"event_type": "order_paid", "order_id": i})
+    client.publish("loyalty_queue", {"event_type": "order_paid", "order_id": 1})
+
+    assert broker.connections == 1
+    assert broker.declares == ["finance_queue", "loyalty_queue"]
+    assert [m[1]["order_id"] for m in broker.messages[:5]] == [0, 1, 2, 3, 4]
+    assert all(mode == 2 for _, _, mode in broker.messages)  # повідомлення стійкі
+
+    stats = client.stats()
+    assert stats["published"] == stats["confirmed"] == 6
+    assert stats["failed"] == 0
+    assert "p99" in stats["latency_ms"]
+
+def test_publish_event_fans_out_single_publish_via_exchange():
+    broker = StubBroker()
+    client = RabbitMQClient(pool_size=1, connection_factory=broker.connect)
+
+    client.publish_event("order.paid", {"event_type": "order_paid", "order_id": 7})
+    client.publish_event("stock.deduct_bom", {"event_type": "deduct_bom", "order_id": 7})
+
+    # Два publish на чек: брокер сам розклав order.paid у фінанси та лояльність
+    assert broker.publishes == 2
+    assert sorted(q for q, _, _ in broker.messages) == ["finance_queue", "inventory_queue", "loyalty_queue"]
+    # Топологія оголошується один раз на процес
+    assert broker.declares.count(EVENTS_EXCHANGE) == 1
+
+    # Подія без жодної прив'язаної черги не зникає мовчки
+    with pytest.raises(pika.exceptions.UnroutableError):
+        client.publish_event("unknown.event", {"n": 1})
+    assert client.stats()["nacked"] == 1
+
+def test_publish_reconnects_after_lost_connection():
+    broker = StubBroker()
+    client = RabbitMQClient(pool_size=1, connection_factory=broker.connect)
+    client.publish("inventory_queue", {"n": 1})
+
+    broker.drop_next = True
+    client.publish("inventory_queue", {"n": 2})
+
+    assert [m[1]["n"] for m in broker.messages] == [1, 2]
+    assert broker.connections == 2
+
+def publish_concurrently(client, count, queue_name="finance_queue"):
+    """count потоків одночасно роблять publish; повертає винятки, які вони отримали"""
+    errors = []
+
+    def worker(n):
+        try:
+            client.publish(queue_name, {"n": n})
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return errors
+
+def test_batch_shares_one_commit_and_waits_for_it():
+    """Одночасні publish ідуть однією транзакцією і повертаються лише після її підтвердження"""
+    broker = StubBroker()
+    client = RabbitMQClient(pool_size=1, batch_size=3, batch_ms=10_000, connection_factory=broker.connect)
+
+    assert publish_concurrently(client, 6) == []
+    assert sorted(m[1]["n"] for m in broker.messages) == [0, 1, 2, 3, 4, 5]
+    assert broker.commits == 2
+    assert client.stats()["batches"] == 2
+
+    # Неповна пачка йде по таймеру — publish чекає на неї, а не повертається одразу
+    client = RabbitMQClient(pool_size=1, batch_size=100, batch_ms=5, connection_factory=broker.connect)
+    client.publish("finance_queue", {"n": 6})
+    assert broker.messages[-1][1] == {"n": 6}
+
+    # immediate=True обходить батч (checkout має знати, що замовлення вже в черзі)
+    client.publish("orders_queue", {"n": 99}, immediate=True)
+    assert broker.messages[-1][1] == {"n": 99}
+
+def test_failed_batch_is_raised_to_every_publisher():
+    """Обрив посеред пачки: один повтор; якщо і він невдалий — кожен publish пачки отримує виняток"""
+    broker = StubBroker()
+    client = RabbitMQClient(pool_size=1, batch_size=3, batch_ms=10_000, connection_factory=broker.connect)
+
+    broker.drop_next = True
+    assert publish_concurrently(client, 3) == []
+    assert sorted(m[1]["n"] for m in broker.messages) == [0, 1, 2]  # незакомічена спроба не задублювалась
+
+    broker.messages.clear()
+    broker.lose_commits = True
+    errors = publish_concurrently(client, 3)
+    assert len(errors) == 3
+    assert broker.messages == []
+    assert client.stats()["failed"] == 3
+
+def test_publish_events_confirms_batch_once_and_raises_unroutable():
+    broker = StubBroker()
+    client = RabbitMQClient(pool_size=1, connection_factory=broker.connect)
+
+    client.publish_events([("order.paid", {"order_id": 1}), ("stock.deduct_bom", {"order_id": 1})])
+    assert broker.commits == 1
+    assert sorted(q for q, _, _ in broker.messages) == ["finance_queue", "inventory_queue", "loyalty_queue"]
+
+    with pytest.raises(pika.exceptions.UnroutableError):
+        client.publish_events([("order.paid", {"order_id": 2}), ("unknown.event", {"n": 1})])
+    assert client.stats()["nacked"] == 1
+
+def test_pool_is_bounded_under_concurrent_publishers():
+    broker = StubBroker()
+    client = RabbitMQClient(pool_size=3, connection_factory=broker.connect)
+
+    def worker(start):
+        for i in range(start, start + 20):
+            client.publish("finance_queue", {"n": i})
+
+    threads = [threading.Thread(target=worker, args=(k * 100,)) for k in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(broker.messages) == 160
+    assert broker.connections <= 3
+    assert client.stats()["confirmed"] == 160